@@ -0,0 +1,571 @@
+import fcntl
+import json
+import multiprocessing as mp
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.data.shared_snapshot import attach_snapshot, shared_snapshot_dir
+from src.ml.feature_config import SERVING_COLUMNS
+from src.ml.predictor import ModelRegistry, QuantilePredictor
+from src.ml.predictor_factory import model_registry
+from src.optimization.chain import chain_decision_rows, plan_chain_day
+
+
+class QueueFullError(Exception):
+    pass
+
+
+# =====================================================
+# Job table (SQLite, no external broker)
+# =====================================================
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id        TEXT PRIMARY KEY,
+    kind          TEXT NOT NULL,
+    status        TEXT NOT NULL,
+    params        TEXT NOT NULL,
+    tasks_total   INTEGER NOT NULL,
+    tasks_done    INTEGER NOT NULL DEFAULT 0,
+    n_rows        INTEGER NOT NULL DEFAULT 0,
+    submitted_at  REAL NOT NULL,
+    started_at    REAL,
+    finished_at   REAL,
+    owner_pid     INTEGER,
+    result_path   TEXT,
+    error         TEXT,
+    model_version TEXT,
+    dataset       TEXT
+)
+"""
+
+# Columns added after the first release, for job files created before
+_ADDED_COLUMNS = {"model_version": "TEXT", "dataset": "TEXT"}
+
+
+class JobStore:
+    """
+    Job records in a SQLite file. Status moves queued -> running ->
+    done / failed / cancelled; a cancel on a running job goes through
+    "cancelling" until its runner stops.
+    """
+
+    def __init__(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(
+            str(path), check_same_thread=False, isolation_level=None
+        )
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(_SCHEMA)
+
+            existing = {
+                row["name"] for row in self._conn.execute("PRAGMA table_info(jobs)")
+            }
+            for name, sql_type in _ADDED_COLUMNS.items():
+                if name not in existing:
+                    self._conn.execute(f"ALTER TABLE jobs ADD COLUMN {name} {sql_type}")
+
+    def _execute(self, sql: str, args=()) -> sqlite3.Cursor:
+        with self._lock:
+            return self._conn.execute(sql, args)
+
+    def submit(self, kind: str, params: dict, tasks_total: int, max_queued: int) -> str:
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                (queued,) = self._conn.execute(
+                    "SELECT COUNT(*) FROM jobs WHERE status = 'queued'"
+                ).fetchone()
+                if queued >= max_queued:
+                    raise QueueFullError(f"{queued} jobs already queued")
+
+                self._conn.execute(
+                    "INSERT INTO jobs (job_id, kind, status, params, "
+                    "tasks_total, submitted_at) VALUES (?, ?, 'queued', ?, ?, ?)",
+                    (job_id, kind, json.dumps(params), tasks_total, time.time()),
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return job_id
+
+    def claim_next(self) -> Optional[dict]:
+        """
+        Atomically move the oldest queued job to running for this
+        process (safe with several API processes on one file).
+        """
+        row = self._execute(
+            "UPDATE jobs SET status = 'running', started_at = ?, owner_pid = ? "
+            "WHERE job_id = (SELECT job_id FROM jobs WHERE status = 'queued' "
+            "ORDER BY submitted_at LIMIT 1) RETURNING *",
+            (time.time(), os.getpid()),
+        ).fetchone()
+        return dict(row) if row else None
+
+    def get(self, job_id: str) -> Optional[dict]:
+        row = self._execute(
+            "SELECT * FROM jobs WHERE job_id = ?", (job_id,)
+        ).fetchone()
+        return dict(row) if row else None
+
+    def status(self, job_id: str) -> Optional[str]:
+        job = self.get(job_id)
+        return job["status"] if job else None
+
+    def record_source(self, job_id: str, model_version: str, dataset: str) -> None:
+        self._execute(
+            "UPDATE jobs SET model_version = ?, dataset = ? WHERE job_id = ?",
+            (model_version, dataset, job_id),
+        )
+
+    def update_progress(self, job_id: str, tasks_done: int, n_rows: int) -> None:
+        self._execute(
+            "UPDATE jobs SET tasks_done = ?, n_rows = ? WHERE job_id = ?",
+            (tasks_done, n_rows, job_id),
+        )
+
+    def finish(
+        self,
+        job_id: str,
+        status: str,
+        result_path: Optional[Path] = None,
+        error: Optional[str] = None,
+    ) -> None:
+        self._execute(
+            "UPDATE jobs SET status = ?, finished_at = ?, result_path = ?, "
+            "error = ? WHERE job_id = ?",
+            (
+                status,
+                time.time(),
+                None if result_path is None else str(result_path),
+                error,
+                job_id,
+            ),
+        )
+
+    def request_cancel(self, job_id: str) -> Optional[dict]:
+        """
+        Cancel a queued job immediately; ask a running job to stop.
+        Finished jobs are left as they are.
+        """
+        self._execute(
+            "UPDATE jobs SET status = 'cancelled', finished_at = ? "
+            "WHERE job_id = ? AND status = 'queued'",
+            (time.time(), job_id),
+        )
+        self._execute(
+            "UPDATE jobs SET status = 'cancelling' "
+            "WHERE job_id = ? AND status = 'running'",
+            (job_id,),
+        )
+        return self.get(job_id)
+
+    def requeue(self, job_id: str) -> None:
+        """
+        Put a running job back in the queue, to run again from its first
+        task (its place in the queue is kept). A job being cancelled is
+        cancelled instead.
+        """
+        self._execute(
+            "UPDATE jobs SET status = 'cancelled', finished_at = ? "
+            "WHERE job_id = ? AND status = 'cancelling'",
+            (time.time(), job_id),
+        )
+        self._execute(
+            "UPDATE jobs SET status = 'queued', started_at = NULL, "
+            "owner_pid = NULL, tasks_done = 0, n_rows = 0, "
+            "model_version = NULL, dataset = NULL "
+            "WHERE job_id = ? AND status = 'running'",
+            (job_id,),
+        )
+
+    def fail_orphaned(self) -> None:
+        """
+        Mark running jobs whose owning process is gone (e.g. after a
+        restart) as failed.
+        """
+        rows = self._execute(
+            "SELECT job_id, owner_pid FROM jobs "
+            "WHERE status IN ('running', 'cancelling')"
+        ).fetchall()
+        for job_id, pid in rows:
+            if not _pid_alive(pid):
+                self.finish(job_id, "failed", error="Runner process exited")
+
+
+def _pid_alive(pid: Optional[int]) -> bool:
+    if pid is None:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+# =====================================================
+# Worker side (spawned processes, snapshot shared via mmap)
+# =====================================================
+
+_RESULT_COLUMNS = ["date", "store_nbr", "item_nbr", "forecast", "order_qty"]
+
+# Set by _init_worker in each pool process. Workers are spawned, not
+# forked: LightGBM's OpenMP runtime is not fork-safe once the API
+# process has used it, and a forked worker can hang in predict.
+_WORKER: Dict[str, object] = {}
+
+
+def _init_worker(snapshot_dir: str, registry: ModelRegistry, num_threads: int) -> None:
+    """
+    Attach the materialized snapshot (pages shared with the API and the
+    other workers) and load this worker's own predictor.
+    """
+    snapshot = attach_snapshot(Path(snapshot_dir))
+    _WORKER["df_features"] = snapshot.df
+    _WORKER["dates"] = snapshot.df["date"].to_numpy()
+    _WORKER["num_threads"] = num_threads
+    _WORKER["served"] = (registry, QuantilePredictor(registry, num_threads=num_threads))
+    _WORKER["other"] = None
+
+
+def _worker_predictor(registry: ModelRegistry) -> QuantilePredictor:
+    """
+    The served predictor, or the one of the job's own model version.
+    Jobs run one at a time, so only the latest other version is kept.
+    """
+    for entry in (_WORKER["served"], _WORKER["other"]):
+        if entry is not None and entry[0] == registry:
+            return entry[1]
+
+    predictor = QuantilePredictor(registry, num_threads=_WORKER["num_threads"])
+    _WORKER["other"] = (registry, predictor)
+    return predictor
+
+
+def _chain_plan_task(
+    date: np.datetime64, registry: ModelRegistry, params: dict
+) -> pd.DataFrame:
+    """
+    Plan one date of a chain-plan job (see /chain-plan).
+    """
+    positions = np.flatnonzero(_WORKER["dates"] == date)
+    df_day = _WORKER["df_features"].iloc[positions]
+
+    items = params.get("items")
+    df_slice = chain_decision_rows(
+        df_day,
+        stores=params.get("stores"),
+        item_promos=(
+            None if items is None
+            else {i["item_nbr"]: i["onpromotion"] for i in items}
+        ),
+    )
+
+    if df_slice.empty:
+        return pd.DataFrame(columns=_RESULT_COLUMNS)
+
+    forecast, orders = plan_chain_day(
+        df_slice,
+        _worker_predictor(registry),
+        service_level=params["service_level"],
+        dc_capacity=params["dc_capacity_units"],
+        store_caps={int(k): v for k, v in params["store_caps"].items()},
+        service_floor_ratio=params.get("service_floor_ratio") or 0.0,
+        perishable_weight=params.get("perishable_weight") or 1.0,
+    )
+
+    return pd.DataFrame({
+        "date": df_slice["date"].to_numpy(),
+        "store_nbr": df_slice["store_nbr"].to_numpy(),
+        "item_nbr": df_slice["item_nbr"].to_numpy(),
+        "forecast": np.asarray(forecast, dtype=np.float64),
+        "order_qty": orders,
+    })
+
+
+# =====================================================
+# Runner (dispatcher thread + process pool)
+# =====================================================
+
+@dataclass(frozen=True)
+class JobSource:
+    """
+    What jobs run on by default: the served dataset's snapshot and the
+    served model version's artifacts.
+    """
+    dataset: str
+    snapshot_path: Path
+    model_version: str
+    registry: ModelRegistry
+
+
+def _unique_dates(df_features: pd.DataFrame) -> List[pd.Timestamp]:
+    return [pd.Timestamp(d) for d in np.unique(df_features["date"].to_numpy())]
+
+
+class JobRunner:
+    """
+    Runs queued jobs one at a time, fanning each job's tasks (one per
+    date) out over a local process pool. Only one runner per host runs
+    jobs: it holds a file lock on `lock_path`, and runners in other API
+    workers only queue jobs (taking over if the holder exits). Workers read a memory-mapped
+    copy of the served snapshot (materialized under `shared_dir`) and
+    load their own boosters: the served model version's, or the one a
+    job asks for. Progress is written to the job table after every
+    task, and a cancel request is honored between tasks (unstarted
+    tasks are dropped).
+    """
+
+    def __init__(
+        self,
+        store: JobStore,
+        df_features: pd.DataFrame,
+        source: JobSource,
+        results_dir: Path,
+        shared_dir: Path,
+        lock_path: Path,
+        max_workers: int,
+        max_queued: int,
+        poll_seconds: float = 1.0,
+    ):
+        self.store = store
+        self.results_dir = results_dir
+        self.lock_path = lock_path
+        self.shared_dir = shared_dir
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self.poll_seconds = poll_seconds
+
+        # LightGBM threads per worker, so the host's one pool doesn't
+        # oversubscribe cores
+        self.worker_threads = max(1, (os.cpu_count() or 1) // max_workers)
+
+        self._unique_dates = _unique_dates(df_features)
+        self._source = source
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock_file = None
+
+        # Source swapped in by a reload, applied between jobs
+        self._swap_lock = threading.Lock()
+        self._next: Optional[JobSource] = None
+
+    # ---------- API side ----------
+
+    def dates_between(self, start: pd.Timestamp, end: pd.Timestamp) -> List[pd.Timestamp]:
+        return [d for d in self._unique_dates if start <= d <= end]
+
+    def submit(self, kind: str, params: dict, tasks_total: int) -> str:
+        job_id = self.store.submit(kind, params, tasks_total, self.max_queued)
+        self._wake.set()
+        return job_id
+
+    def swap(self, df_features: pd.DataFrame, source: JobSource) -> None:
+        """
+        Run later jobs on a new snapshot and model version. A running
+        job finishes on the old ones; before the next job the pool is
+        shut down, so its workers start again with the new data.
+        """
+        with self._swap_lock:
+            self._unique_dates = _unique_dates(df_features)
+            self._next = source
+
+        if self._thread is None:
+            self._apply_swap()
+        self._wake.set()
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(
+            target=self._loop, name="job-runner", daemon=True
+        )
+        self._thread.start()
+
+    def shutdown(self) -> None:
+        """
+        Stop taking jobs and shut the worker pool down, so its spawned
+        processes don't outlive the API. The running job drops its
+        unstarted tasks, waits for the started ones and goes back to the
+        queue, to run again from the start on the next runner.
+        """
+        self._stopping.set()
+        self._wake.set()
+
+        # The dispatcher requeues its job before the pool goes away
+        if self._thread is not None:
+            self._thread.join()
+
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True)
+
+        if self._lock_file is not None:
+            self._lock_file.close()  # releases the runner lock
+
+    # ---------- Dispatcher ----------
+
+    def _acquire_runner_lock(self) -> bool:
+        """
+        Wait until this process holds the host's runner lock (False if
+        shut down first). The lock goes with the process, so a standby
+        runner takes over when the holder exits or crashes.
+        """
+        self.lock_path.parent.mkdir(parents=True, exist_ok=True)
+        lock_file = open(self.lock_path, "w")
+
+        while not self._stopping.is_set():
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                self._stopping.wait(self.poll_seconds)
+                continue
+            self._lock_file = lock_file
+            return True
+
+        lock_file.close()
+        return False
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._pool_lock:
+            if self._stopping.is_set():
+                raise RuntimeError("Job runner is shut down")
+
+            if self._pool is None:
+                # Converted once; later pools (and SHARED_SNAPSHOT serving) reuse it
+                snapshot_dir = shared_snapshot_dir(
+                    self._source.snapshot_path, self.shared_dir, columns=SERVING_COLUMNS
+                )
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=mp.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(str(snapshot_dir), self._source.registry, self.worker_threads),
+                )
+            return self._pool
+
+    def _apply_swap(self) -> None:
+        with self._swap_lock:
+            swap, self._next = self._next, None
+        if swap is None:
+            return
+
+        self._source = swap
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True)
+
+    def _loop(self) -> None:
+        if not self._acquire_runner_lock():
+            return
+        self.store.fail_orphaned()
+
+        while not self._stopping.is_set():
+            self._apply_swap()
+            job = self.store.claim_next()
+            if job is None:
+                self._wake.wait(self.poll_seconds)
+                self._wake.clear()
+                continue
+
+            try:
+                self._run(job)
+            except Exception as e:
+                if self._stopping.is_set():
+                    # Cut short by shutdown()
+                    self.store.requeue(job["job_id"])
+                else:
+                    self.store.finish(job["job_id"], "failed", error=repr(e))
+
+    def _run(self, job: dict) -> None:
+        job_id = job["job_id"]
+        params = json.loads(job["params"])
+
+        source = self._source
+        model_version = params.get("model_version") or source.model_version
+        registry = (
+            source.registry if model_version == source.model_version
+            else model_registry(model_version)
+        )
+        self.store.record_source(job_id, model_version, source.dataset)
+
+        # Fixed at submit (tasks_total), whatever snapshot is served now
+        if "dates" in params:
+            dates = [pd.Timestamp(d) for d in params["dates"]]
+        else:  # queued before dates were stored
+            dates = self.dates_between(
+                pd.Timestamp(params["start_date"]), pd.Timestamp(params["end_date"])
+            )
+
+        pool = self._get_pool()
+        pending = {
+            pool.submit(_chain_plan_task, d.to_datetime64(), registry, params)
+            for d in dates
+        }
+
+        frames = []
+        n_rows = 0
+        try:
+            while pending:
+                done, pending = wait(
+                    pending, timeout=self.poll_seconds, return_when=FIRST_COMPLETED
+                )
+                for future in done:
+                    frame = future.result()
+                    frames.append(frame)
+                    n_rows += len(frame)
+
+                if done:
+                    self.store.update_progress(job_id, len(frames), n_rows)
+
+                if self.store.status(job_id) == "cancelling":
+                    self.store.finish(job_id, "cancelled")
+                    return
+
+                if self._stopping.is_set():
+                    raise RuntimeError("Job runner is shut down")
+        finally:
+            for future in pending:
+                future.cancel()
+            wait(pending)
+
+        if not frames:  # no dates to plan (e.g. a legacy job's range)
+            frames = [pd.DataFrame(columns=_RESULT_COLUMNS)]
+
+        result = (
+            pd.concat(frames, ignore_index=True)
+            .sort_values(["date", "store_nbr", "item_nbr"], kind="stable")
+            .reset_index(drop=True)
+            .assign(model_version=model_version, dataset=source.dataset)
+        )
+
+        self.results_dir.mkdir(parents=True, exist_ok=True)
+        path = self.results_dir / f"{job_id}.parquet"
+        tmp = path.with_suffix(".parquet.tmp")
+        result.to_parquet(tmp, index=False)
+        os.replace(tmp, path)
+
+        self.store.finish(job_id, "done", result_path=path)
@@ -1,47 +1,303 @@
-from fastapi import FastAPI, HTTPException
-from typing import List
+import os
+import threading
+import time
+
+# Process start (before the heavy imports), for time-to-ready reporting
+STARTUP_T0 = time.perf_counter()
+
+from contextlib import asynccontextmanager
+from datetime import datetime
+from fastapi import BackgroundTasks, FastAPI, HTTPException
+from fastapi.responses import FileResponse, JSONResponse
+from typing import List, Optional, Tuple
 import pandas as pd
 import numpy as np
 
 from src.config import (
-    SNAPSHOTS_DIR,
+    JOB_WORKERS,
+    JOBS_DIR,
+    MAX_LOADED_MODEL_VERSIONS,
+    MAX_QUEUED_JOBS,
+    SHADOW_BATCH_ROWS,
+    SHADOW_DIR,
+    SHADOW_FLUSH_SECONDS,
+    SHADOW_MAX_PENDING,
+    SHADOW_MODEL_VERSION,
+    SHARED_SNAPSHOT,
+    SHARED_SNAPSHOT_DIR,
+    SNAPSHOT_MEMORY_BUDGET_MB,
+    SHARD_STORES_ENV,
     ACTIVE_MODEL_VERSION,
     ACTIVE_DATASET_MODE,
-    FEATURED_SNAPSHOT_BY_MODE,
 )
-from src.ml.predictor_factory import build_default_predictor
-from src.optimization.optimizer import optimize_proportional_allocation
-from api.schemas import ForecastToOrdersRequest, ForecastToOrdersResponse
+from src.ml.predictor import QuantilePredictor
+from src.ml.predictor_factory import (
+    PredictorCache,
+    build_default_predictor,
+    model_versions,
+)
+from src.data.snapshot_registry import LoadedSnapshot, SnapshotRegistry
+from src.optimization.capacity_curve import capacity_coverage_curve
+from src.optimization.chain import chain_decision_rows, plan_chain_day
+from src.optimization.constrained import (
+    budget_constraint,
+    cold_chain_constraint,
+    family_cap_constraints,
+    optimize_constrained_allocation,
+)
+from src.optimization.horizon import plan_order_horizon
+from src.optimization.newsvendor import (
+    expected_newsvendor_profit,
+    optimize_newsvendor_allocation,
+)
+from src.optimization.optimizer import optimize_proportional_allocation_arrays
+from src.optimization.packs import optimize_pack_allocation
+from src.optimization.promo import promo_what_if
+from src.optimization.scenarios import (
+    Scenario,
+    evaluate_scenarios,
+    predict_scenario_forecasts,
+    scenario_grid,
+)
+from src.utils.memory import process_memory_mb
+from api.jobs import JobRunner, JobSource, JobStore, QueueFullError
+from api.serving import (
+    ServingManager,
+    ServingState,
+    configured_versions,
+    dataset_modes,
+    load_serving_state,
+    load_snapshot,
+    validate_serving_state,
+)
+from api.shadow import ShadowScorer, ShadowYieldMiddleware
+from api.shards import parse_store_list
+from api.schemas import (
+    BatchItem,
+    CapacityCurveRequest,
+    CapacityCurveResponse,
+    ChainPlanJobRequest,
+    ChainPlanRequest,
+    ChainPlanResponse,
+    DecisionSliceRequest,
+    ForecastToOrdersRequest,
+    ForecastToOrdersResponse,
+    HorizonPlanRequest,
+    HorizonPlanResponse,
+    JobStatusResponse,
+    NewsvendorParams,
+    PromoWhatIfRequest,
+    PromoWhatIfResponse,
+    ReloadRequest,
+    ReloadStatusResponse,
+    ScenarioRequest,
+    ScenarioResponse,
+    ServingSourceRequest,
+    ShadowRequest,
+    ShadowStatusResponse,
+    SnapshotRegistryResponse,
+)
 
 # =====================================================
 # App metadata
 # =====================================================
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # On shutdown (uvicorn re-raises SIGTERM, so atexit would not run)
+    shadow.flush()
+    job_runner.shutdown()
+
+
 app = FastAPI(
     title="Forecast-to-Orders API",
     description="Quantile forecasting with capacity-constrained optimization",
     version="1.0",
+    lifespan=lifespan,
+)
+
+# =====================================================
+# Load predictor + featured snapshot (mode-aware, hot-reloadable)
+# =====================================================
+
+# Stores served by this process when run as a shard behind api/router.py
+SHARD_STORES = parse_store_list(os.environ.get(SHARD_STORES_ENV))
+
+
+def load_state(
+    model_version: str, dataset_mode: str, predictor=None, snapshot=None
+) -> ServingState:
+    if snapshot is None:
+        print(f"📦 Loading model {model_version} and featured snapshot ({dataset_mode})...")
+    else:
+        print(f"📦 Loading model {model_version} (keeping snapshot {dataset_mode})...")
+    return load_serving_state(
+        model_version,
+        dataset_mode,
+        shard_stores=SHARD_STORES,
+        shared=SHARED_SNAPSHOT,
+        predictor=predictor,
+        snapshot=snapshot,
+    )
+
+
+def job_source(state: ServingState) -> JobSource:
+    return JobSource(
+        dataset=state.dataset_mode,
+        snapshot_path=state.snapshot_path,
+        model_version=state.model_version,
+        registry=state.predictor.registry,
+    )
+
+
+def _on_swap(state: ServingState) -> None:
+    snapshots.pin(state.snapshot)
+    job_runner.swap(state.df_features, job_source(state))
+
+
+# Endpoints read serving.current once per request; a reload swaps it
+serving = ServingManager(
+    # Predictor SAFE: never crashes on missing latest/
+    load_state(ACTIVE_MODEL_VERSION, ACTIVE_DATASET_MODE, build_default_predictor()),
+    loader=load_state,
+    on_swap=_on_swap,
+)
+
+snapshot_load_s = time.perf_counter() - STARTUP_T0
+print(
+    f"✅ Loaded snapshot {serving.current.snapshot_path.name} with shape "
+    f"{serving.current.df_features.shape} ({snapshot_load_s:.2f}s since start)"
+)
+
+# =====================================================
+# Background job runner (SQLite queue + local process pool)
+# =====================================================
+
+job_runner = JobRunner(
+    JobStore(JOBS_DIR / "jobs.sqlite"),
+    serving.current.df_features,
+    job_source(serving.current),
+    results_dir=JOBS_DIR / "results",
+    shared_dir=SHARED_SNAPSHOT_DIR,
+    lock_path=JOBS_DIR / ".runner.lock",
+    max_workers=JOB_WORKERS,
+    max_queued=MAX_QUEUED_JOBS,
+)
+
+# =====================================================
+# Other datasets (per request), under a memory budget
+# =====================================================
+
+def _load_snapshot(dataset: str) -> LoadedSnapshot:
+    print(f"📦 Loading featured snapshot ({dataset}) on first request...")
+    return load_snapshot(dataset, shard_stores=SHARD_STORES, shared=SHARED_SNAPSHOT)
+
+
+# Served snapshot is pinned; others load on first request, LRU-evicted
+snapshots = SnapshotRegistry(
+    loader=_load_snapshot,
+    datasets=dataset_modes,
+    budget_bytes=SNAPSHOT_MEMORY_BUDGET_MB * 1024 * 1024,
 )
+snapshots.pin(serving.current.snapshot)
+
+
+def request_snapshot(
+    req: ServingSourceRequest, state: ServingState
+) -> LoadedSnapshot:
+    """
+    Snapshot for req.dataset; the served state's snapshot unless the
+    request names another dataset.
+    """
+    dataset = req.dataset or state.dataset_mode
+    if dataset == state.dataset_mode:
+        snapshots.record_hit(dataset)
+        return state.snapshot
+
+    try:
+        return snapshots.get(dataset)
+    except KeyError:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Unknown dataset {dataset!r}; available: {sorted(dataset_modes())}",
+        )
 
 # =====================================================
-# Load predictor (SAFE: never crashes on missing latest/)
+# Other model versions (per request) and shadow scoring
 # =====================================================
 
-print("📦 Loading predictor...")
-predictor = build_default_predictor()
+# Versions other than the served one, loaded on first request
+predictors = PredictorCache(MAX_LOADED_MODEL_VERSIONS)
+
+shadow = ShadowScorer(
+    SHADOW_DIR,
+    batch_rows=SHADOW_BATCH_ROWS,
+    flush_seconds=SHADOW_FLUSH_SECONDS,
+    max_pending=SHADOW_MAX_PENDING,
+)
+if SHADOW_MODEL_VERSION is not None:
+    shadow.set_challenger(SHADOW_MODEL_VERSION)
+app.add_middleware(ShadowYieldMiddleware, scorer=shadow)
+
+
+def request_predictor(
+    req: ServingSourceRequest, state: ServingState
+) -> Tuple[str, QuantilePredictor]:
+    """
+    (version, predictor) for req.model_version; the served state's
+    predictor unless the request names another version.
+    """
+    version = req.model_version or state.model_version
+    if version == state.model_version:
+        return version, state.predictor
+
+    try:
+        return version, predictors.get(version)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail=f"Unknown model version {version!r}")
+
+# Stand-in for SKUs not listed in the request (whole-store mode)
+DEFAULT_ITEM = BatchItem(item_nbr=0, onpromotion=False)
 
 # =====================================================
-# Load featured snapshot (mode-aware)
+# Model warm-up (background; the API accepts requests meanwhile)
 # =====================================================
 
-snapshot_name = FEATURED_SNAPSHOT_BY_MODE[ACTIVE_DATASET_MODE]
-FEATURED_SNAPSHOT_PATH = SNAPSHOTS_DIR / snapshot_name
+startup_state = {
+    "status": "starting",
+    "snapshot_load_s": round(snapshot_load_s, 3),
+    "warm_up_s": None,
+    "time_to_ready_s": None,
+    "error": None,
+}
+
+
+def _warm_up_models() -> None:
+    """
+    Load every booster and run one (validated) predict per service
+    level, so the first real request pays no one-time initialization.
+    """
+    start = time.perf_counter()
+    try:
+        validate_serving_state(serving.current)
+    except Exception as e:
+        startup_state["error"] = f"{type(e).__name__}: {e}"
+        startup_state["status"] = "failed"
+        print(f"❌ Model warm-up failed: {startup_state['error']}")
+    else:
+        now = time.perf_counter()
+        startup_state["warm_up_s"] = round(now - start, 3)
+        startup_state["time_to_ready_s"] = round(now - STARTUP_T0, 3)
+        startup_state["status"] = "ok"
+        print(f"✅ Ready in {startup_state['time_to_ready_s']:.2f}s")
+
+    # Shards hold a subset of stores: chain-wide jobs run on a full instance
+    if SHARD_STORES is None:
+        job_runner.start()
 
-print(f"📦 Loading featured snapshot ({ACTIVE_DATASET_MODE})...")
-df_features = pd.read_parquet(FEATURED_SNAPSHOT_PATH)
-df_features["date"] = pd.to_datetime(df_features["date"])
 
-print(f"✅ Loaded snapshot {snapshot_name} with shape {df_features.shape}")
+threading.Thread(target=_warm_up_models, name="model-warm-up", daemon=True).start()
 
 # =====================================================
 # Health & version endpoints
@@ -49,23 +305,124 @@ print(f"✅ Loaded snapshot {snapshot_name} with shape {df_features.shape}")
 
 @app.get("/health")
 def health():
-    return {"status": "ok"}
+    # Liveness: the process is up ("starting" until models are warm)
+    return {"status": startup_state["status"]}
+
+
+@app.get("/ready")
+def ready():
+    # Readiness: 503 until boosters are loaded and warmed up
+    return JSONResponse(
+        status_code=200 if startup_state["status"] == "ok" else 503,
+        content=startup_state,
+    )
 
 
 @app.get("/version")
 def version():
+    state = serving.current
     return {
-        "model_version": ACTIVE_MODEL_VERSION,
-        "dataset_mode": ACTIVE_DATASET_MODE,
-        "snapshot": FEATURED_SNAPSHOT_PATH.name,
+        "model_version": state.model_version,
+        "dataset_mode": state.dataset_mode,
+        "snapshot": state.snapshot_path.name,
+        "loaded_at": _iso(state.loaded_at),
+        "swapped_at": _iso(serving.reload_status["swapped_at"]),
+        "reload": reload_status(),
+        "snapshot_mode": "shared" if SHARED_SNAPSHOT else "private",
+        "shard_stores": SHARD_STORES,
+        "worker_memory": process_memory_mb(),
     }
 
 # =====================================================
-# Forecast → Orders endpoint
+# Admin: hot reload of model version / dataset mode
 # =====================================================
 
-@app.post("/forecast-to-orders", response_model=ForecastToOrdersResponse)
-def forecast_to_orders(req: ForecastToOrdersRequest):
+def reload_status() -> dict:
+    status = serving.reload_status
+    return {
+        "status": status["status"],
+        "requested": status["requested"],
+        "swapped_at": _iso(status["swapped_at"]),
+        "previous": status["previous"],
+        "previous_freed_at": _iso(status["previous_freed_at"]),
+        "error": status["error"],
+    }
+
+
+@app.post("/admin/reload", response_model=ReloadStatusResponse, status_code=202)
+def admin_reload(req: ReloadRequest):
+    """
+    Build the requested model version / dataset mode in the background,
+    smoke-test it and swap it in. An empty request re-reads both from
+    src/config.py; otherwise a field left out keeps its current value.
+    Requests keep being served by the current state until the swap;
+    poll GET /admin/reload or /version for the outcome.
+    """
+    if req.model_version is None and req.dataset_mode is None:
+        try:
+            model_version, dataset_mode = configured_versions()
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    else:
+        state = serving.current
+        model_version = req.model_version or state.model_version
+        dataset_mode = req.dataset_mode or state.dataset_mode
+
+    if not serving.reload(model_version, dataset_mode):
+        raise HTTPException(status_code=409, detail="A reload is already running")
+    return reload_status()
+
+
+@app.get("/admin/reload", response_model=ReloadStatusResponse)
+def admin_reload_status():
+    return reload_status()
+
+
+# =====================================================
+# Shadow scoring (challenger model, off the request path)
+# =====================================================
+
+@app.get("/shadow", response_model=ShadowStatusResponse)
+def shadow_status():
+    return {**shadow.stats(), "loaded_versions": predictors.stats()}
+
+
+@app.post("/admin/shadow", response_model=ShadowStatusResponse)
+def admin_shadow(req: ShadowRequest):
+    """
+    Shadow-score /forecast-to-orders and /capacity-curve decisions with
+    req.model_version (null: stop). Diffs to the served forecast are
+    written in batches under data/shadow/.
+    """
+    try:
+        shadow.set_challenger(req.model_version)
+    except FileNotFoundError:
+        raise HTTPException(
+            status_code=404, detail=f"Unknown model version {req.model_version!r}"
+        )
+    return shadow_status()
+
+# =====================================================
+# Loaded snapshots (per-request datasets)
+# =====================================================
+
+@app.get("/snapshots", response_model=SnapshotRegistryResponse)
+def snapshot_status():
+    return snapshots.stats()
+
+# =====================================================
+# Shared decision-slice builder
+# =====================================================
+
+def slice_decision_rows(
+    req: DecisionSliceRequest, snapshot: LoadedSnapshot
+) -> pd.DataFrame:
+    """
+    Slice the snapshot to one store/date and the requested SKUs (one
+    row per SKU). Without req.items every SKU of the store/date is
+    taken from the index; family / perishable filters and sparse
+    promo overrides apply in both modes.
+    """
 
     # -----------------------------
     # Parse & validate inputs
@@ -75,32 +432,31 @@ def forecast_to_orders(req: ForecastToOrdersRequest):
     except Exception:
         raise HTTPException(status_code=400, detail="Invalid date format")
 
-    store_id = req.store_nbr
-    service_level = req.service_level
-    capacity = req.capacity_units
-    service_floor_ratio = req.service_floor_ratio or 0.0
-    perishable_weight = req.perishable_weight or 1.0
-
     # -----------------------------
     # Slice snapshot (store + date)
     # -----------------------------
-    df_slice = df_features[
-        (df_features["store_nbr"] == store_id)
-        & (df_features["date"] == decision_date)
-    ].copy()
+    rows = snapshot.decision_index.get((req.store_nbr, decision_date))
 
-    if df_slice.empty:
+    if rows is None:
         raise HTTPException(
             status_code=404,
             detail="No feature data available for store/date",
         )
 
+    df_slice = snapshot.df_features.iloc[rows]
+
     # -----------------------------
-    # Restrict to requested SKUs
+    # Restrict to requested SKUs / filters
     # -----------------------------
-    item_map = {item.item_nbr: item.onpromotion for item in req.items}
+    if req.items is not None:
+        item_map = {item.item_nbr: item.onpromotion for item in req.items}
+        df_slice = df_slice[df_slice["item_nbr"].isin(item_map.keys())]
+
+    if req.families is not None:
+        df_slice = df_slice[df_slice["family"].isin(req.families)]
 
-    df_slice = df_slice[df_slice["item_nbr"].isin(item_map.keys())]
+    if req.perishable is not None:
+        df_slice = df_slice[df_slice["perishable"].astype(bool) == req.perishable]
 
     if df_slice.empty:
         raise HTTPException(
@@ -123,60 +479,252 @@ def forecast_to_orders(req: ForecastToOrdersRequest):
     # -----------------------------
     # Override onpromotion flags
     # -----------------------------
-    df_slice["onpromotion"] = (
-        df_slice["item_nbr"]
-        .map(item_map)
-        .astype(int)
-    )
+    if req.items is not None:
+        df_slice["onpromotion"] = (
+            df_slice["item_nbr"]
+            .map(item_map)
+            .astype(int)
+        )
+    else:
+        df_slice["onpromotion"] = df_slice["onpromotion"].astype(int)
+
+    if req.promo_overrides:
+        overrides = df_slice["item_nbr"].map(req.promo_overrides)
+        df_slice["onpromotion"] = (
+            overrides.fillna(df_slice["onpromotion"]).astype(int)
+        )
+
+    return df_slice
+
+
+def decision_items(req: DecisionSliceRequest, df_slice: pd.DataFrame) -> List[BatchItem]:
+    """
+    Request item for each slice row; rows not listed in req.items
+    (whole-store mode) get an item with no per-unit attributes.
+    """
+    items = {item.item_nbr: item for item in req.items or []}
+    return [items.get(i, DEFAULT_ITEM) for i in df_slice["item_nbr"]]
+
+
+def build_decision_slice(
+    req, snapshot: LoadedSnapshot, predictor: QuantilePredictor
+) -> pd.DataFrame:
+    """
+    Decision rows (see slice_decision_rows) with quantile forecasts
+    at req.service_level attached.
+    """
+    df_slice = slice_decision_rows(req, snapshot)
 
-    # -----------------------------
-    # Predict quantile demand
-    # -----------------------------
     y_hat = predictor.predict_df(
         df_slice,
-        service_level=service_level,
+        service_level=req.service_level,
     )
 
-    df_slice = df_slice.assign(forecast=y_hat)
+    return df_slice.assign(forecast=y_hat)
 
-    # -----------------------------
-    # Build optimizer inputs
-    # -----------------------------
-    demand = dict(zip(df_slice["item_nbr"], df_slice["forecast"]))
-    perishable_flags = dict(
-        zip(df_slice["item_nbr"], df_slice["perishable"])
+# =====================================================
+# Resource constraints (optional request block)
+# =====================================================
+
+def build_resource_constraints(req, df_slice: pd.DataFrame):
+    """
+    Translate req.constraints into ResourceConstraint rows aligned with
+    df_slice. Per-unit volume/cost come from the request items.
+    """
+    spec = req.constraints
+    skus = decision_items(req, df_slice)
+
+    unit_volume = np.array(
+        [item.unit_volume or 1.0 for item in skus], dtype=np.float64
+    )
+
+    constraints = family_cap_constraints(
+        df_slice["family"].to_numpy(),
+        spec.family_caps,
+        unit_volume,
+    )
+
+    if spec.cold_chain_capacity is not None:
+        constraints.append(
+            cold_chain_constraint(
+                df_slice["perishable"].to_numpy(),
+                spec.cold_chain_capacity,
+                unit_volume,
+            )
+        )
+
+    if spec.budget is not None:
+        if any(item.unit_cost is None for item in skus):
+            raise HTTPException(
+                status_code=400,
+                detail="budget requires unit_cost on every item",
+            )
+        constraints.append(
+            budget_constraint(
+                np.array([item.unit_cost for item in skus]),
+                spec.budget,
+            )
+        )
+
+    return constraints
+
+# =====================================================
+# Forecast → Orders endpoint
+# =====================================================
+
+@app.post("/forecast-to-orders", response_model=ForecastToOrdersResponse)
+def forecast_to_orders(req: ForecastToOrdersRequest, background_tasks: BackgroundTasks):
+
+    state = serving.current
+    model_version, predictor = request_predictor(req, state)
+    snapshot = request_snapshot(req, state)
+    store_id = req.store_nbr
+    service_level = req.service_level
+    capacity = req.capacity_units
+    service_floor_ratio = req.service_floor_ratio or 0.0
+    perishable_weight = req.perishable_weight or 1.0
+
+    df_slice = build_decision_slice(req, snapshot, predictor)
+
+    # Queued for the challenger only after the response is sent
+    background_tasks.add_task(
+        shadow.submit, "forecast-to-orders", df_slice, service_level, model_version
     )
 
     # -----------------------------
     # Optimize orders
     # Capacity is a CAP, not a target
     # -----------------------------
-    orders = optimize_proportional_allocation(
-        demand=demand,
-        capacity=capacity,
-        service_floor_ratio=service_floor_ratio,
-        perishable_flags=perishable_flags,
-        perishable_weight=perishable_weight,
-        fill_capacity=False,
+    forecast = df_slice["forecast"].to_numpy()
+
+    expected_profit = None
+    unused_capacity = None
+    packing_unused_units = None
+
+    uses_packs = any(
+        item.pack_size is not None or item.moq is not None
+        for item in req.items or []
     )
 
+    if uses_packs and (
+        req.allocation_method != "proportional" or req.constraints is not None
+    ):
+        raise HTTPException(
+            status_code=400,
+            detail=(
+                "pack_size / moq are only supported with proportional "
+                "allocation without constraints"
+            ),
+        )
+
+    if uses_packs:
+        skus = decision_items(req, df_slice)
+
+        allocation = optimize_pack_allocation(
+            demand=forecast,
+            capacity=capacity,
+            pack_size=np.array([item.pack_size or 1 for item in skus]),
+            moq=np.array([item.moq or 0 for item in skus]),
+            service_floor_ratio=service_floor_ratio,
+            perishable=df_slice["perishable"].to_numpy(),
+            perishable_weight=perishable_weight,
+        )
+        orders = allocation.orders
+        unused_capacity = capacity - int(orders.sum())
+        packing_unused_units = allocation.packing_unused_units
+        constraint_usage = None
+    elif req.allocation_method == "newsvendor":
+        if req.constraints is not None:
+            raise HTTPException(
+                status_code=400,
+                detail="constraints are only supported with proportional allocation",
+            )
+
+        params = req.newsvendor or NewsvendorParams()
+        skus = decision_items(req, df_slice)
+
+        margin = np.array([
+            params.unit_margin if item.unit_margin is None else item.unit_margin
+            for item in skus
+        ])
+        holding = np.array([
+            params.unit_holding_cost if item.unit_holding_cost is None
+            else item.unit_holding_cost
+            for item in skus
+        ])
+
+        try:
+            levels, quantiles = predictor.predict_quantiles(
+                df_slice, params.service_levels
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        orders = optimize_newsvendor_allocation(
+            levels,
+            quantiles,
+            capacity=capacity,
+            unit_margin=margin,
+            unit_holding_cost=holding,
+        )
+        expected_profit = round(
+            float(
+                expected_newsvendor_profit(
+                    levels, quantiles, orders, margin, holding
+                ).sum()
+            ),
+            2,
+        )
+        constraint_usage = None
+    elif req.constraints is None:
+        orders = optimize_proportional_allocation_arrays(
+            demand=forecast,
+            capacity=capacity,
+            service_floor_ratio=service_floor_ratio,
+            perishable=df_slice["perishable"].to_numpy(),
+            perishable_weight=perishable_weight,
+            fill_capacity=False,
+        )
+        constraint_usage = None
+    else:
+        constraints = build_resource_constraints(req, df_slice)
+
+        orders = optimize_constrained_allocation(
+            demand=forecast,
+            capacity=capacity,
+            constraints=constraints,
+            service_floor_ratio=service_floor_ratio,
+            perishable=df_slice["perishable"].to_numpy(),
+            perishable_weight=perishable_weight,
+        )
+        constraint_usage = [
+            {"name": "capacity", "limit": capacity, "used": int(orders.sum())}
+        ] + [
+            {
+                "name": c.name,
+                "limit": c.limit,
+                "used": round(float(c.coefficients @ orders), 4),
+            }
+            for c in constraints
+        ]
+
     # -----------------------------
     # Build response rows
     # -----------------------------
     results = [
         {
             "item_nbr": int(item),
-            "forecast": round(float(demand[item]), 2),
-            "order_qty": int(orders.get(item, 0)),
+            "forecast": round(float(f), 2),
+            "order_qty": int(q),
         }
-        for item in df_slice["item_nbr"]
+        for item, f, q in zip(df_slice["item_nbr"], forecast, orders)
     ]
 
     # -----------------------------
     # Summary metrics
     # -----------------------------
-    total_forecast = float(np.sum(list(demand.values())))
-    total_orders = int(np.sum(list(orders.values())))
+    total_forecast = float(np.sum(forecast))
+    total_orders = int(np.sum(orders))
 
     return {
         "store_nbr": store_id,
@@ -184,12 +732,596 @@ def forecast_to_orders(req: ForecastToOrdersRequest):
         "service_level": service_level,
         "capacity_units": capacity,
         "fill_capacity": False,
-        "model_version": ACTIVE_MODEL_VERSION,
-        "dataset_mode": ACTIVE_DATASET_MODE,
-        "snapshot": FEATURED_SNAPSHOT_PATH.name,
+        "model_version": model_version,
+        "dataset_mode": snapshot.dataset,
+        "snapshot": snapshot.path.name,
         "summary": {
             "total_forecast": round(total_forecast, 2),
             "total_orders": total_orders,
+            "expected_profit": expected_profit,
+            "unused_capacity": unused_capacity,
+            "packing_unused_units": packing_unused_units,
+        },
+        "results": results,
+        "constraint_usage": constraint_usage,
+    }
+
+# =====================================================
+# Capacity curve endpoint
+# =====================================================
+
+@app.post("/capacity-curve", response_model=CapacityCurveResponse)
+def capacity_curve(req: CapacityCurveRequest, background_tasks: BackgroundTasks):
+    """
+    Exact capacity vs demand-served curve for one decision, from a
+    single forecast pass (no per-capacity re-solves).
+    """
+    state = serving.current
+    model_version, predictor = request_predictor(req, state)
+    snapshot = request_snapshot(req, state)
+    df_slice = build_decision_slice(req, snapshot, predictor)
+    background_tasks.add_task(
+        shadow.submit, "capacity-curve", df_slice, req.service_level, model_version
+    )
+
+    curve = capacity_coverage_curve(
+        demand=df_slice["forecast"].to_numpy(),
+        service_floor_ratio=req.service_floor_ratio or 0.0,
+        perishable=df_slice["perishable"].to_numpy(),
+        perishable_weight=req.perishable_weight or 1.0,
+    )
+
+    breakpoints = [
+        {
+            "capacity": round(float(c), 4),
+            "allocated": round(float(a), 4),
+            "served": round(float(s), 4),
+            "coverage": round(float(cov), 6),
+        }
+        for c, a, s, cov in zip(
+            curve.capacity, curve.allocated, curve.served, curve.coverage
+        )
+    ]
+
+    targets = [
+        {
+            "target_coverage": t,
+            "min_capacity": curve.min_capacity_for_coverage(t),
+        }
+        for t in req.target_coverages
+    ]
+
+    return {
+        "store_nbr": req.store_nbr,
+        "date": req.date,
+        "service_level": req.service_level,
+        "total_forecast": round(curve.total_demand, 2),
+        "model_version": model_version,
+        "dataset_mode": snapshot.dataset,
+        "snapshot": snapshot.path.name,
+        "breakpoints": breakpoints,
+        "targets": targets,
+    }
+
+# =====================================================
+# Chain-level planning endpoint (shared DC capacity)
+# =====================================================
+
+@app.post("/chain-plan", response_model=ChainPlanResponse)
+def chain_plan(req: ChainPlanRequest):
+    """
+    Forecast every (store, item) pair for a date in one batched predict
+    call and split the DC capacity jointly, honoring per-store caps.
+    """
+    state = serving.current
+    model_version, predictor = request_predictor(req, state)
+    snapshot = request_snapshot(req, state)
+    try:
+        decision_date = pd.to_datetime(req.date)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid date format")
+
+    df_slice = chain_decision_rows(
+        snapshot.df_features[snapshot.df_features["date"] == decision_date],
+        stores=req.stores,
+        item_promos=(
+            None if req.items is None
+            else {item.item_nbr: item.onpromotion for item in req.items}
+        ),
+    )
+
+    if df_slice.empty:
+        raise HTTPException(
+            status_code=404,
+            detail="No feature data available for date/stores/items",
+        )
+
+    forecast, orders = plan_chain_day(
+        df_slice,
+        predictor,
+        service_level=req.service_level,
+        dc_capacity=req.dc_capacity_units,
+        store_caps=req.store_caps,
+        service_floor_ratio=req.service_floor_ratio or 0.0,
+        perishable_weight=req.perishable_weight or 1.0,
+    )
+
+    store_ids = df_slice["store_nbr"].to_numpy()
+    stores = np.unique(store_ids)
+
+    # -----------------------------
+    # Per-store summary & rows
+    # -----------------------------
+    _, row_idx = np.unique(store_ids, return_inverse=True)
+    store_forecast = np.bincount(row_idx, weights=forecast)
+    store_orders = np.bincount(row_idx, weights=orders).astype(np.int64)
+
+    store_summaries = [
+        {
+            "store_nbr": int(s),
+            "store_cap": req.store_caps.get(int(s)),
+            "total_forecast": round(float(f), 2),
+            "total_orders": int(o),
+        }
+        for s, f, o in zip(stores, store_forecast, store_orders)
+    ]
+
+    results = [
+        {
+            "store_nbr": s,
+            "item_nbr": i,
+            "forecast": round(f, 2),
+            "order_qty": q,
+        }
+        for s, i, f, q in zip(
+            store_ids.tolist(),
+            df_slice["item_nbr"].tolist(),
+            np.asarray(forecast, dtype=np.float64).tolist(),
+            orders.tolist(),
+        )
+    ]
+
+    return {
+        "date": req.date,
+        "service_level": req.service_level,
+        "dc_capacity_units": req.dc_capacity_units,
+        "model_version": model_version,
+        "dataset_mode": snapshot.dataset,
+        "snapshot": snapshot.path.name,
+        "summary": {
+            "total_forecast": round(float(np.sum(forecast)), 2),
+            "total_orders": int(orders.sum()),
+        },
+        "stores": store_summaries,
+        "results": results,
+    }
+
+# =====================================================
+# Multi-day horizon planning endpoint
+# =====================================================
+
+@app.post("/horizon-plan", response_model=HorizonPlanResponse)
+def horizon_plan(req: HorizonPlanRequest):
+    """
+    Plan N days of orders for one store with inventory carry-over:
+    all days are forecast in one batched predict per quantile, then
+    simulated day by day (vectorized across SKUs).
+    """
+    state = serving.current
+    model_version, predictor = request_predictor(req, state)
+    snapshot = request_snapshot(req, state)
+    try:
+        start = pd.to_datetime(req.start_date)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid date format")
+
+    dates = pd.date_range(start, periods=req.n_days, freq="D")
+
+    mask = (
+        (snapshot.df_features["store_nbr"] == req.store_nbr)
+        & snapshot.df_features["date"].isin(dates)
+    )
+    if req.items is not None:
+        mask &= snapshot.df_features["item_nbr"].isin([i.item_nbr for i in req.items])
+
+    df_slice = snapshot.df_features[mask]
+
+    if df_slice.empty:
+        raise HTTPException(
+            status_code=404,
+            detail="No feature data available for store/dates",
+        )
+
+    # One row per (date, SKU)
+    df_slice = (
+        df_slice
+        .sort_values(["item_nbr", "date"])
+        .drop_duplicates(subset=["item_nbr", "date"], keep="last")
+        .reset_index(drop=True)
+    )
+
+    overrides = {
+        i.item_nbr: i.onpromotion
+        for i in (req.items or [])
+        if i.onpromotion is not None
+    }
+    if overrides:
+        promo = df_slice["item_nbr"].map(overrides)
+        df_slice["onpromotion"] = (
+            promo.fillna(df_slice["onpromotion"]).astype(int)
+        )
+
+    # -----------------------------
+    # Batched forecasts (all days)
+    # -----------------------------
+    # Expected sales default to the median: simulating them with the
+    # order quantile itself would sell every order and never show waste
+    sales_level = req.sales_service_level
+    if sales_level is None:
+        if 0.5 not in predictor.registry.models_by_alpha:
+            raise HTTPException(
+                status_code=400,
+                detail=(
+                    "No P50 model loaded for expected sales; pass "
+                    "sales_service_level (available: "
+                    f"{sorted(predictor.registry.models_by_alpha)})"
+                ),
+            )
+        sales_level = 0.5
+
+    if sales_level > req.service_level:
+        raise HTTPException(
+            status_code=400,
+            detail="sales_service_level must not exceed service_level",
+        )
+
+    try:
+        levels, preds = predictor.predict_quantiles(
+            df_slice, sorted({req.service_level, sales_level})
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    order_pred = preds[:, int(np.searchsorted(levels, req.service_level))]
+    sales_pred = preds[:, int(np.searchsorted(levels, sales_level))]
+
+    # -----------------------------
+    # (SKU x day) matrices
+    # -----------------------------
+    items, item_idx = np.unique(
+        df_slice["item_nbr"].to_numpy(), return_inverse=True
+    )
+    day_idx = (df_slice["date"] - start).dt.days.to_numpy()
+
+    def to_matrix(values):
+        m = np.zeros((items.size, req.n_days))
+        m[item_idx, day_idx] = values
+        return m
+
+    order_forecast = to_matrix(order_pred)
+    sales_forecast = to_matrix(sales_pred)
+
+    perishable = np.zeros(items.size, dtype=bool)
+    perishable[item_idx] = df_slice["perishable"].to_numpy().astype(bool)
+
+    shelf_life = np.where(perishable, req.perishable_shelf_life_days, np.inf)
+    on_hand = np.zeros(items.size)
+
+    pos = {int(item): k for k, item in enumerate(items)}
+    for i in req.items or []:
+        k = pos.get(i.item_nbr)
+        if k is None:
+            continue
+        on_hand[k] = i.on_hand
+        if i.shelf_life_days is not None:
+            shelf_life[k] = i.shelf_life_days
+
+    plan = plan_order_horizon(
+        order_forecast,
+        sales_forecast,
+        capacity=req.daily_capacity_units,
+        on_hand=on_hand,
+        shelf_life_days=shelf_life,
+        service_floor_ratio=req.service_floor_ratio or 0.0,
+        perishable=perishable,
+        perishable_weight=req.perishable_weight or 1.0,
+    )
+
+    # -----------------------------
+    # Response
+    # -----------------------------
+    day_labels = [d.strftime("%Y-%m-%d") for d in dates]
+
+    days = [
+        {
+            "date": day_labels[t],
+            "total_forecast": round(float(order_forecast[:, t].sum()), 2),
+            "total_orders": int(plan.orders[:, t].sum()),
+            "expected_sales": round(float(plan.expected_sales[:, t].sum()), 2),
+            "lost_sales": round(float(plan.lost_sales[:, t].sum()), 2),
+            "waste": round(float(plan.waste[:, t].sum()), 2),
+            "end_on_hand": round(float(plan.end_on_hand[:, t].sum()), 2),
+        }
+        for t in range(req.n_days)
+    ]
+
+    results = [
+        {
+            "date": day_labels[t],
+            "item_nbr": int(items[k]),
+            "forecast": round(float(order_forecast[k, t]), 2),
+            "order_qty": int(plan.orders[k, t]),
+            "begin_on_hand": round(float(plan.begin_on_hand[k, t]), 2),
+            "end_on_hand": round(float(plan.end_on_hand[k, t]), 2),
+        }
+        for t in range(req.n_days)
+        for k in range(items.size)
+    ]
+
+    return {
+        "store_nbr": req.store_nbr,
+        "start_date": req.start_date,
+        "n_days": req.n_days,
+        "service_level": req.service_level,
+        "sales_service_level": sales_level,
+        "model_version": model_version,
+        "dataset_mode": snapshot.dataset,
+        "snapshot": snapshot.path.name,
+        "days": days,
+        "results": results,
+    }
+
+# =====================================================
+# Scenario (policy grid) endpoint
+# =====================================================
+
+@app.post("/scenarios", response_model=ScenarioResponse)
+def scenarios(req: ScenarioRequest):
+    """
+    Compare ordering policies for one decision. Each distinct service
+    level is forecast once; all scenarios are allocated in one batch.
+    """
+    grid = [
+        Scenario(
+            service_level=s.service_level,
+            service_floor_ratio=s.service_floor_ratio,
+            perishable_weight=s.perishable_weight,
+            capacity=s.capacity_units,
+        )
+        for s in req.scenarios
+    ]
+    if req.grid is not None:
+        grid += scenario_grid(
+            req.grid.service_levels,
+            req.grid.service_floor_ratios,
+            req.grid.perishable_weights,
+            req.grid.capacity_units or [None],
+        )
+
+    if not grid:
+        raise HTTPException(status_code=400, detail="No scenarios given")
+
+    state = serving.current
+    model_version, predictor = request_predictor(req, state)
+    snapshot = request_snapshot(req, state)
+    df_slice = slice_decision_rows(req, snapshot)
+
+    try:
+        forecasts = predict_scenario_forecasts(df_slice, predictor, grid)
+        table = evaluate_scenarios(
+            forecasts,
+            df_slice["perishable"].to_numpy(),
+            grid,
+            capacity=req.capacity_units,
+            top_n=20,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    results = [
+        {
+            "service_level": float(row.service_level),
+            "service_floor_ratio": float(row.service_floor_ratio),
+            "perishable_weight": float(row.perishable_weight),
+            "capacity_units": int(row.capacity),
+            "total_units": int(row.total_units),
+            "perishable_share": round(float(row.perishable_share), 4),
+            "top20_share": round(float(row.top20_share), 4),
+            "avg_units_per_sku": round(float(row.avg_units_per_sku), 3),
+        }
+        for row in table.itertuples(index=False)
+    ]
+
+    return {
+        "store_nbr": req.store_nbr,
+        "date": req.date,
+        "n_skus": len(df_slice),
+        "n_forecasts": len(forecasts),
+        "model_version": model_version,
+        "dataset_mode": snapshot.dataset,
+        "snapshot": snapshot.path.name,
+        "results": results,
+    }
+
+# =====================================================
+# Promotion what-if endpoint
+# =====================================================
+
+@app.post("/promo-what-if", response_model=PromoWhatIfResponse)
+def promo_what_if_endpoint(req: PromoWhatIfRequest):
+    """
+    Forecast and allocate one decision with the toggled SKUs off and
+    on promotion, scoring both states in one predict.
+    """
+    state = serving.current
+    model_version, predictor = request_predictor(req, state)
+    snapshot = request_snapshot(req, state)
+    df_slice = slice_decision_rows(req, snapshot)
+
+    if req.toggle_items is None:
+        toggled = np.ones(len(df_slice), dtype=bool)
+    else:
+        toggled = df_slice["item_nbr"].isin(req.toggle_items).to_numpy()
+        if not toggled.any():
+            raise HTTPException(
+                status_code=400,
+                detail="None of toggle_items are in the decision slice",
+            )
+
+    what_if = promo_what_if(
+        df_slice,
+        predictor,
+        service_level=req.service_level,
+        capacity=req.capacity_units,
+        toggled=toggled,
+        service_floor_ratio=req.service_floor_ratio or 0.0,
+        perishable_weight=req.perishable_weight or 1.0,
+    )
+
+    results = [
+        {
+            "item_nbr": int(item),
+            "toggled": bool(t),
+            "base_forecast": round(float(b), 2),
+            "promo_forecast": round(float(p), 2),
+            "uplift": round(float(u), 2),
+            "base_order_qty": int(bq),
+            "promo_order_qty": int(pq),
+        }
+        for item, t, b, p, u, bq, pq in zip(
+            df_slice["item_nbr"],
+            what_if.toggled,
+            what_if.base_demand,
+            what_if.promo_demand,
+            what_if.uplift,
+            what_if.base_orders,
+            what_if.promo_orders,
+        )
+    ]
+
+    return {
+        "store_nbr": req.store_nbr,
+        "date": req.date,
+        "service_level": req.service_level,
+        "capacity_units": req.capacity_units,
+        "model_version": model_version,
+        "dataset_mode": snapshot.dataset,
+        "snapshot": snapshot.path.name,
+        "base": {
+            "total_forecast": round(float(what_if.base_demand.sum()), 2),
+            "total_orders": int(what_if.base_orders.sum()),
+        },
+        "promo": {
+            "total_forecast": round(float(what_if.promo_demand.sum()), 2),
+            "total_orders": int(what_if.promo_orders.sum()),
         },
+        "total_uplift": round(float(what_if.uplift.sum()), 2),
         "results": results,
     }
+
+# =====================================================
+# Planning jobs (async)
+# =====================================================
+
+def _iso(ts: Optional[float]) -> Optional[str]:
+    return None if ts is None else datetime.fromtimestamp(ts).isoformat(timespec="seconds")
+
+
+def job_status(job: dict) -> dict:
+    started, finished = job["started_at"], job["finished_at"]
+    return {
+        "job_id": job["job_id"],
+        "kind": job["kind"],
+        "status": job["status"],
+        "tasks_total": job["tasks_total"],
+        "tasks_done": job["tasks_done"],
+        "progress": round(job["tasks_done"] / max(job["tasks_total"], 1), 4),
+        "n_rows": job["n_rows"],
+        "submitted_at": _iso(job["submitted_at"]),
+        "started_at": _iso(started),
+        "finished_at": _iso(finished),
+        "queue_seconds": (
+            None if started is None
+            else round(started - job["submitted_at"], 3)
+        ),
+        "run_seconds": (
+            None if started is None
+            else round((finished or datetime.now().timestamp()) - started, 3)
+        ),
+        "model_version": job["model_version"],
+        "dataset": job["dataset"],
+        "error": job["error"],
+    }
+
+
+def get_job_or_404(job_id: str) -> dict:
+    job = job_runner.store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job")
+    return job
+
+
+@app.post("/jobs/chain-plan", response_model=JobStatusResponse, status_code=202)
+def submit_chain_plan_job(req: ChainPlanJobRequest):
+    """
+    Queue a chain plan (see /chain-plan) for every date in
+    [start_date, end_date]. Dates run in parallel on the job pool.
+    """
+    try:
+        start = pd.to_datetime(req.start_date)
+        end = pd.to_datetime(req.end_date)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid date format")
+
+    if req.model_version not in (None, serving.current.model_version, *model_versions()):
+        raise HTTPException(
+            status_code=404, detail=f"Unknown model version {req.model_version!r}"
+        )
+
+    dates = job_runner.dates_between(start, end)
+    if not dates:
+        raise HTTPException(
+            status_code=404,
+            detail="No feature data available between start_date and end_date",
+        )
+
+    try:
+        job_id = job_runner.submit(
+            "chain_plan",
+            {**req.model_dump(), "dates": [str(d.date()) for d in dates]},
+            tasks_total=len(dates),
+        )
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=f"Job queue is full ({e})")
+
+    return job_status(job_runner.store.get(job_id))
+
+
+@app.get("/jobs/{job_id}", response_model=JobStatusResponse)
+def get_job(job_id: str):
+    return job_status(get_job_or_404(job_id))
+
+
+@app.get("/jobs/{job_id}/result")
+def get_job_result(job_id: str):
+    """
+    Job result as parquet (one row per date/store/item).
+    """
+    job = get_job_or_404(job_id)
+    if job["status"] != "done":
+        raise HTTPException(
+            status_code=409,
+            detail=f"Job is {job['status']}, result not available",
+        )
+
+    return FileResponse(
+        job["result_path"],
+        media_type="application/vnd.apache.parquet",
+        filename=f"{job['kind']}_{job_id}.parquet",
+    )
+
+
+@app.delete("/jobs/{job_id}", response_model=JobStatusResponse)
+def cancel_job(job_id: str):
+    get_job_or_404(job_id)
+    return job_status(job_runner.store.request_cancel(job_id))
@@ -0,0 +1,146 @@
+import json
+from contextlib import asynccontextmanager
+
+import pyarrow.parquet as pq
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response
+
+from src.config import (
+    ACTIVE_DATASET_MODE,
+    FEATURED_SNAPSHOT_BY_MODE,
+    ROUTER_SHARDS,
+    SHARD_BASE_PORT,
+    SHARD_REQUEST_TIMEOUT_S,
+    SHARD_START_TIMEOUT_S,
+    SHARD_STORES_ENV,
+    SNAPSHOTS_DIR,
+)
+from api.schemas import RebalanceRequest, RouterStatusResponse
+from api.shards import ShardPool, balanced_assignment
+
+# =====================================================
+# App metadata
+# =====================================================
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Stop shard processes (uvicorn re-raises SIGTERM, so atexit would not run)
+    shards.shutdown()
+
+
+app = FastAPI(
+    title="Forecast-to-Orders Router",
+    description="Forwards store-scoped requests to per-store-shard API processes",
+    version="1.0",
+    lifespan=lifespan,
+)
+
+# Endpoints whose payload names a single store_nbr
+STORE_SCOPED_ENDPOINTS = (
+    "forecast-to-orders",
+    "capacity-curve",
+    "scenarios",
+    "promo-what-if",
+    "horizon-plan",
+)
+
+# =====================================================
+# Shard layout (rows per store from the snapshot's store column)
+# =====================================================
+
+FEATURED_SNAPSHOT_PATH = SNAPSHOTS_DIR / FEATURED_SNAPSHOT_BY_MODE[ACTIVE_DATASET_MODE]
+
+store_rows = (
+    pq.read_table(FEATURED_SNAPSHOT_PATH, columns=["store_nbr"])
+    .column(0)
+    .value_counts()
+    .to_pylist()
+)
+STORE_ROWS = {int(v["values"]): int(v["counts"]) for v in store_rows}
+
+shards = ShardPool(
+    balanced_assignment(STORE_ROWS, ROUTER_SHARDS),
+    base_port=SHARD_BASE_PORT,
+    stores_env=SHARD_STORES_ENV,
+    start_timeout_s=SHARD_START_TIMEOUT_S,
+    request_timeout_s=SHARD_REQUEST_TIMEOUT_S,
+)
+
+# =====================================================
+# Router endpoints
+# =====================================================
+
+@app.get("/health")
+def health():
+    return {"status": "ok", "role": "router"}
+
+
+@app.get("/router/shards", response_model=RouterStatusResponse)
+def router_shards():
+    return {"n_stores": len(STORE_ROWS), "shards": shards.stats()}
+
+
+@app.post("/router/rebalance", response_model=RouterStatusResponse)
+def router_rebalance(req: RebalanceRequest):
+    """
+    Reassign stores to shards. Shards whose store set changes are
+    stopped and restart on their next request.
+    """
+    if (req.shards is None) == (req.n_shards is None):
+        raise HTTPException(
+            status_code=400,
+            detail="Give exactly one of shards or n_shards",
+        )
+
+    assignment = (
+        balanced_assignment(STORE_ROWS, req.n_shards)
+        if req.n_shards is not None else req.shards
+    )
+
+    unknown = {s for stores in assignment.values() for s in stores} - set(STORE_ROWS)
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown stores: {sorted(unknown)}",
+        )
+
+    try:
+        shards.rebalance(assignment)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {"n_stores": len(STORE_ROWS), "shards": shards.stats()}
+
+
+@app.post("/{endpoint}")
+async def forward_to_shard(endpoint: str, request: Request):
+    """
+    Forward a store-scoped request to the shard owning its store_nbr.
+    """
+    if endpoint not in STORE_SCOPED_ENDPOINTS:
+        raise HTTPException(
+            status_code=404,
+            detail=(
+                "Not served by the router (store-scoped endpoints only); "
+                "run chain-wide planning on an unsharded instance"
+            ),
+        )
+
+    body = await request.body()
+    try:
+        store_nbr = int(json.loads(body)["store_nbr"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=422, detail="Request needs an integer store_nbr")
+
+    try:
+        status, content, media_type = await run_in_threadpool(
+            shards.forward, store_nbr, "POST", f"/{endpoint}", body
+        )
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except (OSError, RuntimeError) as e:
+        raise HTTPException(status_code=502, detail=str(e))
+
+    return Response(content=content, status_code=status, media_type=media_type)
@@ -1,5 +1,5 @@
-from pydantic import BaseModel, Field
-from typing import List, Optional
+from pydantic import BaseModel, Field, model_validator
+from typing import Annotated, Dict, List, Literal, Optional, Union
 
 
 # =====================================================
@@ -17,9 +17,100 @@ class BatchItem(BaseModel):
         description="Whether SKU is on promotion",
         example=True,
     )
+    unit_cost: Optional[float] = Field(
+        None,
+        gt=0.0,
+        description="Purchase cost per unit (required for a budget)",
+        example=2.5,
+    )
+    unit_volume: Optional[float] = Field(
+        None,
+        gt=0.0,
+        description="Shelf / cold-chain space per unit (default 1)",
+        example=1.0,
+    )
+    unit_margin: Optional[float] = Field(
+        None,
+        ge=0.0,
+        description="Profit per unit sold (newsvendor allocation)",
+        example=1.5,
+    )
+    unit_holding_cost: Optional[float] = Field(
+        None,
+        ge=0.0,
+        description="Holding / waste cost per unsold unit (newsvendor allocation)",
+        example=0.4,
+    )
+    pack_size: Optional[int] = Field(
+        None,
+        ge=1,
+        description="Case pack size; orders are whole packs",
+        example=12,
+    )
+    moq: Optional[int] = Field(
+        None,
+        ge=0,
+        description="Minimum order quantity when ordering at all",
+        example=24,
+    )
 
 
-class ForecastToOrdersRequest(BaseModel):
+class AllocationConstraints(BaseModel):
+    family_caps: Dict[str, float] = Field(
+        default_factory=dict,
+        description="Max shelf space (volume) per product family",
+        example={"DAIRY": 120},
+    )
+    cold_chain_capacity: Optional[float] = Field(
+        None,
+        ge=0.0,
+        description="Cold-chain space (volume) shared by perishable SKUs",
+        example=80,
+    )
+    budget: Optional[float] = Field(
+        None,
+        ge=0.0,
+        description="Purchase budget (needs unit_cost on every item)",
+        example=500.0,
+    )
+
+
+class NewsvendorParams(BaseModel):
+    unit_margin: float = Field(
+        1.0,
+        ge=0.0,
+        description="Default profit per unit sold",
+    )
+    unit_holding_cost: float = Field(
+        0.5,
+        ge=0.0,
+        description="Default holding / waste cost per unsold unit",
+    )
+    service_levels: Optional[List[float]] = Field(
+        None,
+        description="Quantiles forming the demand CDF (default: all loaded)",
+        example=[0.9, 0.95],
+    )
+
+
+# Model version and featured snapshot a request reads; base of the
+# scoring requests
+class ServingSourceRequest(BaseModel):
+    model_version: Optional[str] = Field(
+        None,
+        description="Model version to score with (default: the served version)",
+        example="v1",
+    )
+    dataset: Optional[str] = Field(
+        None,
+        description="Featured snapshot (FEATURED_SNAPSHOT_BY_MODE key) to read (default: the served one)",
+        example="train",
+    )
+
+
+# One store/date decision and its SKUs (listed items or the whole
+# store, filters, promo overrides); base of the single-store requests
+class DecisionSliceRequest(ServingSourceRequest):
     date: str = Field(
         ...,
         description="Decision date (YYYY-MM-DD)",
@@ -30,6 +121,30 @@ class ForecastToOrdersRequest(BaseModel):
         description="Store number",
         example=44,
     )
+    items: Optional[List[BatchItem]] = Field(
+        None,
+        description="SKUs to consider (default: every SKU for the store/date)",
+    )
+    families: Optional[List[str]] = Field(
+        None,
+        description="Restrict to these product families",
+        example=["DAIRY", "PRODUCE"],
+    )
+    perishable: Optional[bool] = Field(
+        None,
+        description="Restrict to perishable (true) or non-perishable (false) SKUs",
+    )
+    promo_overrides: Dict[int, bool] = Field(
+        default_factory=dict,
+        description=(
+            "Sparse promo flags (item_nbr -> onpromotion) applied on top "
+            "of the snapshot / item flags"
+        ),
+        example={103665: True},
+    )
+
+
+class ForecastToOrdersRequest(DecisionSliceRequest):
     service_level: float = Field(
         ...,
         ge=0.0,
@@ -37,10 +152,6 @@ class ForecastToOrdersRequest(BaseModel):
         description="Quantile service level (e.g. 0.9, 0.95)",
         example=0.9,
     )
-    items: List[BatchItem] = Field(
-        ...,
-        description="List of SKUs to consider",
-    )
 
     capacity_units: int = Field(
         ...,
@@ -61,6 +172,381 @@ class ForecastToOrdersRequest(BaseModel):
         description="Weight multiplier for perishable items",
         example=1.2,
     )
+    constraints: Optional[AllocationConstraints] = Field(
+        None,
+        description="Optional resource limits on top of capacity_units",
+    )
+    allocation_method: Literal["proportional", "newsvendor"] = Field(
+        "proportional",
+        description=(
+            "proportional: share capacity by forecast; newsvendor: "
+            "maximize expected profit over the quantile forecasts"
+        ),
+    )
+    newsvendor: Optional[NewsvendorParams] = Field(
+        None,
+        description="Economics for allocation_method='newsvendor'",
+    )
+
+
+class CapacityCurveRequest(DecisionSliceRequest):
+    service_level: float = Field(
+        ...,
+        ge=0.0,
+        le=1.0,
+        description="Quantile service level (e.g. 0.9, 0.95)",
+        example=0.9,
+    )
+
+    service_floor_ratio: Optional[float] = Field(
+        0.0,
+        ge=0.0,
+        le=1.0,
+        description="Minimum fraction of forecast per SKU",
+        example=0.0,
+    )
+    perishable_weight: Optional[float] = Field(
+        1.0,
+        gt=0.0,
+        description="Weight multiplier for perishable items",
+        example=1.2,
+    )
+    target_coverages: List[float] = Field(
+        default_factory=list,
+        description="Demand-served fractions to solve minimum capacity for",
+        example=[0.8, 0.9, 0.95],
+    )
+
+
+class ChainPlanRequest(ServingSourceRequest):
+    date: str = Field(
+        ...,
+        description="Decision date (YYYY-MM-DD)",
+        example="2016-04-21",
+    )
+    service_level: float = Field(
+        ...,
+        ge=0.0,
+        le=1.0,
+        description="Quantile service level (e.g. 0.9, 0.95)",
+        example=0.9,
+    )
+    dc_capacity_units: int = Field(
+        ...,
+        gt=0,
+        description="Distribution-center capacity shared by all stores",
+        example=50000,
+    )
+    store_caps: Dict[int, int] = Field(
+        default_factory=dict,
+        description="Optional per-store caps (store_nbr -> max units)",
+        example={44: 1500},
+    )
+    stores: Optional[List[int]] = Field(
+        None,
+        description="Stores to plan (default: every store on the date)",
+    )
+    items: Optional[List[BatchItem]] = Field(
+        None,
+        description=(
+            "SKUs to plan, with promo flags applied in every store "
+            "(default: all SKUs, snapshot promo flags)"
+        ),
+    )
+    service_floor_ratio: Optional[float] = Field(
+        0.0,
+        ge=0.0,
+        le=1.0,
+        description="Minimum fraction of forecast per SKU",
+        example=0.0,
+    )
+    perishable_weight: Optional[float] = Field(
+        1.0,
+        gt=0.0,
+        description="Weight multiplier for perishable items",
+        example=1.2,
+    )
+
+
+class HorizonItem(BaseModel):
+    item_nbr: int = Field(..., description="SKU identifier", example=769314)
+    on_hand: float = Field(
+        0.0,
+        ge=0.0,
+        description="Stock on hand at the start of the horizon",
+    )
+    onpromotion: Optional[bool] = Field(
+        None,
+        description="Promo flag for every day (default: snapshot flags)",
+    )
+    shelf_life_days: Optional[int] = Field(
+        None,
+        ge=1,
+        description="Shelf life override (default: perishables only)",
+    )
+
+
+class HorizonPlanRequest(ServingSourceRequest):
+    store_nbr: int = Field(..., description="Store number", example=44)
+    start_date: str = Field(
+        ...,
+        description="First planned day (YYYY-MM-DD)",
+        example="2016-03-01",
+    )
+    n_days: int = Field(
+        7,
+        ge=1,
+        le=60,
+        description="Number of days to plan",
+    )
+    service_level: float = Field(
+        ...,
+        ge=0.0,
+        le=1.0,
+        description="Quantile that daily stock should cover",
+        example=0.95,
+    )
+    sales_service_level: Optional[float] = Field(
+        None,
+        ge=0.0,
+        le=1.0,
+        description=(
+            "Quantile used as expected sales in the carry-over simulation; "
+            "at most service_level (default: 0.5, which needs a P50 model)"
+        ),
+    )
+    daily_capacity_units: int = Field(
+        ...,
+        gt=0,
+        description="Maximum total order quantity per day",
+        example=300,
+    )
+    items: Optional[List[HorizonItem]] = Field(
+        None,
+        description="SKUs to plan (default: every SKU in the snapshot)",
+    )
+    perishable_shelf_life_days: int = Field(
+        3,
+        ge=1,
+        description="Shelf life applied to perishable SKUs",
+    )
+    service_floor_ratio: Optional[float] = Field(
+        0.0,
+        ge=0.0,
+        le=1.0,
+        description="Minimum fraction of the daily shortfall per SKU",
+    )
+    perishable_weight: Optional[float] = Field(
+        1.0,
+        gt=0.0,
+        description="Weight multiplier for perishable items",
+    )
+
+
+class ScenarioSpec(BaseModel):
+    service_level: float = Field(..., ge=0.0, le=1.0, example=0.9)
+    service_floor_ratio: float = Field(0.0, ge=0.0, le=1.0)
+    perishable_weight: float = Field(1.0, gt=0.0)
+    capacity_units: Optional[int] = Field(
+        None,
+        gt=0,
+        description="Capacity for this scenario (default: request capacity)",
+    )
+
+
+# Most scenarios one request may expand to (explicit ones plus the grid,
+# whose size is the product of its list lengths)
+MAX_GRID_SCENARIOS = 1000
+
+
+class ScenarioGrid(BaseModel):
+    service_levels: List[Annotated[float, Field(ge=0.0, le=1.0)]] = Field(
+        ..., min_length=1, example=[0.9, 0.95]
+    )
+    service_floor_ratios: List[Annotated[float, Field(ge=0.0, le=1.0)]] = Field(
+        [0.0], min_length=1, example=[0.1, 0.2]
+    )
+    perishable_weights: List[Annotated[float, Field(gt=0.0)]] = Field(
+        [1.0], min_length=1, example=[1.0, 1.5]
+    )
+    capacity_units: Optional[List[Annotated[int, Field(gt=0)]]] = Field(
+        None,
+        min_length=1,
+        description="Capacities to sweep (default: request capacity)",
+    )
+
+    @property
+    def size(self) -> int:
+        return (
+            len(self.service_levels)
+            * len(self.service_floor_ratios)
+            * len(self.perishable_weights)
+            * len(self.capacity_units or [None])
+        )
+
+    @model_validator(mode="after")
+    def check_size(self):
+        if self.size > MAX_GRID_SCENARIOS:
+            raise ValueError(
+                f"Grid expands to {self.size} scenarios (max {MAX_GRID_SCENARIOS})"
+            )
+        return self
+
+
+class ScenarioRequest(DecisionSliceRequest):
+    capacity_units: Optional[int] = Field(
+        None,
+        gt=0,
+        description="Default capacity for scenarios without their own",
+        example=500,
+    )
+    scenarios: List[ScenarioSpec] = Field(
+        default_factory=list,
+        description="Explicit scenarios",
+    )
+    grid: Optional[ScenarioGrid] = Field(
+        None,
+        description="Cartesian grid of scenarios, added to the explicit ones",
+    )
+
+    @model_validator(mode="after")
+    def check_size(self):
+        size = len(self.scenarios) + (self.grid.size if self.grid else 0)
+        if size > MAX_GRID_SCENARIOS:
+            raise ValueError(
+                f"Request expands to {size} scenarios (max {MAX_GRID_SCENARIOS})"
+            )
+        return self
+
+
+class PromoWhatIfRequest(DecisionSliceRequest):
+    service_level: float = Field(
+        ...,
+        ge=0.0,
+        le=1.0,
+        description="Quantile service level (e.g. 0.9, 0.95)",
+        example=0.9,
+    )
+    items: Optional[List[BatchItem]] = Field(
+        None,
+        description=(
+            "SKUs to consider (default: every SKU for the store/date); "
+            "onpromotion is kept for untoggled SKUs"
+        ),
+    )
+    toggle_items: Optional[List[int]] = Field(
+        None,
+        description="SKUs switched off/on promotion (default: all items)",
+        example=[103665, 105574],
+    )
+
+    capacity_units: int = Field(
+        ...,
+        gt=0,
+        description="Maximum total order quantity (capacity cap)",
+        example=100,
+    )
+    service_floor_ratio: Optional[float] = Field(
+        0.0,
+        ge=0.0,
+        le=1.0,
+        description="Minimum fraction of forecast per SKU",
+    )
+    perishable_weight: Optional[float] = Field(
+        1.0,
+        gt=0.0,
+        description="Weight multiplier for perishable items",
+    )
+
+
+class ChainPlanJobRequest(BaseModel):
+    start_date: str = Field(
+        ...,
+        description="First decision date (YYYY-MM-DD)",
+        example="2016-04-18",
+    )
+    end_date: str = Field(
+        ...,
+        description="Last decision date, inclusive (YYYY-MM-DD)",
+        example="2016-04-24",
+    )
+    service_level: float = Field(
+        ...,
+        ge=0.0,
+        le=1.0,
+        description="Quantile service level (e.g. 0.9, 0.95)",
+        example=0.9,
+    )
+    dc_capacity_units: int = Field(
+        ...,
+        gt=0,
+        description="Distribution-center capacity per day, shared by all stores",
+        example=50000,
+    )
+    store_caps: Dict[int, int] = Field(
+        default_factory=dict,
+        description="Optional per-store daily caps (store_nbr -> max units)",
+    )
+    stores: Optional[List[int]] = Field(
+        None,
+        description="Stores to plan (default: every store)",
+    )
+    items: Optional[List[BatchItem]] = Field(
+        None,
+        description="SKUs to plan, with promo flags (default: all SKUs, snapshot flags)",
+    )
+    service_floor_ratio: Optional[float] = Field(
+        0.0,
+        ge=0.0,
+        le=1.0,
+        description="Minimum fraction of forecast per SKU",
+    )
+    perishable_weight: Optional[float] = Field(
+        1.0,
+        gt=0.0,
+        description="Weight multiplier for perishable items",
+    )
+    model_version: Optional[str] = Field(
+        None,
+        description="Model version to plan with (default: the one served when the job starts)",
+        example="v1",
+    )
+
+
+class RebalanceRequest(BaseModel):
+    shards: Optional[Dict[str, List[int]]] = Field(
+        None,
+        description="Explicit assignment (shard name -> store_nbr list)",
+        example={"shard-0": [1, 2, 3], "shard-1": [4, 5, 6]},
+    )
+    n_shards: Optional[int] = Field(
+        None,
+        gt=0,
+        description="Re-split all stores into this many row-balanced shards",
+        example=4,
+    )
+
+
+# Empty body: re-read ACTIVE_MODEL_VERSION / ACTIVE_DATASET_MODE from src/config.py
+class ReloadRequest(BaseModel):
+    model_version: Optional[str] = Field(
+        None,
+        description="Model version to serve (default: keep the current one)",
+        example="v1",
+    )
+    dataset_mode: Optional[str] = Field(
+        None,
+        description="Featured snapshot to serve (default: keep the current one)",
+        example="test",
+    )
+
+
+class ShadowRequest(BaseModel):
+    model_version: Optional[str] = Field(
+        ...,
+        description="Challenger version to shadow-score with (null: stop)",
+        example="latest",
+    )
 
 
 # =====================================================
@@ -82,6 +568,24 @@ class ForecastSummary(BaseModel):
         ...,
         description="Sum of allocated order quantities",
     )
+    expected_profit: Optional[float] = Field(
+        None,
+        description="Expected profit of the orders (newsvendor allocation)",
+    )
+    unused_capacity: Optional[int] = Field(
+        None,
+        description="Capacity not used by the orders (pack-aware allocation)",
+    )
+    packing_unused_units: Optional[int] = Field(
+        None,
+        description="Units the unit-level allocation would place but no case fits",
+    )
+
+
+class ConstraintUsage(BaseModel):
+    name: str = Field(..., description="Constraint (capacity, family:X, ...)")
+    limit: float
+    used: float
 
 
 class ForecastToOrdersResponse(BaseModel):
@@ -108,3 +612,264 @@ class ForecastToOrdersResponse(BaseModel):
 
     summary: ForecastSummary
     results: List[ForecastResult]
+    constraint_usage: Optional[List[ConstraintUsage]] = Field(
+        None,
+        description="Resource usage, when constraints were supplied",
+    )
+
+
+class CapacityBreakpoint(BaseModel):
+    capacity: float = Field(..., description="Capacity at this breakpoint")
+    allocated: float = Field(..., description="Units allocated (continuous)")
+    served: float = Field(
+        ...,
+        description="Forecast demand covered by the allocation",
+    )
+    coverage: float = Field(..., description="Fraction of demand served")
+
+
+class CapacityTarget(BaseModel):
+    target_coverage: float
+    min_capacity: Optional[int] = Field(
+        None,
+        description="Smallest capacity reaching the target (null if unreachable)",
+    )
+
+
+class CapacityCurveResponse(BaseModel):
+    store_nbr: int
+    date: str
+    service_level: float
+    total_forecast: float
+
+    model_version: str
+    dataset_mode: str
+    snapshot: str
+
+    breakpoints: List[CapacityBreakpoint] = Field(
+        ...,
+        description=(
+            "Exact breakpoints of the piecewise-linear capacity curve; "
+            "linear in between and flat past the last one"
+        ),
+    )
+    targets: List[CapacityTarget]
+
+
+class ChainResult(BaseModel):
+    store_nbr: int
+    item_nbr: int
+    forecast: float
+    order_qty: int
+
+
+class StorePlanSummary(BaseModel):
+    store_nbr: int
+    store_cap: Optional[int] = Field(None, description="Per-store cap, if any")
+    total_forecast: float
+    total_orders: int
+
+
+class ChainPlanResponse(BaseModel):
+    date: str
+    service_level: float
+    dc_capacity_units: int
+
+    model_version: str
+    dataset_mode: str
+    snapshot: str
+
+    summary: ForecastSummary
+    stores: List[StorePlanSummary]
+    results: List[ChainResult]
+
+
+class HorizonDaySummary(BaseModel):
+    date: str
+    total_forecast: float
+    total_orders: int
+    expected_sales: float
+    lost_sales: float
+    waste: float
+    end_on_hand: float
+
+
+class HorizonResult(BaseModel):
+    date: str
+    item_nbr: int
+    forecast: float
+    order_qty: int
+    begin_on_hand: float
+    end_on_hand: float
+
+
+class HorizonPlanResponse(BaseModel):
+    store_nbr: int
+    start_date: str
+    n_days: int
+    service_level: float
+    sales_service_level: float
+
+    model_version: str
+    dataset_mode: str
+    snapshot: str
+
+    days: List[HorizonDaySummary]
+    results: List[HorizonResult]
+
+
+class ScenarioResult(BaseModel):
+    service_level: float
+    service_floor_ratio: float
+    perishable_weight: float
+    capacity_units: int
+    total_units: int
+    perishable_share: float
+    top20_share: float = Field(..., description="Share of units in the top-20 SKUs")
+    avg_units_per_sku: float
+
+
+class ScenarioResponse(BaseModel):
+    store_nbr: int
+    date: str
+    n_skus: int
+    n_forecasts: int = Field(
+        ...,
+        description="Distinct quantile forecasts computed for the grid",
+    )
+
+    model_version: str
+    dataset_mode: str
+    snapshot: str
+
+    results: List[ScenarioResult]
+
+
+class PromoWhatIfResult(BaseModel):
+    item_nbr: int
+    toggled: bool
+    base_forecast: float
+    promo_forecast: float
+    uplift: float
+    base_order_qty: int
+    promo_order_qty: int
+
+
+class PromoStateSummary(BaseModel):
+    total_forecast: float
+    total_orders: int
+
+
+class PromoWhatIfResponse(BaseModel):
+    store_nbr: int
+    date: str
+    service_level: float
+    capacity_units: int
+
+    model_version: str
+    dataset_mode: str
+    snapshot: str
+
+    base: PromoStateSummary
+    promo: PromoStateSummary
+    total_uplift: float
+
+    results: List[PromoWhatIfResult]
+
+
+class JobStatusResponse(BaseModel):
+    job_id: str
+    kind: str
+    status: Literal["queued", "running", "cancelling", "done", "failed", "cancelled"]
+
+    tasks_total: int = Field(..., description="Dates to plan")
+    tasks_done: int
+    progress: float = Field(..., description="tasks_done / tasks_total")
+    n_rows: int = Field(..., description="Result rows produced so far")
+
+    submitted_at: str
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    queue_seconds: Optional[float] = None
+    run_seconds: Optional[float] = None
+
+    model_version: Optional[str] = Field(None, description="Set when the job starts")
+    dataset: Optional[str] = Field(None, description="Set when the job starts")
+
+    error: Optional[str] = None
+
+
+class ShardStatus(BaseModel):
+    name: str
+    stores: List[int]
+    port: int
+    status: Literal["running", "stopped"]
+    started_at: Optional[float] = None
+    requests: int
+    errors: int = Field(..., description="Forwarded requests answered with 4xx/5xx")
+    memory: Optional[Dict[str, Union[int, float]]] = Field(
+        None,
+        description="Shard process pid and memory in MB (rss, pss, shared, private)",
+    )
+
+
+class RouterStatusResponse(BaseModel):
+    n_stores: int
+    shards: List[ShardStatus]
+
+
+class ReloadStatusResponse(BaseModel):
+    status: Literal["idle", "loading", "failed"]
+    requested: Optional[Dict[str, str]] = Field(
+        None, description="model_version / dataset_mode of the latest reload"
+    )
+    swapped_at: Optional[str] = Field(None, description="Time of the last swap")
+    previous: Optional[Dict[str, str]] = Field(
+        None, description="Versions served before the last swap"
+    )
+    previous_freed_at: Optional[str] = Field(
+        None,
+        description="When the previous snapshot was released (unset if it is still served)",
+    )
+    error: Optional[str] = Field(None, description="Why the latest reload failed")
+
+
+class ShadowStatusResponse(BaseModel):
+    challenger_version: Optional[str] = None
+    submitted: int = Field(..., description="Decisions queued for the challenger")
+    dropped: int = Field(..., description="Decisions skipped because the queue was full")
+    scored: int
+    errors: int
+    batches: int = Field(..., description="Diff batches written")
+    rows_written: int
+    pending: int
+    buffered_rows: int
+    mean_diff: Optional[float] = Field(
+        None, description="Mean challenger - served forecast since the challenger was set"
+    )
+    mean_abs_diff: Optional[float] = None
+    last_batch: Optional[str] = None
+    last_error: Optional[str] = None
+    loaded_versions: Dict[str, Union[int, List[str]]] = Field(
+        ..., description="Per-request model version LRU (loaded, hits, misses, evictions)"
+    )
+
+
+class SnapshotStatus(BaseModel):
+    dataset: str
+    loaded: bool
+    pinned: bool = Field(..., description="Served by default; never evicted")
+    snapshot: Optional[str] = None
+    rows: Optional[int] = None
+    size_mb: Optional[float] = None
+    loads: int
+    evictions: int
+    hits: int
+    last_used: Optional[float] = None
+
+
+class SnapshotRegistryResponse(BaseModel):
+    budget_mb: float
+    used_mb: float
+    available: List[str]
+    snapshots: List[SnapshotStatus]
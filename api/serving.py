@@ -0,0 +1,284 @@
+import ast
+import threading
+import time
+import weakref
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, List, Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+import src.config as config
+from src.data.shared_snapshot import load_shared_snapshot
+from src.data.snapshot_registry import LoadedSnapshot, estimate_nbytes
+from src.ml.feature_config import SERVING_COLUMNS
+from src.ml.predictor import QuantilePredictor
+from src.ml.predictor_factory import build_predictor
+
+# Rows predicted by the warm-up / smoke test of a new state
+WARM_UP_ROWS = 64
+
+# Settings an empty POST /admin/reload re-reads from src/config.py
+RELOADABLE_SETTINGS = ("ACTIVE_MODEL_VERSION", "ACTIVE_DATASET_MODE")
+
+
+@dataclass(frozen=True)
+class ServingState:
+    """
+    One consistent (predictor, snapshot) pair. A request takes the
+    current state once and uses it throughout, so a reload can swap in
+    a new state without a request ever mixing two versions.
+    """
+    predictor: QuantilePredictor
+    snapshot: LoadedSnapshot
+    model_version: str
+    loaded_at: float
+    load_seconds: float
+
+    @property
+    def df_features(self) -> pd.DataFrame:
+        return self.snapshot.df_features
+
+    @property
+    def dataset_mode(self) -> str:
+        return self.snapshot.dataset
+
+    @property
+    def snapshot_path(self) -> Path:
+        return self.snapshot.path
+
+    def version_fields(self) -> dict:
+        return {
+            "model_version": self.model_version,
+            "dataset_mode": self.dataset_mode,
+            "snapshot": self.snapshot_path.name,
+        }
+
+
+def dataset_modes() -> List[str]:
+    return list(config.FEATURED_SNAPSHOT_BY_MODE)
+
+
+def load_snapshot(
+    dataset_mode: str,
+    shard_stores: Optional[List[int]] = None,
+    shared: bool = False,
+) -> LoadedSnapshot:
+    """
+    Load the featured snapshot of `dataset_mode` with its decision
+    index. Only SERVING_COLUMNS are read; a shard reads only its stores.
+    """
+    start = time.perf_counter()
+
+    if dataset_mode not in config.FEATURED_SNAPSHOT_BY_MODE:
+        raise ValueError(
+            f"Unknown dataset mode {dataset_mode!r}; "
+            f"available: {sorted(config.FEATURED_SNAPSHOT_BY_MODE)}"
+        )
+    snapshot_path = config.SNAPSHOTS_DIR / config.FEATURED_SNAPSHOT_BY_MODE[dataset_mode]
+
+    if shared:
+        # Read-only memory map shared by every worker on the host
+        snapshot = load_shared_snapshot(
+            snapshot_path, config.SHARED_SNAPSHOT_DIR, columns=SERVING_COLUMNS
+        )
+        df_features = snapshot.df
+        decision_index = snapshot.index
+    else:
+        # Only the columns serving needs (model features + IDs); the target
+        # and any extra snapshot columns are never read
+        df_features = pd.read_parquet(
+            snapshot_path,
+            columns=SERVING_COLUMNS,
+            filters=(
+                None if shard_stores is None
+                else [("store_nbr", "in", shard_stores)]
+            ),
+        )
+        df_features["date"] = pd.to_datetime(df_features["date"])
+
+        # (store_nbr, date) -> row positions, so decisions never scan the snapshot
+        decision_index = df_features.groupby(["store_nbr", "date"], sort=False).indices
+
+    return LoadedSnapshot(
+        dataset=dataset_mode,
+        path=snapshot_path,
+        df_features=df_features,
+        decision_index=decision_index,
+        nbytes=estimate_nbytes(df_features, decision_index),
+        load_seconds=time.perf_counter() - start,
+    )
+
+
+def load_serving_state(
+    model_version: str,
+    dataset_mode: str,
+    shard_stores: Optional[List[int]] = None,
+    shared: bool = False,
+    predictor: Optional[QuantilePredictor] = None,
+    snapshot: Optional[LoadedSnapshot] = None,
+) -> ServingState:
+    """
+    Build a predictor for `model_version` and load the featured snapshot
+    of `dataset_mode` (see load_snapshot), unless they are given.
+    """
+    start = time.perf_counter()
+
+    if predictor is None:
+        predictor = build_predictor(
+            version=None if model_version == "latest" else model_version
+        )
+
+    return ServingState(
+        predictor=predictor,
+        snapshot=(
+            snapshot if snapshot is not None
+            else load_snapshot(dataset_mode, shard_stores, shared)
+        ),
+        model_version=model_version,
+        loaded_at=time.time(),
+        load_seconds=time.perf_counter() - start,
+    )
+
+
+def validate_serving_state(state: ServingState) -> None:
+    """
+    Smoke test: load and warm up every booster on a sample of the
+    snapshot and check the predictions are finite and non-negative.
+    Raises ValueError if the state must not be served.
+    """
+    if state.df_features.empty:
+        raise ValueError(f"Snapshot {state.snapshot_path.name} has no rows")
+
+    levels, preds = state.predictor.warm_up(state.df_features.head(WARM_UP_ROWS))
+
+    if not np.isfinite(preds).all() or (preds < 0).any():
+        raise ValueError(
+            f"Smoke prediction of model {state.model_version} returned "
+            f"non-finite or negative values"
+        )
+
+
+def configured_versions() -> tuple:
+    """
+    (ACTIVE_MODEL_VERSION, ACTIVE_DATASET_MODE) as currently written in
+    src/config.py, so edits apply without a restart. Only those two
+    assignments are parsed: the module is not re-imported, and every
+    other setting keeps its loaded value. Raises ValueError if the file
+    does not parse or either one is not a string literal.
+    """
+    path = Path(config.__file__)
+    try:
+        tree = ast.parse(path.read_text(), filename=str(path))
+    except SyntaxError as e:
+        raise ValueError(f"{path.name} does not parse: {e}")
+
+    values = {}
+    for node in tree.body:
+        if not isinstance(node, ast.Assign):
+            continue
+        for target in node.targets:
+            if isinstance(target, ast.Name) and target.id in RELOADABLE_SETTINGS:
+                try:
+                    values[target.id] = ast.literal_eval(node.value)
+                except ValueError:
+                    values[target.id] = None
+
+    for name in RELOADABLE_SETTINGS:
+        if not isinstance(values.get(name), str):
+            raise ValueError(f"{name} in {path.name} is missing or not a string")
+
+    return tuple(values[name] for name in RELOADABLE_SETTINGS)
+
+
+class ServingManager:
+    """
+    Holds the live ServingState and replaces it on reload. A reload
+    builds and validates the new state on a background thread, then
+    swaps the reference in one assignment: new requests see the new
+    state, in-flight ones finish on the old one, which is freed once
+    the last of them drops it.
+    """
+
+    def __init__(
+        self,
+        state: ServingState,
+        loader: Callable[..., ServingState],
+        on_swap: Optional[Callable[[ServingState], None]] = None,
+    ):
+        self.current = state
+        self.loader = loader
+        self.on_swap = on_swap
+
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.reload_status = {
+            "status": "idle",
+            "requested": None,
+            "swapped_at": None,
+            "previous": None,
+            "previous_freed_at": None,
+            "error": None,
+        }
+
+    def reload(self, model_version: str, dataset_mode: str) -> bool:
+        """
+        Start a background reload; False if one is already running.
+        """
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return False
+            self.reload_status.update(
+                status="loading",
+                requested={"model_version": model_version, "dataset_mode": dataset_mode},
+                error=None,
+            )
+            self._thread = threading.Thread(
+                target=self._reload,
+                args=(model_version, dataset_mode),
+                name="serving-reload",
+                daemon=True,
+            )
+            self._thread.start()
+            return True
+
+    def _reload(self, model_version: str, dataset_mode: str) -> None:
+        # A model-only reload keeps serving the loaded snapshot rather
+        # than reading (and holding) a second copy of it
+        current = self.current
+        snapshot = current.snapshot if dataset_mode == current.dataset_mode else None
+
+        try:
+            state = self.loader(model_version, dataset_mode, snapshot=snapshot)
+            validate_serving_state(state)
+        except Exception as e:
+            self.reload_status.update(status="failed", error=f"{type(e).__name__}: {e}")
+            print(f"❌ Reload failed, still serving the previous state: {e}")
+            return
+
+        old, self.current = self.current, state
+        if self.on_swap is not None:
+            self.on_swap(state)
+
+        swapped_at = time.time()
+        self.reload_status.update(
+            status="idle",
+            swapped_at=swapped_at,
+            previous=old.version_fields(),
+            previous_freed_at=None,
+        )
+        # The job runner may hold the old frame until its current job ends
+        if state.snapshot is not old.snapshot:
+            weakref.finalize(old.df_features, self._previous_freed, swapped_at)
+        print(
+            f"✅ Swapped to model {state.model_version} / "
+            f"{state.snapshot_path.name} (built in {state.load_seconds:.2f}s)"
+        )
+
+    def _previous_freed(self, swapped_at: float) -> None:
+        # Hand the old snapshot's Arrow buffers back to the OS
+        pa.default_memory_pool().release_unused()
+        if self.reload_status["swapped_at"] == swapped_at:
+            self.reload_status["previous_freed_at"] = time.time()
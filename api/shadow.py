@@ -0,0 +1,275 @@
+import os
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.ml.predictor import QuantilePredictor
+from src.ml.predictor_factory import build_predictor
+
+
+@dataclass(frozen=True)
+class ShadowTask:
+    endpoint: str
+    df_scored: pd.DataFrame  # decision rows with the served "forecast" column
+    service_level: float
+    primary_version: str
+
+
+class ShadowScorer:
+    """
+    Re-scores served decisions with a challenger model version on a
+    background thread and writes the per-SKU differences to parquet in
+    batches. It stays off the request path: submitting never blocks
+    (a full queue drops the decision, counted), and the challenger
+    predicts in small row chunks, each started only while no request
+    is in flight, on one low-priority LightGBM thread.
+    """
+
+    def __init__(
+        self,
+        log_dir: Path,
+        batch_rows: int,
+        flush_seconds: float,
+        max_pending: int,
+        chunk_rows: int = 256,
+    ):
+        self.log_dir = log_dir
+        self.batch_rows = batch_rows
+        self.flush_seconds = flush_seconds
+        self.chunk_rows = chunk_rows
+
+        # Requests in flight (ShadowYieldMiddleware); set when zero
+        self._in_flight = 0
+        self._idle = threading.Event()
+        self._idle.set()
+
+        self._queue: "queue.Queue[ShadowTask]" = queue.Queue(maxsize=max_pending)
+        self._lock = threading.Lock()
+        self._challenger: Optional[Tuple[str, QuantilePredictor]] = None
+        self._thread: Optional[threading.Thread] = None
+
+        self._buffer: List[pd.DataFrame] = []
+        self._buffered_rows = 0
+        self._last_flush = time.monotonic()
+
+        self.counts = {
+            "submitted": 0,
+            "dropped": 0,
+            "scored": 0,
+            "errors": 0,
+            "batches": 0,
+            "rows_written": 0,
+        }
+        self._diff_sum = 0.0
+        self._abs_diff_sum = 0.0
+        self._n_rows = 0
+        self.last_error: Optional[str] = None
+        self.last_batch: Optional[str] = None
+
+    # ---------- Control ----------
+
+    @property
+    def challenger(self) -> Optional[str]:
+        challenger = self._challenger
+        return None if challenger is None else challenger[0]
+
+    def set_challenger(self, version: Optional[str]) -> None:
+        """
+        Start shadow-scoring with `version` (None: stop). Raises
+        FileNotFoundError for an unknown version.
+        """
+        predictor = None
+        if version is not None:
+            predictor = build_predictor(
+                version=None if version == "latest" else version,
+                num_threads=1,
+            )
+
+        with self._lock:
+            self._challenger = None if version is None else (version, predictor)
+            self._diff_sum = self._abs_diff_sum = 0.0
+            self._n_rows = 0
+
+            if version is not None and self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._loop, name="shadow-scorer", daemon=True
+                )
+                self._thread.start()
+
+    def submit(
+        self,
+        endpoint: str,
+        df_scored: pd.DataFrame,
+        service_level: float,
+        primary_version: str,
+    ) -> None:
+        challenger = self.challenger
+        if challenger is None or challenger == primary_version:
+            return
+
+        try:
+            self._queue.put_nowait(
+                ShadowTask(endpoint, df_scored, service_level, primary_version)
+            )
+            key = "submitted"
+        except queue.Full:
+            key = "dropped"
+
+        with self._lock:
+            self.counts[key] += 1
+
+    def request_started(self) -> None:
+        with self._lock:
+            self._in_flight += 1
+            self._idle.clear()
+
+    def request_finished(self) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            if self._in_flight == 0:
+                self._idle.set()
+
+    # ---------- Background scoring ----------
+
+    def _loop(self) -> None:
+        try:
+            # Lowest CPU priority for this thread only (Linux: per-thread nice)
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 19)
+        except (AttributeError, OSError):
+            pass
+
+        while True:
+            try:
+                task = self._queue.get(timeout=1.0)
+            except queue.Empty:
+                task = None
+
+            if task is not None:
+                try:
+                    self._score(task)
+                except Exception as e:
+                    with self._lock:
+                        self.counts["errors"] += 1
+                        self.last_error = f"{type(e).__name__}: {e}"
+
+            due = time.monotonic() - self._last_flush >= self.flush_seconds
+            if self._buffered_rows >= self.batch_rows or (self._buffered_rows and due):
+                self._idle.wait()
+                self.flush()
+
+    def _score(self, task: ShadowTask) -> None:
+        challenger = self._challenger
+        if challenger is None:
+            return
+        version, predictor = challenger
+
+        df = task.df_scored
+        served = df["forecast"].to_numpy(dtype=np.float64)
+
+        shadow = np.empty(len(df), dtype=np.float64)
+        for start in range(0, len(df), self.chunk_rows):
+            self._idle.wait()
+            end = start + self.chunk_rows
+            shadow[start:end] = predictor.predict_df(
+                df.iloc[start:end], service_level=task.service_level
+            )
+        diff = shadow - served
+
+        frame = pd.DataFrame({
+            "endpoint": task.endpoint,
+            "store_nbr": df["store_nbr"].to_numpy(),
+            "date": df["date"].to_numpy(),
+            "item_nbr": df["item_nbr"].to_numpy(),
+            "service_level": task.service_level,
+            "primary_version": task.primary_version,
+            "challenger_version": version,
+            "primary_forecast": served,
+            "challenger_forecast": shadow,
+            "diff": diff,
+        })
+
+        with self._lock:
+            self._buffer.append(frame)
+            self._buffered_rows += len(frame)
+            self.counts["scored"] += 1
+            self._diff_sum += float(diff.sum())
+            self._abs_diff_sum += float(np.abs(diff).sum())
+            self._n_rows += len(frame)
+
+    def flush(self) -> Optional[Path]:
+        """
+        Write buffered diffs as one parquet batch (temp file + rename)
+        and log a one-line summary. Returns the file, if any.
+        """
+        with self._lock:
+            frames, self._buffer = self._buffer, []
+            self._buffered_rows = 0
+            self._last_flush = time.monotonic()
+            batch_nbr = self.counts["batches"]
+
+        if not frames:
+            return None
+
+        batch = pd.concat(frames, ignore_index=True)
+
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        path = self.log_dir / f"shadow-{datetime.now():%Y%m%dT%H%M%S}-{batch_nbr:05d}.parquet"
+        tmp = path.with_name("_" + path.name + ".tmp")
+        batch.to_parquet(tmp, index=False)
+        tmp.replace(path)
+
+        with self._lock:
+            self.counts["batches"] += 1
+            self.counts["rows_written"] += len(batch)
+            self.last_batch = path.name
+
+        print(
+            f"🌓 Shadow batch {path.name}: {len(batch)} rows, "
+            f"mean diff {batch['diff'].mean():+.3f}, "
+            f"mean |diff| {batch['diff'].abs().mean():.3f}"
+        )
+        return path
+
+    # ---------- Stats ----------
+
+    def stats(self) -> dict:
+        with self._lock:
+            n = self._n_rows
+            return {
+                "challenger_version": self.challenger,
+                **self.counts,
+                "pending": self._queue.qsize(),
+                "buffered_rows": self._buffered_rows,
+                "mean_diff": round(self._diff_sum / n, 4) if n else None,
+                "mean_abs_diff": round(self._abs_diff_sum / n, 4) if n else None,
+                "last_batch": self.last_batch,
+                "last_error": self.last_error,
+            }
+
+
+class ShadowYieldMiddleware:
+    """
+    ASGI middleware counting in-flight HTTP requests, so the shadow
+    scorer only uses the CPU between them.
+    """
+
+    def __init__(self, app, scorer: ShadowScorer):
+        self.app = app
+        self.scorer = scorer
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        self.scorer.request_started()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.scorer.request_finished()
@@ -0,0 +1,268 @@
+import itertools
+import os
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from src.utils.memory import process_memory_mb
+
+
+class ShardRetiredError(Exception):
+    pass
+
+
+def parse_store_list(value: Optional[str]) -> Optional[List[int]]:
+    """
+    "1,2,3" -> [1, 2, 3]; None / "" -> None (all stores).
+    """
+    if not value:
+        return None
+    return sorted(int(s) for s in value.split(",") if s.strip())
+
+
+def balanced_assignment(store_rows: Dict[int, int], n_shards: int) -> Dict[str, List[int]]:
+    """
+    Split stores into `n_shards` groups of similar row counts (largest
+    store first into the lightest shard), so shard memory is even.
+    """
+    n_shards = max(1, min(n_shards, len(store_rows)))
+    loads = [0] * n_shards
+    groups: List[List[int]] = [[] for _ in range(n_shards)]
+
+    for store, rows in sorted(store_rows.items(), key=lambda kv: (-kv[1], kv[0])):
+        i = loads.index(min(loads))
+        groups[i].append(int(store))
+        loads[i] += rows
+
+    return {f"shard-{i}": sorted(g) for i, g in enumerate(groups)}
+
+
+@dataclass
+class Shard:
+    name: str
+    stores: List[int]
+    port: int
+    process: Optional[subprocess.Popen] = None
+    started_at: Optional[float] = None
+    requests: int = 0
+    errors: int = 0
+    # Removed by a rebalance (or shutdown): never started again
+    retired: bool = False
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    @property
+    def running(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+
+class ShardPool:
+    """
+    Local API processes, each serving a subset of stores. A shard is
+    started on the first request for one of its stores; rebalancing
+    retires and stops shards whose store set changed and lets new ones
+    start lazily with the new assignment.
+    """
+
+    def __init__(
+        self,
+        assignment: Dict[str, List[int]],
+        base_port: int,
+        stores_env: str,
+        start_timeout_s: float,
+        request_timeout_s: float,
+        app: str = "api.main:app",
+    ):
+        self.base_port = base_port
+        self.stores_env = stores_env
+        self.start_timeout_s = start_timeout_s
+        self.request_timeout_s = request_timeout_s
+        self.app = app
+
+        self._lock = threading.Lock()
+        self._shards: Dict[str, Shard] = {}
+        self._owner: Dict[int, Shard] = {}
+        self.rebalance(assignment)
+
+    # ---------- Assignment ----------
+
+    def rebalance(self, assignment: Dict[str, List[int]]) -> None:
+        seen = {}
+        for name, stores in assignment.items():
+            for s in stores:
+                if s in seen:
+                    raise ValueError(f"Store {s} assigned to {seen[s]} and {name}")
+                seen[s] = name
+
+        with self._lock:
+            # Shards whose stores did not change keep running (and their port)
+            kept = {
+                name: self._shards[name]
+                for name, stores in assignment.items()
+                if name in self._shards and self._shards[name].stores == sorted(stores)
+            }
+            removed = [
+                old for name, old in self._shards.items() if name not in kept
+            ]
+            for old in removed:
+                old.retired = True
+
+            # New shards never reuse a port a removed one may still hold
+            used = {shard.port for shard in kept.values()}
+            used |= {old.port for old in removed}
+            free_ports = (p for p in itertools.count(self.base_port) if p not in used)
+
+            self._shards = {
+                name: kept.get(name) or Shard(
+                    name=name, stores=sorted(stores), port=next(free_ports)
+                )
+                for name, stores in sorted(assignment.items())
+            }
+            self._owner = {
+                s: shard for shard in self._shards.values() for s in shard.stores
+            }
+
+        # Outside the pool lock: requests for other shards go on meanwhile
+        for old in removed:
+            self._stop(old)
+
+    def shard_for(self, store_nbr: int) -> Optional[Shard]:
+        with self._lock:
+            return self._owner.get(store_nbr)
+
+    # ---------- Processes ----------
+
+    def ensure_started(self, shard: Shard) -> None:
+        """
+        Start the shard's process if it is not running. Raises
+        ShardRetiredError for a shard a rebalance has removed.
+        """
+        with shard.lock:
+            if shard.retired:
+                raise ShardRetiredError(shard.name)
+            if shard.running:
+                return
+
+            env = dict(os.environ)
+            env[self.stores_env] = ",".join(str(s) for s in shard.stores)
+
+            shard.process = subprocess.Popen(
+                [
+                    sys.executable, "-m", "uvicorn", self.app,
+                    "--host", "127.0.0.1", "--port", str(shard.port),
+                ],
+                env=env,
+            )
+            shard.started_at = time.time()
+
+            deadline = time.monotonic() + self.start_timeout_s
+            while time.monotonic() < deadline:
+                if shard.process.poll() is not None:
+                    raise RuntimeError(f"{shard.name} exited during startup")
+                try:
+                    with urllib.request.urlopen(
+                        f"http://127.0.0.1:{shard.port}/ready", timeout=1
+                    ) as resp:
+                        if resp.status == 200:
+                            return
+                except OSError:
+                    pass
+                time.sleep(0.2)
+
+            self._terminate(shard)
+            raise RuntimeError(f"{shard.name} did not start in {self.start_timeout_s}s")
+
+    def _stop(self, shard: Shard) -> None:
+        # Waits for a start in progress, so it cannot leave a process behind
+        with shard.lock:
+            self._terminate(shard)
+
+    def _terminate(self, shard: Shard) -> None:
+        if shard.running:
+            shard.process.terminate()
+            try:
+                shard.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                shard.process.kill()
+        shard.process = None
+
+    def shutdown(self) -> None:
+        with self._lock:
+            shards = list(self._shards.values())
+            for shard in shards:
+                shard.retired = True
+
+        for shard in shards:
+            self._stop(shard)
+
+    # ---------- Forwarding ----------
+
+    def forward(
+        self,
+        store_nbr: int,
+        method: str,
+        path: str,
+        body: bytes,
+        content_type: str = "application/json",
+    ) -> Tuple[int, bytes, str]:
+        """
+        Send the request to the shard owning `store_nbr` (starting it if
+        needed) and return (status, body, content type). A shard retired
+        by a concurrent rebalance is looked up again. Raises LookupError
+        if no shard serves the store, RuntimeError if the shard fails.
+        """
+        while True:
+            shard = self.shard_for(store_nbr)
+            if shard is None:
+                raise LookupError(f"No shard serves store {store_nbr}")
+            try:
+                self.ensure_started(shard)
+                break
+            except ShardRetiredError:
+                continue
+
+        req = urllib.request.Request(
+            f"http://127.0.0.1:{shard.port}{path}",
+            data=body,
+            method=method,
+            headers={"Content-Type": content_type},
+        )
+        try:
+            with urllib.request.urlopen(req, timeout=self.request_timeout_s) as resp:
+                result = resp.status, resp.read(), resp.headers.get_content_type()
+        except urllib.error.HTTPError as e:
+            result = e.code, e.read(), e.headers.get_content_type()
+        except OSError as e:
+            # Connection refused / reset, or no answer within the timeout
+            raise RuntimeError(f"{shard.name}: {e}") from e
+
+        with shard.lock:
+            shard.requests += 1
+            shard.errors += result[0] >= 400
+        return result
+
+    # ---------- Stats ----------
+
+    def stats(self) -> List[dict]:
+        with self._lock:
+            shards = list(self._shards.values())
+
+        return [
+            {
+                "name": shard.name,
+                "stores": shard.stores,
+                "port": shard.port,
+                "status": "running" if shard.running else "stopped",
+                "started_at": shard.started_at,
+                "requests": shard.requests,
+                "errors": shard.errors,
+                "memory": (
+                    process_memory_mb(shard.process.pid) if shard.running else None
+                ),
+            }
+            for shard in shards
+        ]
@@ -0,0 +1,110 @@
+import argparse
+import time
+from datetime import date
+
+import pandas as pd
+
+from src.config import SNAPSHOTS_DIR
+from src.ml.backtest import make_rolling_origins, run_backtest
+from src.ml.feature_config import FEATURES, TARGET_COL
+from src.ml.splits import TRAIN_START
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Rolling-origin backtest of LightGBM quantile models"
+    )
+
+    parser.add_argument("--first-origin", type=str, default="2015-07-01")
+    parser.add_argument("--n-folds", type=int, default=6)
+    parser.add_argument("--step-days", type=int, default=28)
+    parser.add_argument("--horizon-days", type=int, default=28)
+    parser.add_argument(
+        "--quantiles",
+        nargs="+",
+        type=float,
+        default=[0.90, 0.95],
+    )
+    parser.add_argument(
+        "--segment-col",
+        type=str,
+        default="family",
+        help="Column used to break metrics down (e.g. family, perishable, store_nbr)",
+    )
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--num-boost-round", type=int, default=300)
+    parser.add_argument(
+        "--out",
+        type=str,
+        default=None,
+        help="Optional CSV path for the per-fold / per-segment table",
+    )
+
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    print("📥 Loading featured training snapshot...")
+    columns = sorted(
+        set(FEATURES + [TARGET_COL, "date", args.segment_col])
+    )
+    df = pd.read_parquet(
+        SNAPSHOTS_DIR / "favorita_train_featured_2015.parquet",
+        columns=columns,
+    )
+    df["date"] = pd.to_datetime(df["date"])
+
+    origins = make_rolling_origins(
+        first_origin=date.fromisoformat(args.first_origin),
+        n_folds=args.n_folds,
+        step_days=args.step_days,
+        horizon_days=args.horizon_days,
+        train_start=TRAIN_START,
+    )
+
+    for k, o in enumerate(origins):
+        print(
+            f"Fold {k}: train {o.train_start}..{o.train_end} | "
+            f"test {o.test_start}..{o.test_end}"
+        )
+
+    print(f"🚀 Running backtest on {len(df):,} rows...")
+    start = time.perf_counter()
+
+    results = run_backtest(
+        df,
+        origins=origins,
+        quantiles=args.quantiles,
+        segment_col=args.segment_col,
+        max_workers=args.workers,
+        num_boost_round=args.num_boost_round,
+    )
+
+    elapsed = time.perf_counter() - start
+    print(f"⏱️ Backtest finished in {elapsed:.1f}s")
+
+    overall = results[results["segment"] == "ALL"]
+    print("\n📊 Per-fold summary")
+    print(
+        overall[["fold", "test_start", "quantile", "coverage", "pinball_loss"]]
+        .to_string(index=False)
+    )
+
+    print("\n📊 Per-segment summary (mean over folds)")
+    print(
+        results[results["segment"] != "ALL"]
+        .groupby(["quantile", "segment"])[["coverage", "pinball_loss"]]
+        .mean()
+        .round(4)
+        .to_string()
+    )
+
+    if args.out:
+        results.to_csv(args.out, index=False)
+        print(f"\n✅ Results written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
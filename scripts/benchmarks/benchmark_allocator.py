@@ -0,0 +1,183 @@
+import time
+from typing import Dict, Optional
+
+import numpy as np
+
+from src.optimization.optimizer import (
+    optimize_proportional_allocation,
+    optimize_proportional_allocation_arrays,
+)
+
+
+SKU_COUNTS = [10, 1_000, 100_000]
+REPEATS = 20
+
+
+def legacy_proportional_allocation(
+    demand: Dict[int, float],
+    capacity: int,
+    service_floor_ratio: float = 0.0,
+    perishable_flags: Optional[Dict[int, bool]] = None,
+    perishable_weight: float = 1.0,
+    fill_capacity: bool = False,
+) -> Dict[int, int]:
+    """
+    Reference copy of the original dict-driven allocator, kept here
+    to check the array allocator returns identical results.
+    """
+    if capacity <= 0 or not demand:
+        return {k: 0 for k in demand}
+
+    demand = {k: max(v, 0.0) for k, v in demand.items()}
+
+    if perishable_flags:
+        weighted_demand = {
+            k: (
+                demand[k] * perishable_weight
+                if perishable_flags.get(k, False)
+                else demand[k]
+            )
+            for k in demand
+        }
+    else:
+        weighted_demand = demand.copy()
+
+    total_weighted_demand = sum(weighted_demand.values())
+    if total_weighted_demand == 0:
+        return {k: 0 for k in demand}
+
+    effective_capacity = (
+        capacity if fill_capacity
+        else min(capacity, total_weighted_demand)
+    )
+
+    raw_floors = {
+        k: service_floor_ratio * weighted_demand[k]
+        for k in weighted_demand
+    }
+
+    total_floor = sum(raw_floors.values())
+
+    if total_floor > effective_capacity:
+        scale = effective_capacity / total_floor
+        floors = {k: v * scale for k, v in raw_floors.items()}
+    else:
+        floors = raw_floors
+
+    remaining_capacity = effective_capacity - sum(floors.values())
+
+    residual_demand = {
+        k: max(weighted_demand[k] - floors[k], 0.0)
+        for k in weighted_demand
+    }
+
+    residual_total = sum(residual_demand.values())
+
+    continuous = {}
+    for k in weighted_demand:
+        if residual_total > 0:
+            alloc = floors[k] + remaining_capacity * (
+                residual_demand[k] / residual_total
+            )
+        else:
+            alloc = floors[k]
+        continuous[k] = alloc
+
+    rounded = {k: int(np.floor(v)) for k, v in continuous.items()}
+    current_total = sum(rounded.values())
+    gap = int(round(effective_capacity - current_total))
+
+    remainders = {
+        k: continuous[k] - rounded[k]
+        for k in continuous
+    }
+
+    for k, _ in sorted(remainders.items(), key=lambda x: x[1], reverse=True):
+        if gap <= 0:
+            break
+        rounded[k] += 1
+        gap -= 1
+
+    return rounded
+
+
+def _time(fn, repeats=REPEATS) -> float:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings) * 1000)
+
+
+def main():
+    rng = np.random.default_rng(42)
+
+    print("🚀 Allocator benchmark (median ms)")
+    print(f"{'SKUs':>8} {'legacy dict':>12} {'dict wrapper':>13} {'arrays':>9} {'speedup':>8}")
+
+    for n in SKU_COUNTS:
+        items = np.arange(100_000, 100_000 + n)
+        demand_arr = rng.gamma(1.5, 4.0, n)
+        # Exercise rounding ties as well as fractional demand
+        demand_arr[::7] = np.round(demand_arr[::7])
+        perishable_arr = rng.random(n) < 0.3
+
+        demand = dict(zip(items.tolist(), demand_arr.tolist()))
+        flags = dict(zip(items.tolist(), perishable_arr.tolist()))
+        capacity = int(0.6 * demand_arr.sum())
+
+        kwargs = dict(
+            capacity=capacity,
+            service_floor_ratio=0.2,
+            perishable_weight=1.5,
+        )
+
+        # ---- Equivalence check across policy variants ----
+        for fill in (False, True):
+            for cap in (capacity, int(2 * demand_arr.sum()) + 1, 3):
+                expected = legacy_proportional_allocation(
+                    demand, perishable_flags=flags,
+                    **{**kwargs, "capacity": cap, "fill_capacity": fill},
+                )
+                got = optimize_proportional_allocation_arrays(
+                    demand_arr, perishable=perishable_arr,
+                    **{**kwargs, "capacity": cap, "fill_capacity": fill},
+                )
+                if got.tolist() != [expected[k] for k in items.tolist()]:
+                    raise AssertionError(
+                        f"Mismatch vs legacy allocator at n={n}, "
+                        f"capacity={cap}, fill_capacity={fill}"
+                    )
+
+        repeats = REPEATS if n < 100_000 else 3
+
+        t_legacy = _time(
+            lambda: legacy_proportional_allocation(
+                demand, perishable_flags=flags, **kwargs
+            ),
+            repeats,
+        )
+        t_wrapper = _time(
+            lambda: optimize_proportional_allocation(
+                demand, perishable_flags=flags, **kwargs
+            ),
+            repeats,
+        )
+        t_arrays = _time(
+            lambda: optimize_proportional_allocation_arrays(
+                demand_arr, perishable=perishable_arr, **kwargs
+            ),
+            repeats,
+        )
+
+        print(
+            f"{n:>8,} {t_legacy:>12.3f} {t_wrapper:>13.3f} "
+            f"{t_arrays:>9.3f} {t_legacy / t_arrays:>7.1f}x"
+        )
+
+    print("\n✅ Array allocator matches the legacy allocator")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+import time
+
+import numpy as np
+
+from src.optimization.optimizer import (
+    optimize_proportional_allocation,
+    optimize_proportional_allocation_arrays,
+    optimize_proportional_allocation_grouped,
+)
+
+
+# (decisions, mean SKUs per decision)
+SCENARIOS = [
+    (5_000, 300),     # e.g. 54 stores x ~90 days, curated universe
+    (50_000, 30),     # many small decisions
+]
+
+
+def _time(fn) -> float:
+    start = time.perf_counter()
+    out = fn()
+    return time.perf_counter() - start, out
+
+
+def run_scenario(rng, n_decisions, mean_skus):
+    sizes = np.maximum(rng.poisson(mean_skus, n_decisions), 1)
+    group_ids = np.repeat(np.arange(n_decisions), sizes)
+    n = group_ids.size
+
+    demand = rng.gamma(1.5, 4.0, n)
+    perishable = rng.random(n) < 0.3
+
+    totals = np.bincount(group_ids, demand, minlength=n_decisions)
+    capacity = np.floor(totals * rng.uniform(0.4, 1.2, n_decisions))
+    floor_ratio = rng.choice([0.0, 0.1, 0.2], n_decisions)
+    perishable_weight = rng.choice([1.0, 1.5], n_decisions)
+
+    bounds = np.concatenate([[0], np.cumsum(sizes)])
+    items = np.arange(n)
+
+    print(
+        f"\n🚀 {n_decisions:,} decisions, {n:,} SKU rows "
+        f"(~{mean_skus} SKUs each)"
+    )
+
+    # ---- Per-decision loop, dict allocator (today's chain planning) ----
+    def dict_loop():
+        out = np.empty(n, dtype=np.int64)
+        for g in range(n_decisions):
+            sl = slice(bounds[g], bounds[g + 1])
+            orders = optimize_proportional_allocation(
+                demand=dict(zip(items[sl], demand[sl])),
+                capacity=capacity[g],
+                service_floor_ratio=floor_ratio[g],
+                perishable_flags=dict(zip(items[sl], perishable[sl])),
+                perishable_weight=perishable_weight[g],
+            )
+            out[sl] = [orders[k] for k in items[sl]]
+        return out
+
+    # ---- Per-decision loop, array allocator ----
+    def array_loop():
+        out = np.empty(n, dtype=np.int64)
+        for g in range(n_decisions):
+            sl = slice(bounds[g], bounds[g + 1])
+            out[sl] = optimize_proportional_allocation_arrays(
+                demand[sl],
+                capacity=capacity[g],
+                service_floor_ratio=floor_ratio[g],
+                perishable=perishable[sl],
+                perishable_weight=perishable_weight[g],
+            )
+        return out
+
+    # ---- One batched pass ----
+    def batched():
+        return optimize_proportional_allocation_grouped(
+            group_ids,
+            demand,
+            capacity=capacity,
+            service_floor_ratio=floor_ratio,
+            perishable=perishable,
+            perishable_weight=perishable_weight,
+        )
+
+    t_dict, out_dict = _time(dict_loop)
+    t_loop, out_loop = _time(array_loop)
+    t_batch, out_batch = _time(batched)
+
+    if not (np.array_equal(out_dict, out_batch) and np.array_equal(out_loop, out_batch)):
+        raise AssertionError("Batched allocation differs from per-decision loop")
+
+    print(f"Dict allocator loop:  {t_dict * 1000:>9,.1f} ms")
+    print(f"Array allocator loop: {t_loop * 1000:>9,.1f} ms")
+    print(f"Batched allocator:    {t_batch * 1000:>9,.1f} ms "
+          f"({t_dict / t_batch:,.1f}x vs dict loop)")
+
+
+def main():
+    rng = np.random.default_rng(7)
+
+    for n_decisions, mean_skus in SCENARIOS:
+        run_scenario(rng, n_decisions, mean_skus)
+
+    print("\n✅ Batched allocator matches the per-decision allocators")
+
+
+if __name__ == "__main__":
+    main()
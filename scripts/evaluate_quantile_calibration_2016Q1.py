@@ -1,27 +1,49 @@
+import argparse
+import json
+
 import pandas as pd
-import numpy as np
 from pathlib import Path
 
-from src.config import SNAPSHOTS_DIR
+from src.config import SNAPSHOTS_DIR, MODELS_DIR
 from src.ml.predictor_factory import build_predictor
 from src.ml.feature_config import FEATURES, TARGET_COL
+from src.ml.metrics import coverage, pinball_loss
 
 
 TEST_SNAPSHOT = "favorita_test_featured_2016Q1.parquet"
 QUANTILES = [0.90, 0.95]
 
 
-def pinball_loss(y, y_hat, alpha):
-    """
-    Vectorized pinball loss for quantile regression.
-    """
-    diff = y - y_hat
-    return np.mean(
-        np.maximum(alpha * diff, (alpha - 1) * diff)
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Out-of-time calibration on the 2016Q1 snapshot"
+    )
+
+    parser.add_argument(
+        "--versions",
+        nargs="+",
+        default=["latest"],
+        help=(
+            "Model versions to evaluate side by side "
+            "(e.g. a full retrain and an incremental retrain)"
+        ),
     )
 
+    return parser.parse_args()
+
+
+def _training_mode(version):
+    metadata_path = MODELS_DIR / version / "metadata.json"
+    if not metadata_path.exists():
+        return "unknown"
+    with open(metadata_path) as f:
+        metadata = json.load(f)
+    return metadata.get("mode", "full")
+
 
 def main():
+    args = parse_args()
+
     print("📥 Loading 2016Q1 featured test snapshot")
     df = pd.read_parquet(SNAPSHOTS_DIR / TEST_SNAPSHOT)
 
@@ -32,38 +54,65 @@ def main():
 
     results = []
 
-    for q in QUANTILES:
-        print(f"\n📊 Evaluating P{int(q * 100)}")
+    for version in args.versions:
+        predictor = build_predictor(version=version)
+        mode = _training_mode(version)
 
-        predictor = build_predictor(version="latest")
+        for q in QUANTILES:
+            print(f"\n📊 Evaluating {version} P{int(q * 100)}")
 
-        # Predict
-        y_hat = predictor.predict_df(
-            df_features=X,
-            service_level=q,
-            clip_negative=True,
-        )
+            # Predict
+            y_hat = predictor.predict_df(
+                df_features=X,
+                service_level=q,
+                clip_negative=True,
+            )
 
-        # Coverage
-        coverage = np.mean(y_true <= y_hat)
+            # Coverage
+            empirical_coverage = coverage(y_true, y_hat)
 
-        # Pinball loss
-        loss = pinball_loss(y_true, y_hat, alpha=q)
+            # Pinball loss
+            loss = pinball_loss(y_true, y_hat, alpha=q)
 
-        results.append(
-            {
-                "quantile": f"P{int(q * 100)}",
-                "target_alpha": q,
-                "empirical_coverage": coverage,
-                "pinball_loss": loss,
-            }
-        )
+            results.append(
+                {
+                    "version": version,
+                    "mode": mode,
+                    "quantile": f"P{int(q * 100)}",
+                    "target_alpha": q,
+                    "empirical_coverage": empirical_coverage,
+                    "pinball_loss": loss,
+                }
+            )
+
+            print(f"Coverage:      {empirical_coverage:.3f}")
+            print(f"Pinball loss:  {loss:.4f}")
 
-        print(f"Coverage:      {coverage:.3f}")
-        print(f"Pinball loss:  {loss:.4f}")
+    summary = pd.DataFrame(results)
 
     print("\n✅ Calibration summary")
-    print(pd.DataFrame(results))
+    print(summary)
+
+    if len(args.versions) > 1:
+        baseline = args.versions[0]
+        base_loss = (
+            summary[summary["version"] == baseline]
+            .set_index("quantile")["pinball_loss"]
+        )
+        summary["loss_vs_" + baseline] = (
+            summary["pinball_loss"]
+            / summary["quantile"].map(base_loss)
+            - 1
+        )
+
+        print(f"\n📊 Relative pinball loss vs {baseline}")
+        print(
+            summary.pivot(
+                index="quantile",
+                columns="version",
+                values="loss_vs_" + baseline,
+            ).round(4)
+        )
 
 
 if __name__ == "__main__":
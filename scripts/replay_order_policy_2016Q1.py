@@ -0,0 +1,120 @@
+import argparse
+import itertools
+import time
+
+import pandas as pd
+
+from src.config import SNAPSHOTS_DIR
+from src.ml.feature_config import FEATURES, TARGET_COL
+from src.ml.predictor_factory import build_predictor
+from src.optimization.replay import (
+    REPLAY_DIMENSIONS,
+    ReplayPolicy,
+    prepare_replay_frame,
+    run_replay,
+)
+
+
+TEST_SNAPSHOT = "favorita_test_featured_2016Q1.parquet"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description=(
+            "Replay the forecast-to-orders policy over every store-day "
+            "of the 2016Q1 snapshot against realized sales"
+        )
+    )
+
+    parser.add_argument("--version", type=str, default="latest")
+    parser.add_argument(
+        "--service-levels", nargs="+", type=float, default=[0.90]
+    )
+    parser.add_argument(
+        "--capacity-ratios",
+        nargs="+",
+        type=float,
+        default=[1.0],
+        help="Store-day capacity as a fraction of its total forecast",
+    )
+    parser.add_argument(
+        "--floor-ratios", nargs="+", type=float, default=[0.0]
+    )
+    parser.add_argument(
+        "--perishable-weights", nargs="+", type=float, default=[1.0]
+    )
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument(
+        "--out",
+        type=str,
+        default=None,
+        help="Optional CSV path for the per-policy / per-segment table",
+    )
+
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    print("📥 Loading 2016Q1 featured test snapshot")
+    columns = sorted(
+        set(FEATURES + [TARGET_COL, "date", "item_nbr", "perishable"])
+        | set(REPLAY_DIMENSIONS)
+    )
+    df = pd.read_parquet(SNAPSHOTS_DIR / TEST_SNAPSHOT, columns=columns)
+    df["date"] = pd.to_datetime(df["date"])
+    df = prepare_replay_frame(df)
+
+    print(f"Rows: {len(df):,}")
+
+    predictor = build_predictor(
+        version=None if args.version == "latest" else args.version
+    )
+
+    forecasts = {}
+    start = time.perf_counter()
+    for q in args.service_levels:
+        print(f"🔮 Predicting P{int(q * 100)} for all store-days...")
+        forecasts[q] = predictor.predict_df(df, service_level=q)
+    print(f"⏱️ Forecasts done in {time.perf_counter() - start:.1f}s")
+
+    policies = [
+        ReplayPolicy(
+            service_level=q,
+            capacity_ratio=cap,
+            service_floor_ratio=floor,
+            perishable_weight=weight,
+        )
+        for q, cap, floor, weight in itertools.product(
+            args.service_levels,
+            args.capacity_ratios,
+            args.floor_ratios,
+            args.perishable_weights,
+        )
+    ]
+
+    print(f"🚀 Replaying {len(policies)} policies...")
+    start = time.perf_counter()
+    results = run_replay(
+        df,
+        forecasts,
+        policies,
+        max_workers=args.workers,
+    )
+    print(f"⏱️ Replay finished in {time.perf_counter() - start:.1f}s")
+
+    overall = results[results["dimension"] == "ALL"].drop(
+        columns=["dimension", "segment"]
+    )
+
+    print("\n✅ Policy summary (all store-days)")
+    print(overall.round(4).to_string(index=False))
+
+    if args.out:
+        results.to_csv(args.out, index=False)
+        print(f"\n✅ Replay table written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+import argparse
+import json
+import shutil
+import time
+from datetime import date, datetime
+
+import pandas as pd
+
+from src.config import SNAPSHOTS_DIR, MODELS_DIR
+from src.features.categorical import load_category_schemas
+from src.ml.feature_config import (
+    FEATURES,
+    TARGET_COL,
+    CATEGORICAL_FEATURES,
+)
+from src.ml.trainer import train_lgbm_quantile, DEFAULT_EARLY_STOPPING_ROUNDS
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description=(
+            "Warm-start retraining: continue boosting an existing model "
+            "version on a new data window"
+        )
+    )
+
+    parser.add_argument(
+        "--base-version",
+        type=str,
+        required=True,
+        help="Existing model version to continue from (e.g. v1)",
+    )
+
+    parser.add_argument(
+        "--version",
+        type=str,
+        required=True,
+        help="New model version name (e.g. v1_inc_2016_01_07)",
+    )
+
+    parser.add_argument(
+        "--snapshot",
+        type=str,
+        default="favorita_train_featured_2015.parquet",
+        help="Featured snapshot holding the new data window",
+    )
+
+    parser.add_argument("--window-start", type=str, required=True)
+    parser.add_argument("--window-end", type=str, required=True)
+
+    parser.add_argument(
+        "--valid-start",
+        type=str,
+        default=None,
+        help="Optional validation window start (enables early stopping)",
+    )
+    parser.add_argument("--valid-end", type=str, default=None)
+
+    parser.add_argument(
+        "--num-boost-round",
+        type=int,
+        default=50,
+        help="Additional boosting rounds on the new window",
+    )
+
+    parser.add_argument(
+        "--early-stopping-rounds",
+        type=int,
+        default=DEFAULT_EARLY_STOPPING_ROUNDS,
+    )
+
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    base_dir = MODELS_DIR / args.base_version
+    if not base_dir.exists():
+        raise FileNotFoundError(f"Base model directory not found: {base_dir}")
+
+    with open(base_dir / "metadata.json") as f:
+        base_metadata = json.load(f)
+
+    model_dir = MODELS_DIR / args.version
+    model_dir.mkdir(parents=True, exist_ok=False)
+
+    window_start = date.fromisoformat(args.window_start)
+    window_end = date.fromisoformat(args.window_end)
+
+    print(f"📥 Loading featured snapshot {args.snapshot}...")
+    df = pd.read_parquet(SNAPSHOTS_DIR / args.snapshot)
+    df["date"] = pd.to_datetime(df["date"]).dt.date
+
+    new_df = df[
+        (df["date"] >= window_start) &
+        (df["date"] <= window_end)
+    ].copy()
+
+    valid_df = None
+    if args.valid_start and args.valid_end:
+        valid_df = df[
+            (df["date"] >= date.fromisoformat(args.valid_start)) &
+            (df["date"] <= date.fromisoformat(args.valid_end))
+        ].copy()
+
+    print(
+        f"New-window rows: {len(new_df):,} | "
+        f"Valid rows: {0 if valid_df is None else len(valid_df):,}"
+    )
+
+    if new_df.empty:
+        raise RuntimeError("New data window produced an empty dataset.")
+
+    # Category codes must match the parent model, so reuse its schemas
+    schema_path = base_dir / "category_schemas.json"
+    schemas = load_category_schemas(schema_path)
+    shutil.copy(schema_path, model_dir / "category_schemas.json")
+
+    quantiles = base_metadata["quantiles"]
+    training_summary = {}
+
+    for q in quantiles:
+        q_label = int(q * 100)
+        base_model_path = base_dir / f"favorita_lgbm_p{q_label}.txt"
+        model_path = model_dir / f"favorita_lgbm_p{q_label}.txt"
+        curve_path = model_dir / f"favorita_lgbm_p{q_label}_curve.csv"
+
+        print(f"🔁 Continuing P{q_label} from {base_model_path}...")
+        start = time.perf_counter()
+
+        summary = train_lgbm_quantile(
+            df=new_df,
+            features=FEATURES,
+            target_col=TARGET_COL,
+            quantile=q,
+            categorical_features=CATEGORICAL_FEATURES,
+            model_path=model_path,
+            valid_df=valid_df,
+            num_boost_round=args.num_boost_round,
+            early_stopping_rounds=args.early_stopping_rounds,
+            curve_path=curve_path,
+            init_model=base_model_path,
+            category_schemas=schemas,
+        )
+
+        summary["train_seconds"] = round(time.perf_counter() - start, 2)
+        training_summary[str(q)] = summary
+
+        print(
+            f"✅ Saved model to {model_path} "
+            f"({summary['init_iterations']} → {summary['best_iteration']} "
+            f"iterations in {summary['train_seconds']}s)"
+        )
+
+    print("📝 Writing metadata...")
+    parent_lineage = base_metadata.get("lineage", [])
+    metadata = {
+        "version": args.version,
+        "trained_at": datetime.utcnow().isoformat() + "Z",
+        "mode": "incremental",
+        "dataset": args.snapshot,
+        "train_window": [str(window_start), str(window_end)],
+        "valid_window": (
+            [args.valid_start, args.valid_end] if valid_df is not None else None
+        ),
+        "quantiles": quantiles,
+        "training": training_summary,
+        "parent_version": base_metadata["version"],
+        "lineage": parent_lineage + [
+            {
+                "version": base_metadata["version"],
+                "trained_at": base_metadata.get("trained_at"),
+                "mode": base_metadata.get("mode", "full"),
+                "train_window": base_metadata.get("train_window"),
+            }
+        ],
+    }
+
+    with open(model_dir / "metadata.json", "w") as f:
+        json.dump(metadata, f, indent=2)
+
+    print(f"✅ Metadata written to {model_dir / 'metadata.json'}")
+    print("🎉 Incremental retraining complete")
+
+
+if __name__ == "__main__":
+    main()
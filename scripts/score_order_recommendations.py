@@ -0,0 +1,107 @@
+import argparse
+from pathlib import Path
+
+from src.config import DATA_DIR, SNAPSHOTS_DIR, FEATURED_SNAPSHOT_BY_MODE, ACTIVE_DATASET_MODE
+from src.optimization.batch_scoring import ScoringJob, run_batch_scoring
+from src.optimization.replay import ReplayPolicy
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description=(
+            "Nightly batch scoring: order recommendations for every "
+            "store-day of the featured snapshot, written as a parquet "
+            "dataset partitioned by date/store"
+        )
+    )
+
+    parser.add_argument(
+        "--source",
+        type=str,
+        default=str(SNAPSHOTS_DIR / FEATURED_SNAPSHOT_BY_MODE[ACTIVE_DATASET_MODE]),
+        help="Featured snapshot to score (default: the one the API serves)",
+    )
+    parser.add_argument(
+        "--out",
+        type=str,
+        default=str(DATA_DIR / "recommendations"),
+        help="Output dataset directory (date=.../store_nbr=.../)",
+    )
+    parser.add_argument("--version", type=str, default="latest")
+    parser.add_argument("--start-date", type=str, default=None)
+    parser.add_argument("--end-date", type=str, default=None)
+
+    parser.add_argument("--service-level", type=float, default=0.90)
+    parser.add_argument(
+        "--capacity-units",
+        type=int,
+        default=None,
+        help="Capacity per store-day (default: capacity-ratio x forecast)",
+    )
+    parser.add_argument(
+        "--capacity-ratio",
+        type=float,
+        default=1.0,
+        help="Store-day capacity as a fraction of its total forecast",
+    )
+    parser.add_argument("--floor-ratio", type=float, default=0.0)
+    parser.add_argument("--perishable-weight", type=float, default=1.0)
+
+    parser.add_argument("--stores-per-chunk", type=int, default=1)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument(
+        "--overwrite",
+        action="store_true",
+        help="Start over instead of resuming from completed stores",
+    )
+
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    job = ScoringJob(
+        source=Path(args.source),
+        out_dir=Path(args.out),
+        policy=ReplayPolicy(
+            service_level=args.service_level,
+            capacity_ratio=args.capacity_ratio,
+            capacity_units=args.capacity_units,
+            service_floor_ratio=args.floor_ratio,
+            perishable_weight=args.perishable_weight,
+        ),
+        model_version=None if args.version == "latest" else args.version,
+        start_date=args.start_date,
+        end_date=args.end_date,
+    )
+
+    print(f"📥 Scoring {job.source.name} -> {job.out_dir}")
+
+    def report(result, done, total):
+        rate = result.n_rows / result.seconds if result.seconds > 0 else 0.0
+        print(
+            f"  [{done}/{total}] stores {result.stores}: "
+            f"{result.n_rows:,} rows in {result.seconds:.1f}s "
+            f"({rate:,.0f} rows/sec)"
+        )
+
+    summary = run_batch_scoring(
+        job,
+        stores_per_chunk=args.stores_per_chunk,
+        max_workers=args.workers,
+        overwrite=args.overwrite,
+        on_chunk=report,
+    )
+
+    if summary["stores_skipped"]:
+        print(f"⏭️ Resumed: {summary['stores_skipped']} stores were already done")
+
+    print(
+        f"✅ Scored {summary['stores_scored']} stores, {summary['rows']:,} rows "
+        f"in {summary['seconds']:.1f}s ({summary['rows_per_sec']:,.0f} rows/sec)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -17,7 +17,11 @@ from src.ml.splits import (
     VALID_START,
     VALID_END,
 )
-from src.ml.trainer import train_lgbm_quantile
+from src.ml.trainer import (
+    train_lgbm_quantile,
+    DEFAULT_NUM_BOOST_ROUND,
+    DEFAULT_EARLY_STOPPING_ROUNDS,
+)
 from src.features.categorical import extract_category_schemas, save_category_schemas
 
 
@@ -41,6 +45,21 @@ def parse_args():
         help="Model version name (e.g. v1, v2_2025_12_20)",
     )
 
+    parser.add_argument(
+        "--num-boost-round",
+        type=int,
+        default=DEFAULT_NUM_BOOST_ROUND,
+        help="Maximum boosting rounds",
+    )
+
+    parser.add_argument(
+        "--early-stopping-rounds",
+        type=int,
+        default=DEFAULT_EARLY_STOPPING_ROUNDS,
+        help="Stop after this many rounds without validation improvement "
+             "(0 disables early stopping)",
+    )
+
     return parser.parse_args()
 
 
@@ -89,34 +108,50 @@ def main():
 
     print(f"✅ Category schemas saved to {schema_path}")
 
+    training_summary = {}
+
     for q in quantiles:
         if not (0 < q < 1):
             raise ValueError(f"Invalid quantile: {q}")
 
         q_label = int(q * 100)
         model_path = model_dir / f"favorita_lgbm_p{q_label}.txt"
+        curve_path = model_dir / f"favorita_lgbm_p{q_label}_curve.csv"
 
         print(f"🚀 Training P{q_label} quantile model...")
 
-        train_lgbm_quantile(
+        summary = train_lgbm_quantile(
             df=train_df,
             features=FEATURES,
             target_col=TARGET_COL,
             quantile=q,
             categorical_features=CATEGORICAL_FEATURES,
             model_path=model_path,
+            valid_df=valid_df,
+            num_boost_round=args.num_boost_round,
+            early_stopping_rounds=args.early_stopping_rounds,
+            curve_path=curve_path,
         )
 
-        print(f"✅ Saved model to {model_path}")
+        training_summary[str(q)] = summary
+
+        print(
+            f"✅ Saved model to {model_path} "
+            f"(best iteration {summary['best_iteration']} "
+            f"of {summary['rounds_trained']})"
+        )
+        print(f"📈 Loss curve saved to {curve_path}")
 
     print("📝 Writing metadata...")
     metadata = {
         "version": version,
         "trained_at": datetime.utcnow().isoformat() + "Z",
+        "mode": "full",
         "dataset": "favorita_train_featured_2015.parquet",
         "train_window": [str(TRAIN_START), str(TRAIN_END)],
         "valid_window": [str(VALID_START), str(VALID_END)],
         "quantiles": quantiles,
+        "training": training_summary,
     }
 
     with open(model_dir / "metadata.json", "w") as f:
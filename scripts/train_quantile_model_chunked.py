@@ -0,0 +1,198 @@
+import argparse
+import json
+from datetime import datetime
+from pathlib import Path
+
+from src.config import SNAPSHOTS_DIR, MODELS_DIR
+from src.features.categorical import save_category_schemas
+from src.ml.chunked_trainer import (
+    DownsampleConfig,
+    collect_category_schemas,
+    stream_batch_rows,
+    train_lgbm_quantile_chunked,
+)
+from src.ml.feature_config import (
+    FEATURES,
+    TARGET_COL,
+    CATEGORICAL_FEATURES,
+)
+from src.ml.splits import (
+    TRAIN_START,
+    TRAIN_END,
+    VALID_START,
+    VALID_END,
+)
+from src.ml.trainer import (
+    DEFAULT_NUM_BOOST_ROUND,
+    DEFAULT_EARLY_STOPPING_ROUNDS,
+)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description=(
+            "Train LightGBM quantile models from chunked parquet reads "
+            "under a memory budget (full store/item universe)"
+        )
+    )
+
+    parser.add_argument(
+        "--version",
+        type=str,
+        required=True,
+        help="Model version name (e.g. v2_full_universe)",
+    )
+
+    parser.add_argument(
+        "--source",
+        type=str,
+        default=str(SNAPSHOTS_DIR / "favorita_train_featured_2015.parquet"),
+        help="Featured parquet file or partitioned parquet directory",
+    )
+
+    parser.add_argument(
+        "--quantiles",
+        nargs="+",
+        type=float,
+        default=[0.90],
+    )
+
+    parser.add_argument(
+        "--memory-budget-mb",
+        type=int,
+        default=4096,
+        help="Peak memory cap used to size read batches and the Dataset",
+    )
+
+    parser.add_argument(
+        "--zero-keep-rate",
+        type=float,
+        default=None,
+        help="Keep this fraction of zero-sales rows (weighted 1/rate)",
+    )
+
+    parser.add_argument(
+        "--low-keep-rate",
+        type=float,
+        default=None,
+        help="Keep this fraction of low-sales rows (weighted 1/rate)",
+    )
+
+    parser.add_argument(
+        "--low-sales-threshold",
+        type=float,
+        default=2.0,
+        help="Rows with 0 < unit_sales <= threshold count as low-sales",
+    )
+
+    parser.add_argument(
+        "--num-boost-round",
+        type=int,
+        default=DEFAULT_NUM_BOOST_ROUND,
+    )
+
+    parser.add_argument(
+        "--early-stopping-rounds",
+        type=int,
+        default=DEFAULT_EARLY_STOPPING_ROUNDS,
+    )
+
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    source = Path(args.source)
+
+    model_dir = MODELS_DIR / args.version
+    model_dir.mkdir(parents=True, exist_ok=False)
+
+    downsample = None
+    if args.zero_keep_rate is not None or args.low_keep_rate is not None:
+        downsample = DownsampleConfig(
+            zero_keep_rate=args.zero_keep_rate or 1.0,
+            low_keep_rate=args.low_keep_rate or 1.0,
+            low_sales_threshold=args.low_sales_threshold,
+        )
+
+    train_window = (TRAIN_START, TRAIN_END)
+    valid_window = (VALID_START, VALID_END)
+
+    print("📦 Collecting category schemas (TRAIN ONLY, streamed)...")
+    schemas = collect_category_schemas(
+        source,
+        categorical_features=CATEGORICAL_FEATURES,
+        batch_rows=stream_batch_rows(
+            args.memory_budget_mb, len(CATEGORICAL_FEATURES) + 1
+        ),
+        window=train_window,
+    )
+
+    schema_path = model_dir / "category_schemas.json"
+    save_category_schemas(schemas, schema_path)
+
+    print(f"✅ Category schemas saved to {schema_path}")
+
+    training_summary = {}
+
+    for q in args.quantiles:
+        if not (0 < q < 1):
+            raise ValueError(f"Invalid quantile: {q}")
+
+        q_label = int(q * 100)
+        model_path = model_dir / f"favorita_lgbm_p{q_label}.txt"
+        curve_path = model_dir / f"favorita_lgbm_p{q_label}_curve.csv"
+
+        print(
+            f"🚀 Training P{q_label} quantile model "
+            f"(budget {args.memory_budget_mb:,} MB)..."
+        )
+
+        summary = train_lgbm_quantile_chunked(
+            source=source,
+            features=FEATURES,
+            target_col=TARGET_COL,
+            quantile=q,
+            model_path=model_path,
+            categorical_features=CATEGORICAL_FEATURES,
+            category_schemas=schemas,
+            memory_budget_mb=args.memory_budget_mb,
+            train_window=train_window,
+            valid_window=valid_window,
+            downsample=downsample,
+            num_boost_round=args.num_boost_round,
+            early_stopping_rounds=args.early_stopping_rounds,
+            curve_path=curve_path,
+            spool_dir=model_dir,
+        )
+
+        training_summary[str(q)] = summary
+
+        print(
+            f"✅ Saved model to {model_path} "
+            f"({summary['train_rows']:,} rows, "
+            f"peak RSS {summary['peak_rss_mb']:,.0f} MB)"
+        )
+
+    print("📝 Writing metadata...")
+    metadata = {
+        "version": args.version,
+        "trained_at": datetime.utcnow().isoformat() + "Z",
+        "mode": "full",
+        "chunked": True,
+        "dataset": source.name,
+        "train_window": [str(TRAIN_START), str(TRAIN_END)],
+        "valid_window": [str(VALID_START), str(VALID_END)],
+        "quantiles": args.quantiles,
+        "training": training_summary,
+    }
+
+    with open(model_dir / "metadata.json", "w") as f:
+        json.dump(metadata, f, indent=2)
+
+    print(f"✅ Metadata written to {model_dir / 'metadata.json'}")
+    print("🎉 Training complete")
+
+
+if __name__ == "__main__":
+    main()
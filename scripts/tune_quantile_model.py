@@ -0,0 +1,97 @@
+import argparse
+import time
+
+import pandas as pd
+
+from src.config import SNAPSHOTS_DIR
+from src.ml.feature_config import FEATURES, TARGET_COL
+from src.ml.splits import (
+    TRAIN_START,
+    TRAIN_END,
+    VALID_START,
+    VALID_END,
+)
+from src.ml.tuning import HalvingSchedule, run_search
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description=(
+            "Successive-halving hyperparameter search for LightGBM "
+            "quantile models (accuracy, model size and predict latency)"
+        )
+    )
+
+    parser.add_argument("--quantile", type=float, default=0.90)
+    parser.add_argument("--n-trials", type=int, default=27)
+    parser.add_argument("--min-rounds", type=int, default=50)
+    parser.add_argument("--max-rounds", type=int, default=800)
+    parser.add_argument("--eta", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument(
+        "--latency-rows",
+        type=int,
+        default=1000,
+        help="Batch size used to time predict (roughly one store-day)",
+    )
+    parser.add_argument(
+        "--out",
+        type=str,
+        default=None,
+        help="Optional CSV path for the full trial table",
+    )
+
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    print("📥 Loading featured training snapshot...")
+    df = pd.read_parquet(
+        SNAPSHOTS_DIR / "favorita_train_featured_2015.parquet",
+        columns=FEATURES + [TARGET_COL, "date"],
+    )
+    df["date"] = pd.to_datetime(df["date"]).dt.date
+
+    train_df = df[(df["date"] >= TRAIN_START) & (df["date"] <= TRAIN_END)]
+    valid_df = df[(df["date"] >= VALID_START) & (df["date"] <= VALID_END)]
+
+    print(
+        f"Train rows: {len(train_df):,} | "
+        f"Valid rows: {len(valid_df):,}"
+    )
+
+    schedule = HalvingSchedule(
+        min_rounds=args.min_rounds,
+        max_rounds=args.max_rounds,
+        eta=args.eta,
+    )
+    print(f"🔎 Rung budgets (rounds): {schedule.rungs()}")
+
+    start = time.perf_counter()
+    trials = run_search(
+        train_df,
+        valid_df,
+        quantile=args.quantile,
+        n_trials=args.n_trials,
+        schedule=schedule,
+        max_workers=args.workers,
+        latency_rows=args.latency_rows,
+    )
+    print(f"⏱️ Search finished in {time.perf_counter() - start:.1f}s")
+
+    print("\n🏁 Pareto front (loss vs predict latency vs model size)")
+    print(
+        trials[trials["pareto"]]
+        .sort_values("valid_pinball_loss")
+        .to_string(index=False)
+    )
+
+    if args.out:
+        trials.to_csv(args.out, index=False)
+        print(f"\n✅ Trial table written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,11 @@
-import numpy as np
 import pandas as pd
 
 from src.config import SNAPSHOTS_DIR
 from src.ml.predictor_factory import build_default_predictor
+from src.ml.metrics import coverage, pinball_loss
 from src.ml.splits import VALID_START, VALID_END
 
 
-def pinball_loss(y_true, y_pred, alpha):
-    diff = y_true - y_pred
-    return np.mean(
-        np.maximum(alpha * diff, (alpha - 1) * diff)
-    )
-
-
 def main():
     print("📥 Loading featured snapshot...")
     df = pd.read_parquet(
@@ -40,10 +33,10 @@ def main():
             service_level=alpha,
         )
 
-        coverage = np.mean(y_true <= y_pred)
+        empirical_coverage = coverage(y_true, y_pred)
         loss = pinball_loss(y_true, y_pred, alpha)
 
-        print(f"Coverage: {coverage:.3f}")
+        print(f"Coverage: {empirical_coverage:.3f}")
         print(f"Pinball loss: {loss:.4f}")
 
 
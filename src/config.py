@@ -20,6 +20,18 @@ MODELS_DIR = DATA_DIR / "models"
 # Change this to switch models (e.g. "v1", "v2_2025_12_20")
 ACTIVE_MODEL_VERSION = "v1"
 
+# Model versions kept loaded for per-request `model_version` (LRU)
+MAX_LOADED_MODEL_VERSIONS = 3
+
+# Shadow scoring: a challenger version re-scores live decisions in the
+# background and its diffs to the served forecast are written in
+# batches under SHADOW_DIR (None: off; can be switched at runtime)
+SHADOW_MODEL_VERSION = None
+SHADOW_DIR = DATA_DIR / "shadow"
+SHADOW_BATCH_ROWS = 50_000
+SHADOW_FLUSH_SECONDS = 30
+SHADOW_MAX_PENDING = 256  # queued decisions; beyond this they are dropped
+
 # =====================================================
 # Dataset selection (TRAIN vs DEMO / TEST)
 # =====================================================
@@ -33,3 +45,39 @@ FEATURED_SNAPSHOT_BY_MODE = {
     "train": "favorita_train_featured_2015.parquet",
     "test": "favorita_test_featured_2016Q1.parquet",
 }
+
+# Snapshots other than the served one load on first request (`dataset`);
+# beyond this total the least recently used are evicted
+SNAPSHOT_MEMORY_BUDGET_MB = 4096
+
+# =====================================================
+# Background jobs (API job queue)
+# =====================================================
+
+JOBS_DIR = DATA_DIR / "jobs"
+
+# Worker processes for planning jobs (spawned; they memory-map the snapshot)
+JOB_WORKERS = 4
+
+# Submissions beyond this many queued jobs are rejected (HTTP 429)
+MAX_QUEUED_JOBS = 8
+
+# =====================================================
+# Multi-worker serving
+# =====================================================
+
+# True: API workers memory-map one shared, read-only copy of the
+# featured snapshot (materialized once under SHARED_SNAPSHOT_DIR)
+# instead of each loading its own. Use with several API workers.
+SHARED_SNAPSHOT = False
+SHARED_SNAPSHOT_DIR = DATA_DIR / "shared"
+
+# Store-sharded serving (api/router.py): each shard is an API process
+# loading only its stores' rows, started on first use by the router.
+ROUTER_SHARDS = 4
+SHARD_BASE_PORT = 8100
+SHARD_START_TIMEOUT_S = 120
+SHARD_REQUEST_TIMEOUT_S = 60  # a shard not answering by then gives a 502
+
+# Env var through which the router hands a shard its stores ("1,2,3")
+SHARD_STORES_ENV = "FAVORITA_SHARD_STORES"
@@ -0,0 +1,240 @@
+import fcntl
+import hashlib
+import json
+import os
+import re
+import shutil
+import weakref
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+
+
+TABLE_FILE = "snapshot.arrow"
+INDEX_FILE = "decision_index.npz"
+MANIFEST_FILE = "manifest.json"
+
+
+class DecisionIndex:
+    """
+    (store_nbr, date) -> contiguous row range of a snapshot sorted by
+    store and date. Backed by a few small arrays, so every worker can
+    hold it; lookups return a slice usable with DataFrame.iloc.
+    """
+
+    def __init__(self, stores: np.ndarray, dates: np.ndarray, starts: np.ndarray):
+        self._stores = stores
+        self._dates = dates
+        self._starts = starts  # len(stores) + 1 boundaries
+
+    @classmethod
+    def from_sorted(cls, store_nbr: np.ndarray, date: np.ndarray) -> "DecisionIndex":
+        date = np.asarray(date, dtype="datetime64[ns]").view(np.int64)
+        if store_nbr.size == 0:
+            empty = np.zeros(0, dtype=np.int64)
+            return cls(empty, empty, np.zeros(1, dtype=np.int64))
+
+        change = np.flatnonzero(
+            (np.diff(store_nbr) != 0) | (np.diff(date) != 0)
+        ) + 1
+        starts = np.concatenate([[0], change, [store_nbr.size]])
+        return cls(store_nbr[starts[:-1]], date[starts[:-1]], starts)
+
+    def get(self, key: Tuple[int, pd.Timestamp]) -> Optional[slice]:
+        store, date = key
+        date = pd.Timestamp(date).value
+        lo = np.searchsorted(self._stores, store, side="left")
+        hi = np.searchsorted(self._stores, store, side="right")
+        i = lo + np.searchsorted(self._dates[lo:hi], date)
+        if i < hi and self._dates[i] == date:
+            return slice(int(self._starts[i]), int(self._starts[i + 1]))
+        return None
+
+    @property
+    def nbytes(self) -> int:
+        return self._stores.nbytes + self._dates.nbytes + self._starts.nbytes
+
+    def save(self, path: Path) -> None:
+        np.savez(path, stores=self._stores, dates=self._dates, starts=self._starts)
+
+    @classmethod
+    def load(cls, path: Path) -> "DecisionIndex":
+        with np.load(path) as data:
+            return cls(data["stores"], data["dates"], data["starts"])
+
+
+@dataclass(frozen=True)
+class SharedSnapshot:
+    df: pd.DataFrame
+    index: DecisionIndex
+    directory: Path
+
+
+def _fingerprint(source: Path, columns: Optional[Sequence[str]]) -> str:
+    stat = source.stat()
+    key = f"{source.resolve()}:{stat.st_size}:{stat.st_mtime_ns}:{columns}"
+    return hashlib.sha1(key.encode()).hexdigest()[:12]
+
+
+def materialize_snapshot(
+    source: Path,
+    directory: Path,
+    columns: Optional[Sequence[str]] = None,
+) -> None:
+    """
+    Write `source` (featured parquet, optionally only `columns`) as one
+    uncompressed Arrow IPC record batch sorted by (store_nbr, date),
+    plus its decision index. Written to a temp directory and renamed,
+    so readers never see a partial snapshot.
+    """
+    table = pq.read_table(source, columns=None if columns is None else list(columns))
+    table = table.take(
+        pc.sort_indices(
+            table,
+            sort_keys=[("store_nbr", "ascending"), ("date", "ascending")],
+        )
+    ).combine_chunks()
+
+    # Missing lags / rolling stats are Arrow nulls after parquet; as NaN
+    # the float columns stay zero-copy when attached
+    for i, field in enumerate(table.schema):
+        if pa.types.is_floating(field.type) and table.column(i).null_count:
+            table = table.set_column(
+                i, field, pc.fill_null(table.column(i), float("nan"))
+            )
+
+    tmp = directory.with_name(directory.name + ".tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+
+    with ipc.new_file(tmp / TABLE_FILE, table.schema) as writer:
+        writer.write_table(table, max_chunksize=max(table.num_rows, 1))
+
+    DecisionIndex.from_sorted(
+        table.column("store_nbr").to_numpy(),
+        table.column("date").to_numpy(),
+    ).save(tmp / INDEX_FILE)
+
+    (tmp / MANIFEST_FILE).write_text(
+        json.dumps({"source": str(source), "rows": table.num_rows})
+    )
+
+    os.replace(tmp, directory)
+
+    # Hand the conversion buffers back to the OS; this process keeps serving
+    del table
+    pa.default_memory_pool().release_unused()
+
+
+def attach_snapshot(directory: Path) -> SharedSnapshot:
+    """
+    Memory-map a materialized snapshot read-only. Numeric and date
+    columns are NumPy views on the mapping and strings are Arrow-backed,
+    so pages are shared by every process attached to the same file.
+    """
+    # Shared lock held while the frame lives: marks the copy as in use,
+    # so another process's cleanup (see _remove_stale) leaves it alone
+    in_use = open(directory / TABLE_FILE, "rb")
+    fcntl.flock(in_use, fcntl.LOCK_SH)
+
+    table = ipc.open_file(pa.memory_map(str(directory / TABLE_FILE))).read_all()
+
+    columns = {}
+    for name in table.column_names:
+        col = table.column(name)
+        if pa.types.is_string(col.type) or pa.types.is_large_string(col.type):
+            columns[name] = pd.arrays.ArrowStringArray(
+                col, dtype=pd.StringDtype("pyarrow", na_value=np.nan)
+            )
+        elif col.null_count:
+            # Nulls left in non-float columns need a (private) copy
+            columns[name] = col.chunk(0).to_numpy(zero_copy_only=False)
+        else:
+            columns[name] = col.chunk(0).to_numpy(zero_copy_only=True)
+
+    df = pd.DataFrame(columns, copy=False)
+    weakref.finalize(df, in_use.close)
+
+    return SharedSnapshot(
+        df=df,
+        index=DecisionIndex.load(directory / INDEX_FILE),
+        directory=directory,
+    )
+
+
+def _in_use(directory: Path) -> bool:
+    try:
+        table_file = open(directory / TABLE_FILE, "rb")
+    except FileNotFoundError:
+        return False
+
+    with table_file:
+        try:
+            fcntl.flock(table_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return True
+        return False
+
+
+def _remove_stale(source: Path, shared_dir: Path, keep: Path) -> None:
+    """
+    Delete copies of `source` other than `keep` (earlier versions of
+    the file, or other column sets) that no process has attached, and
+    temp directories left by crashed conversions. Call with the
+    shared_dir lock held.
+    """
+    pattern = re.compile(rf"{re.escape(source.stem)}-[0-9a-f]{{12}}")
+
+    for path in shared_dir.iterdir():
+        if not path.is_dir() or path == keep:
+            continue
+        if path.name.endswith(".tmp"):
+            # Conversions only run under the lock, so this one is dead
+            shutil.rmtree(path, ignore_errors=True)
+        elif pattern.fullmatch(path.name) and not _in_use(path):
+            shutil.rmtree(path, ignore_errors=True)
+            print(f"♻️ Removed stale shared snapshot {path.name}")
+
+
+def shared_snapshot_dir(
+    source: Path,
+    shared_dir: Path,
+    columns: Optional[Sequence[str]] = None,
+) -> Path:
+    """
+    Directory of the shared copy of `source`, materializing it first if
+    needed. A file lock makes exactly one process (the first worker
+    to start) do the conversion; the others wait for it. Copies of
+    earlier versions of `source` are removed once nothing uses them.
+    """
+    shared_dir.mkdir(parents=True, exist_ok=True)
+    directory = shared_dir / f"{source.stem}-{_fingerprint(source, columns)}"
+
+    with open(shared_dir / ".lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            if not (directory / MANIFEST_FILE).exists():
+                materialize_snapshot(source, directory, columns)
+            _remove_stale(source, shared_dir, keep=directory)
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+    return directory
+
+
+def load_shared_snapshot(
+    source: Path,
+    shared_dir: Path,
+    columns: Optional[Sequence[str]] = None,
+) -> SharedSnapshot:
+    """
+    Attach to the shared copy of `source` (see shared_snapshot_dir).
+    """
+    return attach_snapshot(shared_snapshot_dir(source, shared_dir, columns))
@@ -0,0 +1,186 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import pandas as pd
+
+
+@dataclass(frozen=True)
+class LoadedSnapshot:
+    """
+    A featured snapshot ready to serve: the frame, its (store_nbr, date)
+    decision index and the estimated memory both take.
+    """
+    dataset: str
+    path: Path
+    df_features: pd.DataFrame
+    decision_index: Any  # dict of row positions, or a shared DecisionIndex
+    nbytes: int
+    load_seconds: float
+
+
+def estimate_nbytes(df: pd.DataFrame, decision_index: Any) -> int:
+    """
+    Memory of a snapshot frame plus its decision index (row-position
+    arrays of a groupby index, or the arrays of a DecisionIndex).
+    """
+    nbytes = int(df.memory_usage(index=True, deep=True).sum())
+
+    if isinstance(decision_index, dict):
+        nbytes += sys.getsizeof(decision_index)
+        nbytes += sum(sys.getsizeof(rows) for rows in decision_index.values())
+    else:
+        nbytes += int(decision_index.nbytes)
+
+    return nbytes
+
+
+@dataclass
+class _SnapshotStats:
+    loads: int = 0
+    evictions: int = 0
+    hits: int = 0
+    last_used: Optional[float] = None
+
+
+class SnapshotRegistry:
+    """
+    Featured snapshots by dataset name, loaded on first request and kept
+    under a total memory budget: loading one beyond the budget evicts
+    the least recently used others. A pinned snapshot (the one the API
+    serves by default) counts toward the budget but is never evicted,
+    and is dropped as soon as a reload pins another one.
+    Load / eviction / hit counts are kept per dataset across evictions.
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[str], LoadedSnapshot],
+        datasets: Callable[[], List[str]],
+        budget_bytes: int,
+    ):
+        self.loader = loader
+        self.datasets = datasets
+        self.budget_bytes = budget_bytes
+
+        self._lock = threading.Lock()
+        self._loaded: "OrderedDict[str, LoadedSnapshot]" = OrderedDict()
+        self._pinned: Optional[str] = None
+        self._load_locks: Dict[str, threading.Lock] = {}
+        self._stats: Dict[str, _SnapshotStats] = {}
+
+    # ---------- Lookup ----------
+
+    def _hit(self, dataset: str) -> Optional[LoadedSnapshot]:
+        snapshot = self._loaded.get(dataset)
+        if snapshot is not None:
+            self._loaded.move_to_end(dataset)
+            stats = self._stats[dataset]
+            stats.hits += 1
+            stats.last_used = time.time()
+        return snapshot
+
+    def get(self, dataset: str) -> LoadedSnapshot:
+        """
+        Snapshot for `dataset`, loading it (and evicting others) on a
+        miss. Raises KeyError for a dataset that is not configured.
+        """
+        with self._lock:
+            snapshot = self._hit(dataset)
+            if snapshot is not None:
+                return snapshot
+            if dataset not in self.datasets():
+                raise KeyError(dataset)
+            load_lock = self._load_locks.setdefault(dataset, threading.Lock())
+
+        # One load per dataset at a time; other datasets stay servable
+        with load_lock:
+            with self._lock:
+                snapshot = self._hit(dataset)
+                if snapshot is not None:
+                    return snapshot
+
+            snapshot = self.loader(dataset)
+
+            with self._lock:
+                self._add(snapshot)
+                self._stats[dataset].last_used = time.time()
+                self._evict(keep=dataset)
+            return snapshot
+
+    def record_hit(self, dataset: str) -> None:
+        """
+        Count a request served from a snapshot the caller already holds
+        (the served state's own snapshot).
+        """
+        with self._lock:
+            self._hit(dataset)
+
+    def pin(self, snapshot: LoadedSnapshot) -> None:
+        """
+        Register the served snapshot (replacing any loaded copy of the
+        same dataset). The previously pinned one is dropped, so it is
+        freed once in-flight requests release it; a later request for
+        its dataset loads it again.
+        """
+        with self._lock:
+            previous = self._pinned
+            if previous is not None and previous != snapshot.dataset:
+                if self._loaded.pop(previous, None) is not None:
+                    self._stats[previous].evictions += 1
+                    print(f"♻️ Released snapshot {previous} (no longer served)")
+
+            if self._loaded.get(snapshot.dataset) is not snapshot:
+                self._add(snapshot)
+            self._pinned = snapshot.dataset
+            self._evict(keep=snapshot.dataset)
+
+    def _add(self, snapshot: LoadedSnapshot) -> None:
+        self._loaded[snapshot.dataset] = snapshot
+        self._loaded.move_to_end(snapshot.dataset)
+        self._stats.setdefault(snapshot.dataset, _SnapshotStats()).loads += 1
+
+    def _evict(self, keep: str) -> None:
+        used = sum(s.nbytes for s in self._loaded.values())
+        for dataset in list(self._loaded):  # least recently used first
+            if used <= self.budget_bytes:
+                break
+            if dataset in (keep, self._pinned):
+                continue
+            used -= self._loaded.pop(dataset).nbytes
+            self._stats[dataset].evictions += 1
+            print(f"♻️ Evicted snapshot {dataset} (memory budget)")
+
+    # ---------- Stats ----------
+
+    def stats(self) -> dict:
+        mb = 1024 * 1024
+        with self._lock:
+            loaded = dict(self._loaded)
+            snapshots = [
+                {
+                    "dataset": dataset,
+                    "loaded": dataset in loaded,
+                    "pinned": dataset == self._pinned,
+                    "snapshot": loaded[dataset].path.name if dataset in loaded else None,
+                    "rows": len(loaded[dataset].df_features) if dataset in loaded else None,
+                    "size_mb": (
+                        round(loaded[dataset].nbytes / mb, 1) if dataset in loaded else None
+                    ),
+                    "loads": stats.loads,
+                    "evictions": stats.evictions,
+                    "hits": stats.hits,
+                    "last_used": stats.last_used,
+                }
+                for dataset, stats in sorted(self._stats.items())
+            ]
+            return {
+                "budget_mb": round(self.budget_bytes / mb, 1),
+                "used_mb": round(sum(s.nbytes for s in loaded.values()) / mb, 1),
+                "available": sorted(self.datasets()),
+                "snapshots": snapshots,
+            }
@@ -0,0 +1,294 @@
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import lightgbm as lgb
+import numpy as np
+import pandas as pd
+
+from src.ml.feature_config import CATEGORICAL_FEATURES, FEATURES, TARGET_COL
+from src.ml.metrics import pinball_losses
+from src.ml.trainer import DEFAULT_NUM_BOOST_ROUND, build_quantile_params
+
+
+@dataclass(frozen=True)
+class RollingOrigin:
+    """
+    One backtest fold: train on [train_start, train_end], score
+    on [test_start, test_end] (inclusive dates).
+    """
+    train_start: date
+    train_end: date
+    test_start: date
+    test_end: date
+
+
+def make_rolling_origins(
+    first_origin: date,
+    n_folds: int,
+    step_days: int,
+    horizon_days: int,
+    train_start: date,
+) -> List[RollingOrigin]:
+    """
+    Expanding-window origins: fold k trains on everything before
+    `first_origin + k * step_days` and tests on the next `horizon_days`.
+    """
+    origins = []
+    for k in range(n_folds):
+        origin = first_origin + timedelta(days=k * step_days)
+        origins.append(
+            RollingOrigin(
+                train_start=train_start,
+                train_end=origin - timedelta(days=1),
+                test_start=origin,
+                test_end=origin + timedelta(days=horizon_days - 1),
+            )
+        )
+    return origins
+
+
+# =====================================================
+# Shared feature matrix (memory-mapped)
+# =====================================================
+
+@dataclass(frozen=True)
+class SharedMatrix:
+    """
+    Paths of the .npy files holding the encoded feature matrix.
+    Rows are sorted by date so every fold window is a contiguous slice.
+    """
+    directory: Path
+    n_rows: int
+    segment_labels: List[str]
+
+    @property
+    def X_path(self) -> Path:
+        return self.directory / "X.npy"
+
+    @property
+    def y_path(self) -> Path:
+        return self.directory / "y.npy"
+
+    @property
+    def days_path(self) -> Path:
+        return self.directory / "days.npy"
+
+    @property
+    def segment_path(self) -> Path:
+        return self.directory / "segment.npy"
+
+
+def write_shared_matrix(
+    df: pd.DataFrame,
+    directory: Path,
+    segment_col: str = "family",
+) -> SharedMatrix:
+    """
+    Encode FEATURES as float32 (categoricals as codes, NaN preserved),
+    sort by date and write X / y / day / segment arrays as .npy files
+    that workers open with mmap_mode="r".
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+
+    df = df.sort_values("date", kind="stable")
+
+    X = np.empty((len(df), len(FEATURES)), dtype=np.float32)
+    for j, col in enumerate(FEATURES):
+        if col in CATEGORICAL_FEATURES:
+            codes = pd.Categorical(df[col]).codes.astype(np.float32)
+            codes[codes < 0] = np.nan
+            X[:, j] = codes
+        else:
+            X[:, j] = df[col].to_numpy(dtype=np.float32, na_value=np.nan)
+
+    segments = pd.Categorical(df[segment_col].astype(str))
+
+    np.save(directory / "X.npy", X)
+    np.save(
+        directory / "y.npy",
+        df[TARGET_COL].to_numpy(dtype=np.float32),
+    )
+    np.save(
+        directory / "days.npy",
+        pd.to_datetime(df["date"]).to_numpy().astype("datetime64[D]"),
+    )
+    np.save(directory / "segment.npy", segments.codes.astype(np.int32))
+
+    return SharedMatrix(
+        directory=directory,
+        n_rows=len(df),
+        segment_labels=list(segments.categories),
+    )
+
+
+# Per-process handles, opened once by the pool initializer
+_SHARED: Dict[str, np.ndarray] = {}
+
+
+def _attach_shared(matrix: SharedMatrix) -> None:
+    _SHARED["X"] = np.load(matrix.X_path, mmap_mode="r")
+    _SHARED["y"] = np.load(matrix.y_path, mmap_mode="r")
+    _SHARED["days"] = np.load(matrix.days_path, mmap_mode="r")
+    _SHARED["segment"] = np.load(matrix.segment_path, mmap_mode="r")
+
+
+def _window(days: np.ndarray, start: date, end: date) -> slice:
+    lo = np.searchsorted(days, np.datetime64(start, "D"), side="left")
+    hi = np.searchsorted(days, np.datetime64(end, "D"), side="right")
+    return slice(int(lo), int(hi))
+
+
+def _segment_metrics(
+    y: np.ndarray,
+    y_hat: np.ndarray,
+    segment: np.ndarray,
+    n_segments: int,
+    alpha: float,
+) -> Dict[str, np.ndarray]:
+    loss = pinball_losses(y, y_hat, alpha)
+    covered = (y <= y_hat).astype(np.float64)
+
+    return {
+        "n_rows": np.bincount(segment, minlength=n_segments),
+        "covered": np.bincount(segment, covered, minlength=n_segments),
+        "loss": np.bincount(segment, loss, minlength=n_segments),
+    }
+
+
+def _run_fold(
+    fold: int,
+    origin: RollingOrigin,
+    quantile: float,
+    n_segments: int,
+    num_boost_round: int,
+    params_overrides: Optional[Dict[str, Any]],
+) -> Dict[str, Any]:
+    X, y, days, segment = (
+        _SHARED["X"], _SHARED["y"], _SHARED["days"], _SHARED["segment"]
+    )
+
+    train_rows = _window(days, origin.train_start, origin.train_end)
+    test_rows = _window(days, origin.test_start, origin.test_end)
+
+    if train_rows.stop <= train_rows.start or test_rows.stop <= test_rows.start:
+        raise ValueError(f"Fold {fold} has an empty train or test window")
+
+    categorical_idx = [
+        FEATURES.index(c) for c in CATEGORICAL_FEATURES
+    ]
+
+    dataset = lgb.Dataset(
+        X[train_rows],
+        label=np.log1p(np.clip(y[train_rows], 0, None)),
+        feature_name=FEATURES,
+        categorical_feature=categorical_idx,
+        free_raw_data=True,
+    )
+
+    model = lgb.train(
+        params=build_quantile_params(quantile, params_overrides),
+        train_set=dataset,
+        num_boost_round=num_boost_round,
+    )
+
+    y_hat = np.clip(np.expm1(model.predict(X[test_rows])), 0, None)
+    y_test = np.asarray(y[test_rows], dtype=np.float64)
+
+    return {
+        "fold": fold,
+        "quantile": quantile,
+        "n_train": train_rows.stop - train_rows.start,
+        **_segment_metrics(
+            y_test,
+            y_hat,
+            np.asarray(segment[test_rows]),
+            n_segments,
+            quantile,
+        ),
+    }
+
+
+def run_backtest(
+    df: pd.DataFrame,
+    origins: Sequence[RollingOrigin],
+    quantiles: Sequence[float] = (0.90, 0.95),
+    segment_col: str = "family",
+    max_workers: Optional[int] = None,
+    num_boost_round: int = DEFAULT_NUM_BOOST_ROUND,
+    params_overrides: Optional[Dict[str, Any]] = None,
+    work_dir: Optional[Path] = None,
+) -> pd.DataFrame:
+    """
+    Train and score one model per (fold, quantile) in a process pool.
+
+    The encoded feature matrix is written once to `work_dir` (a temp
+    directory by default) and memory-mapped read-only by every worker.
+    LightGBM threads are split across workers so the pool does not
+    oversubscribe the machine.
+
+    Returns one row per (fold, quantile, segment) plus an "ALL" segment
+    per fold, with empirical coverage and pinball loss on unit scale.
+    """
+    max_workers = max_workers or min(
+        len(origins) * len(quantiles), os.cpu_count() or 1
+    )
+    threads_per_worker = max(1, (os.cpu_count() or 1) // max_workers)
+
+    overrides = {"num_threads": threads_per_worker}
+    overrides.update(params_overrides or {})
+
+    with tempfile.TemporaryDirectory(dir=work_dir) as tmp:
+        matrix = write_shared_matrix(df, Path(tmp), segment_col=segment_col)
+        n_segments = len(matrix.segment_labels)
+
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=_attach_shared,
+            initargs=(matrix,),
+        ) as pool:
+            futures = [
+                pool.submit(
+                    _run_fold,
+                    fold,
+                    origin,
+                    q,
+                    n_segments,
+                    num_boost_round,
+                    overrides,
+                )
+                for fold, origin in enumerate(origins)
+                for q in quantiles
+            ]
+            fold_results = [f.result() for f in futures]
+
+    rows = []
+    for res in fold_results:
+        origin = origins[res["fold"]]
+        labels = matrix.segment_labels + ["ALL"]
+        n_rows = np.append(res["n_rows"], res["n_rows"].sum())
+        covered = np.append(res["covered"], res["covered"].sum())
+        loss = np.append(res["loss"], res["loss"].sum())
+
+        for label, n, cov, ls in zip(labels, n_rows, covered, loss):
+            if n == 0:
+                continue
+            rows.append(
+                {
+                    "fold": res["fold"],
+                    "test_start": origin.test_start,
+                    "test_end": origin.test_end,
+                    "quantile": res["quantile"],
+                    "segment": label,
+                    "n_train": res["n_train"],
+                    "n_rows": int(n),
+                    "coverage": cov / n,
+                    "pinball_loss": ls / n,
+                }
+            )
+
+    return pd.DataFrame(rows)
@@ -0,0 +1,357 @@
+import resource
+import tempfile
+from dataclasses import dataclass
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import lightgbm as lgb
+import numpy as np
+import pandas as pd
+import pyarrow.dataset as ds
+
+from src.ml.trainer import (
+    DEFAULT_EARLY_STOPPING_ROUNDS,
+    DEFAULT_NUM_BOOST_ROUND,
+    build_quantile_params,
+    save_loss_curve,
+)
+
+
+# Rough per-row cost of one projected column while a record batch is
+# converted to pandas and encoded (arrow buffer + pandas copy + float32)
+_STREAM_BYTES_PER_CELL = 24
+
+# LightGBM per-row overhead besides the binned features:
+# label, weight, gradients, hessians and scores
+_LGBM_BYTES_PER_ROW = 4 + 4 + 8 + 8 + 8
+
+
+@dataclass(frozen=True)
+class DownsampleConfig:
+    """
+    Stratified downsampling of zero / low-sales rows.
+
+    Kept rows get weight 1 / keep_rate so the loss stays unbiased.
+    """
+    zero_keep_rate: float = 1.0
+    low_keep_rate: float = 1.0
+    low_sales_threshold: float = 2.0
+    seed: int = 42
+
+    def __post_init__(self):
+        for name in ("zero_keep_rate", "low_keep_rate"):
+            rate = getattr(self, name)
+            if not (0 < rate <= 1):
+                raise ValueError(f"{name} must be in (0, 1], got {rate}")
+
+
+class MemmapSequence(lgb.Sequence):
+    """
+    lightgbm.Sequence over an on-disk float32 feature matrix.
+
+    LightGBM samples rows for bin construction and then pushes the rest
+    in `batch_size` slices, so only one batch is resident at a time.
+    """
+
+    def __init__(self, path: Path, n_rows: int, n_cols: int, batch_size: int):
+        self.matrix = np.memmap(
+            path, dtype=np.float32, mode="r", shape=(n_rows, n_cols)
+        )
+        self.batch_size = batch_size
+
+    def __getitem__(self, idx):
+        # LightGBM's sampling path only accepts float64
+        return np.asarray(self.matrix[idx], dtype=np.float64)
+
+    def __len__(self) -> int:
+        return self.matrix.shape[0]
+
+
+def peak_rss_mb() -> float:
+    """
+    Peak resident set size of this process (Linux reports KiB).
+    """
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def stream_batch_rows(
+    memory_budget_mb: int,
+    n_columns: int,
+    fraction: float = 0.1,
+) -> int:
+    """
+    Rows per streamed record batch so that one batch uses at most
+    `fraction` of the memory budget.
+    """
+    budget = memory_budget_mb * 1024 ** 2 * fraction
+    return max(10_000, int(budget // (n_columns * _STREAM_BYTES_PER_CELL)))
+
+
+def estimate_dataset_mb(n_rows: int, n_features: int) -> float:
+    """
+    Approximate LightGBM training footprint (<=255 bins per feature).
+    """
+    return n_rows * (n_features + _LGBM_BYTES_PER_ROW) / 1024 ** 2
+
+
+def _iter_batches(
+    source: Path,
+    columns: List[str],
+    batch_rows: int,
+    window: Optional[Tuple[date, date]],
+) -> Iterator[pd.DataFrame]:
+    dataset = ds.dataset(str(source), format="parquet")
+
+    for batch in dataset.to_batches(columns=columns, batch_size=batch_rows):
+        df = batch.to_pandas()
+        if window is not None:
+            days = pd.to_datetime(df["date"])
+            df = df[
+                (days >= pd.Timestamp(window[0]))
+                & (days <= pd.Timestamp(window[1]))
+            ]
+        if not df.empty:
+            yield df
+
+
+def collect_category_schemas(
+    source: Path,
+    categorical_features: List[str],
+    batch_rows: int,
+    window: Optional[Tuple[date, date]] = None,
+) -> Dict[str, List]:
+    """
+    Streamed equivalent of extract_category_schemas: sorted categories
+    per column, collected without loading the full table.
+    """
+    seen: Dict[str, set] = {col: set() for col in categorical_features}
+    columns = categorical_features + (["date"] if window else [])
+
+    for df in _iter_batches(source, columns, batch_rows, window):
+        for col in categorical_features:
+            seen[col].update(df[col].dropna().unique().tolist())
+
+    return {col: sorted(values) for col, values in seen.items()}
+
+
+def encode_features(
+    df: pd.DataFrame,
+    features: List[str],
+    category_schemas: Dict[str, List],
+) -> np.ndarray:
+    """
+    Encode features as a float32 matrix; categoricals become their code
+    in `category_schemas` (unseen categories become NaN).
+    """
+    X = np.empty((len(df), len(features)), dtype=np.float32)
+    for j, col in enumerate(features):
+        if col in category_schemas:
+            codes = pd.Categorical(
+                df[col], categories=category_schemas[col]
+            ).codes.astype(np.float32)
+            codes[codes < 0] = np.nan
+            X[:, j] = codes
+        else:
+            X[:, j] = df[col].to_numpy(dtype=np.float32, na_value=np.nan)
+    return X
+
+
+def _downsample(
+    y: np.ndarray,
+    config: DownsampleConfig,
+    rng: np.random.Generator,
+) -> Tuple[np.ndarray, np.ndarray]:
+    keep_rate = np.ones(len(y))
+    keep_rate[y <= 0] = config.zero_keep_rate
+    keep_rate[(y > 0) & (y <= config.low_sales_threshold)] = config.low_keep_rate
+
+    keep = rng.random(len(y)) < keep_rate
+    return keep, 1.0 / keep_rate[keep]
+
+
+def spool_to_disk(
+    source: Path,
+    features: List[str],
+    target_col: str,
+    category_schemas: Dict[str, List],
+    spool_path: Path,
+    batch_rows: int,
+    window: Optional[Tuple[date, date]] = None,
+    downsample: Optional[DownsampleConfig] = None,
+) -> Tuple[int, np.ndarray, np.ndarray]:
+    """
+    Stream `source` in record batches and append encoded feature rows
+    to a raw float32 file. Returns (n_rows, y_log, weight).
+    """
+    columns = sorted(set(features + [target_col, "date"]))
+    rng = np.random.default_rng(downsample.seed if downsample else 0)
+
+    labels, weights = [], []
+    n_rows = 0
+
+    with open(spool_path, "wb") as f:
+        for df in _iter_batches(source, columns, batch_rows, window):
+            y = df[target_col].to_numpy(dtype=np.float64)
+            w = np.ones(len(df))
+
+            if downsample is not None:
+                keep, w = _downsample(y, downsample, rng)
+                df, y = df[keep], y[keep]
+
+            encode_features(df, features, category_schemas).tofile(f)
+            labels.append(np.log1p(np.clip(y, 0, None)).astype(np.float32))
+            weights.append(w.astype(np.float32))
+            n_rows += len(df)
+
+    if n_rows == 0:
+        raise RuntimeError(f"No rows read from {source} for window {window}")
+
+    return n_rows, np.concatenate(labels), np.concatenate(weights)
+
+
+def train_lgbm_quantile_chunked(
+    source: Path,
+    features: List[str],
+    target_col: str,
+    quantile: float,
+    model_path: Path,
+    categorical_features: List[str],
+    category_schemas: Dict[str, List],
+    memory_budget_mb: int,
+    train_window: Optional[Tuple[date, date]] = None,
+    valid_window: Optional[Tuple[date, date]] = None,
+    downsample: Optional[DownsampleConfig] = None,
+    num_boost_round: int = DEFAULT_NUM_BOOST_ROUND,
+    early_stopping_rounds: Optional[int] = DEFAULT_EARLY_STOPPING_ROUNDS,
+    curve_path: Optional[Path] = None,
+    spool_dir: Optional[Path] = None,
+) -> Dict[str, Any]:
+    """
+    Train and save a LightGBM quantile model without materializing the
+    training frame.
+
+    `source` (a parquet file or directory) is streamed in record batches
+    sized from `memory_budget_mb`, encoded with `category_schemas` and
+    spooled to an on-disk float32 matrix; the LightGBM Dataset is then
+    built from that matrix through lightgbm.Sequence. Raises before
+    training if the estimated Dataset footprint exceeds the budget.
+
+    Returns a summary dict suitable for metadata.json.
+    """
+    batch_rows = stream_batch_rows(
+        memory_budget_mb, len(features) + 2
+    )
+    categorical_idx = [features.index(c) for c in categorical_features]
+
+    with tempfile.TemporaryDirectory(dir=spool_dir) as tmp:
+        train_path = Path(tmp) / "train.f32"
+        n_train, y_train, w_train = spool_to_disk(
+            source,
+            features,
+            target_col,
+            category_schemas,
+            train_path,
+            batch_rows,
+            window=train_window,
+            downsample=downsample,
+        )
+
+        n_valid = 0
+        if valid_window is not None:
+            valid_path = Path(tmp) / "valid.f32"
+            n_valid, y_valid, _ = spool_to_disk(
+                source,
+                features,
+                target_col,
+                category_schemas,
+                valid_path,
+                batch_rows,
+                window=valid_window,
+            )
+
+        estimated_mb = estimate_dataset_mb(n_train + n_valid, len(features))
+        if estimated_mb > memory_budget_mb:
+            raise RuntimeError(
+                f"Estimated LightGBM footprint {estimated_mb:,.0f} MB exceeds "
+                f"memory budget {memory_budget_mb:,} MB for {n_train:,} rows; "
+                "lower the zero/low-sales keep rates or raise the budget."
+            )
+
+        dataset = lgb.Dataset(
+            MemmapSequence(train_path, n_train, len(features), batch_rows),
+            label=y_train,
+            weight=w_train,
+            feature_name=features,
+            categorical_feature=categorical_idx,
+        )
+
+        valid_sets = [dataset]
+        valid_names = ["train"]
+
+        if n_valid:
+            # Validation reads the file-backed matrix directly: LightGBM
+            # reports NaN loss for a Sequence valid set when the train
+            # set carries weights
+            X_valid = np.memmap(
+                valid_path,
+                dtype=np.float32,
+                mode="r",
+                shape=(n_valid, len(features)),
+            )
+            valid_sets.append(dataset.create_valid(X_valid, label=y_valid))
+            valid_names.append("valid")
+
+        evals_result: Dict[str, Dict[str, List[float]]] = {}
+        callbacks = [lgb.record_evaluation(evals_result)]
+
+        if n_valid and early_stopping_rounds:
+            callbacks.append(
+                lgb.early_stopping(early_stopping_rounds, verbose=False)
+            )
+
+        model = lgb.train(
+            params=build_quantile_params(quantile),
+            train_set=dataset,
+            num_boost_round=num_boost_round,
+            valid_sets=valid_sets,
+            valid_names=valid_names,
+            callbacks=callbacks,
+        )
+
+    rounds_trained = len(evals_result["train"]["quantile"])
+    best_iteration = model.best_iteration or rounds_trained
+
+    # Record category lists so pandas inputs map to the same codes
+    model.pandas_categorical = [
+        category_schemas[c] for c in categorical_features
+    ]
+    model.save_model(str(model_path), num_iteration=best_iteration)
+
+    if curve_path is not None:
+        save_loss_curve(evals_result, curve_path)
+
+    summary: Dict[str, Any] = {
+        "num_boost_round": num_boost_round,
+        "rounds_trained": rounds_trained,
+        "best_iteration": best_iteration,
+        "train_rows": n_train,
+        "valid_rows": n_valid,
+        "memory_budget_mb": memory_budget_mb,
+        "estimated_dataset_mb": round(estimated_mb, 1),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+
+    if downsample is not None:
+        summary["downsample"] = {
+            "zero_keep_rate": downsample.zero_keep_rate,
+            "low_keep_rate": downsample.low_keep_rate,
+            "low_sales_threshold": downsample.low_sales_threshold,
+        }
+
+    if "valid" in evals_result:
+        summary["best_valid_loss"] = float(
+            evals_result["valid"]["quantile"][best_iteration - 1]
+        )
+
+    return summary
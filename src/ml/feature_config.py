@@ -43,3 +43,6 @@ NUMERIC_FEATURES = [
 ]
 
 FEATURES = CATEGORICAL_FEATURES + NUMERIC_FEATURES
+
+# Columns the API reads from a featured snapshot (no target / extras)
+SERVING_COLUMNS = ID_COLS + FEATURES
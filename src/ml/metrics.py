@@ -0,0 +1,23 @@
+import numpy as np
+
+
+def pinball_losses(y_true, y_pred, alpha: float) -> np.ndarray:
+    """
+    Per-observation pinball loss (e.g. to aggregate by segment).
+    """
+    diff = np.asarray(y_true) - np.asarray(y_pred)
+    return np.maximum(alpha * diff, (alpha - 1) * diff)
+
+
+def pinball_loss(y_true, y_pred, alpha: float) -> float:
+    """
+    Vectorized pinball loss for quantile regression.
+    """
+    return float(np.mean(pinball_losses(y_true, y_pred, alpha)))
+
+
+def coverage(y_true, y_pred) -> float:
+    """
+    Fraction of observations at or below the predicted quantile.
+    """
+    return float(np.mean(np.asarray(y_true) <= np.asarray(y_pred)))
@@ -1,7 +1,8 @@
 import json
+import threading
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, Iterable, List, Optional, Union
+from typing import Dict, Iterable, List, Optional, Tuple, Union
 
 import numpy as np
 import pandas as pd
@@ -25,15 +26,19 @@ class QuantilePredictor:
     Provides a single interface to predict with a requested service level (alpha).
     """
 
-    def __init__(self, registry: ModelRegistry):
+    def __init__(self, registry: ModelRegistry, num_threads: Optional[int] = None):
         self.registry = registry
 
+        # LightGBM prediction threads (None: LightGBM default, all cores)
+        self._predict_params = {} if num_threads is None else {"num_threads": num_threads}
+
         # Load category schemas once
         with open(self.registry.category_schema_path, "r") as f:
             self.category_schemas: Dict[str, List[str]] = json.load(f)
 
-        # Cache of loaded models
+        # Cache of loaded models (filled lazily or by warm_up)
         self._models: Dict[float, lgb.Booster] = {}
+        self._load_lock = threading.Lock()
 
     def _get_model(self, alpha: float) -> lgb.Booster:
         if alpha not in self.registry.models_by_alpha:
@@ -43,11 +48,25 @@ class QuantilePredictor:
             )
 
         if alpha not in self._models:
-            model_path = self.registry.models_by_alpha[alpha]
-            self._models[alpha] = lgb.Booster(model_file=str(model_path))
+            with self._load_lock:
+                if alpha not in self._models:
+                    model_path = self.registry.models_by_alpha[alpha]
+                    self._models[alpha] = lgb.Booster(model_file=str(model_path))
 
         return self._models[alpha]
 
+    def warm_up(self, df_sample: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Load every registered booster and predict `df_sample` once per
+        service level, so the first real request pays no one-time
+        initialization (file parsing, categorical setup, thread pools).
+        Returns the sample's (levels, predictions) as predict_quantiles.
+        """
+        for alpha in self.registry.models_by_alpha:
+            self._get_model(alpha)
+
+        return self.predict_quantiles(df_sample)
+
     def _apply_category_schemas(self, df: pd.DataFrame) -> pd.DataFrame:
         """
         Enforce training-time categorical schemas.
@@ -74,7 +93,7 @@ class QuantilePredictor:
         X = df[FEATURES]
         model = self._get_model(service_level)
 
-        y_hat_log = model.predict(X)
+        y_hat_log = model.predict(X, **self._predict_params)
         y_hat = np.expm1(y_hat_log)
 
         if clip_negative:
@@ -82,6 +101,35 @@ class QuantilePredictor:
 
         return y_hat
 
+    def predict_quantiles(
+        self,
+        df_features: pd.DataFrame,
+        service_levels: Optional[Iterable[float]] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Predict several quantiles at once (default: every registered
+        service level). Returns (levels, predictions) with predictions
+        shaped (n_rows, n_levels), levels unique and ascending, and rows
+        made non-decreasing across levels (no quantile crossing).
+        """
+        levels = np.array(
+            sorted(set(service_levels or self.registry.models_by_alpha)),
+            dtype=np.float64,
+        )
+
+        df = self._apply_category_schemas(df_features.copy())
+        X = df[FEATURES]
+
+        preds = np.column_stack(
+            [
+                np.expm1(self._get_model(float(a)).predict(X, **self._predict_params))
+                for a in levels
+            ]
+        )
+        preds = np.maximum.accumulate(np.clip(preds, 0, None), axis=1)
+
+        return levels, preds
+
     def predict_rows(
         self,
         rows: Union[List[dict], pd.DataFrame],
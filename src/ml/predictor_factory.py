@@ -1,41 +1,86 @@
+import re
+import threading
+from collections import OrderedDict
 from pathlib import Path
-from typing import Optional
+from typing import Dict, List, Optional
 
 from src.config import MODELS_DIR
 from src.ml.predictor import ModelRegistry, QuantilePredictor
 
 
-def build_predictor(
-    version: Optional[str] = None,
-) -> QuantilePredictor:
-    """
-    Build a QuantilePredictor for a specific model version.
+# Artifacts every model version directory must contain
+REQUIRED_ARTIFACTS = (
+    "favorita_lgbm_p90.txt",
+    "favorita_lgbm_p95.txt",
+    "category_schemas.json",
+)
 
-    Args:
-        version:
-            - None: use MODELS_DIR / "latest"
-            - str:  use MODELS_DIR / <version>
+
+def model_versions() -> List[str]:
+    """
+    Names of the complete model versions under MODELS_DIR (including
+    "latest"), i.e. the only values a `version` may take.
     """
+    if not MODELS_DIR.is_dir():
+        return []
+    return sorted(
+        path.name
+        for path in MODELS_DIR.iterdir()
+        if path.is_dir()
+        and all((path / name).is_file() for name in REQUIRED_ARTIFACTS)
+    )
 
+
+def model_registry(version: Optional[str] = None) -> ModelRegistry:
+    """
+    Artifact paths of a model version (None: "latest"); nothing is
+    loaded. Raises FileNotFoundError unless `version` is one of
+    model_versions().
+    """
     if version is None:
-        model_dir = MODELS_DIR / "latest"
-    else:
-        model_dir = MODELS_DIR / version
+        version = "latest"
 
-    if not model_dir.exists():
+    # Only a version directory by name: no paths, aliases or partial dirs
+    if version not in model_versions():
         raise FileNotFoundError(
-            f"Model directory not found: {model_dir}"
+            f"Model version not found: {version!r} (under {MODELS_DIR})"
         )
+    model_dir = MODELS_DIR / version
 
-    registry = ModelRegistry(
-        models_by_alpha={
-            0.90: model_dir / "favorita_lgbm_p90.txt",
-            0.95: model_dir / "favorita_lgbm_p95.txt",
-        },
+    models_by_alpha: Dict[float, Path] = {
+        0.90: model_dir / "favorita_lgbm_p90.txt",
+        0.95: model_dir / "favorita_lgbm_p95.txt",
+    }
+
+    # Any extra quantiles trained into the version (e.g. p50, p75)
+    for path in model_dir.glob("favorita_lgbm_p*.txt"):
+        match = re.fullmatch(r"favorita_lgbm_p(\d+)\.txt", path.name)
+        if match:
+            models_by_alpha.setdefault(int(match.group(1)) / 100, path)
+
+    return ModelRegistry(
+        models_by_alpha=dict(sorted(models_by_alpha.items())),
         category_schema_path=model_dir / "category_schemas.json",
     )
 
-    return QuantilePredictor(registry=registry)
+
+def build_predictor(
+    version: Optional[str] = None,
+    num_threads: Optional[int] = None,
+) -> QuantilePredictor:
+    """
+    Build a QuantilePredictor for a specific model version.
+
+    Args:
+        version:
+            - None: use MODELS_DIR / "latest"
+            - str:  use MODELS_DIR / <version>
+        num_threads:
+            LightGBM prediction threads (None: LightGBM default)
+
+    Raises FileNotFoundError unless `version` is one of model_versions().
+    """
+    return QuantilePredictor(registry=model_registry(version), num_threads=num_threads)
 
 
 def build_default_predictor() -> QuantilePredictor:
@@ -44,3 +89,75 @@ def build_default_predictor() -> QuantilePredictor:
     Uses MODELS_DIR / 'latest'.
     """
     return build_predictor(version=None)
+
+
+class PredictorCache:
+    """
+    Bounded LRU of predictors by model version, so several versions
+    can be served side by side without loading every one on disk.
+    The least recently used version is dropped beyond `max_versions`.
+    """
+
+    def __init__(self, max_versions: int, num_threads: Optional[int] = None):
+        self.max_versions = max_versions
+        self.num_threads = num_threads
+
+        self._lock = threading.Lock()
+        self._predictors: "OrderedDict[str, QuantilePredictor]" = OrderedDict()
+        self._build_locks: Dict[str, threading.Lock] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, version: str) -> QuantilePredictor:
+        """
+        Predictor for `version` ("latest" or a directory under
+        MODELS_DIR), built on first use. Raises FileNotFoundError for
+        an unknown version.
+        """
+        with self._lock:
+            predictor = self._hit(version)
+            if predictor is not None:
+                return predictor
+
+        if version not in model_versions():
+            raise FileNotFoundError(f"Model version not found: {version!r}")
+
+        with self._lock:
+            build_lock = self._build_locks.setdefault(version, threading.Lock())
+
+        # One build per version at a time; hits on other versions go on
+        with build_lock:
+            with self._lock:
+                predictor = self._hit(version)
+                if predictor is not None:
+                    return predictor
+
+            predictor = build_predictor(version=version, num_threads=self.num_threads)
+
+            with self._lock:
+                self.misses += 1
+                self._predictors[version] = predictor
+
+                while len(self._predictors) > self.max_versions:
+                    self._predictors.popitem(last=False)
+                    self.evictions += 1
+
+            return predictor
+
+    def _hit(self, version: str) -> Optional[QuantilePredictor]:
+        predictor = self._predictors.get(version)
+        if predictor is not None:
+            self._predictors.move_to_end(version)
+            self.hits += 1
+        return predictor
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "loaded": list(self._predictors),
+                "max_versions": self.max_versions,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
@@ -2,21 +2,53 @@ import lightgbm as lgb
 import pandas as pd
 import numpy as np
 from pathlib import Path
-from typing import List
+from typing import Any, Dict, List, Optional, Union
 
 
-def train_lgbm_quantile(
+DEFAULT_PARAMS = {
+    "objective": "quantile",
+    "metric": "quantile",
+    "learning_rate": 0.05,
+    "num_leaves": 64,
+    "min_data_in_leaf": 100,
+    "feature_fraction": 0.8,
+    "bagging_fraction": 0.8,
+    "bagging_freq": 1,
+    "verbosity": -1,
+}
+
+DEFAULT_NUM_BOOST_ROUND = 300
+DEFAULT_EARLY_STOPPING_ROUNDS = 30
+
+
+def build_quantile_params(
+    quantile: float,
+    overrides: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    LightGBM params for a quantile objective at `quantile`.
+    """
+    params = dict(DEFAULT_PARAMS)
+    params["alpha"] = quantile
+    if overrides:
+        params.update(overrides)
+    return params
+
+
+def prepare_features(
     df: pd.DataFrame,
     features: List[str],
     target_col: str,
-    quantile: float,
-    model_path: Path,
     categorical_features: List[str],
-) -> None:
-    """
-    Train and save a LightGBM quantile model.
+    category_schemas: Optional[Dict[str, List]] = None,
+):
     """
+    Build (X, y_log) with categoricals cast and target log1p-transformed.
 
+    If `category_schemas` is given, categoricals are pinned to those
+    categories (required when continuing an existing model, whose
+    category codes must not shift). Unseen categories become NaN.
+    """
     X = df[features].copy()
     y = df[target_col]
 
@@ -25,7 +57,69 @@ def train_lgbm_quantile(
 
     # Cast categoricals
     for col in categorical_features:
-        X[col] = X[col].astype("category")
+        if category_schemas is not None and col in category_schemas:
+            X[col] = pd.Categorical(X[col], categories=category_schemas[col])
+        else:
+            X[col] = X[col].astype("category")
+
+    return X, y_log
+
+
+def save_loss_curve(
+    evals_result: Dict[str, Dict[str, List[float]]],
+    path: Path,
+    first_round: int = 1,
+) -> None:
+    """
+    Persist a rounds-versus-pinball-loss table (one column per eval set).
+    """
+    curve = pd.DataFrame(
+        {name: metrics["quantile"] for name, metrics in evals_result.items()}
+    )
+    curve.insert(
+        0, "round", np.arange(first_round, first_round + len(curve))
+    )
+    curve.to_csv(path, index=False)
+
+
+def train_lgbm_quantile(
+    df: pd.DataFrame,
+    features: List[str],
+    target_col: str,
+    quantile: float,
+    model_path: Path,
+    categorical_features: List[str],
+    valid_df: Optional[pd.DataFrame] = None,
+    num_boost_round: int = DEFAULT_NUM_BOOST_ROUND,
+    early_stopping_rounds: Optional[int] = DEFAULT_EARLY_STOPPING_ROUNDS,
+    curve_path: Optional[Path] = None,
+    init_model: Optional[Union[Path, lgb.Booster]] = None,
+    category_schemas: Optional[Dict[str, List]] = None,
+) -> Dict[str, Any]:
+    """
+    Train and save a LightGBM quantile model.
+
+    When `valid_df` is given, training stops once validation pinball loss
+    (log1p scale) has not improved for `early_stopping_rounds`, and the
+    saved model is truncated at the best iteration.
+
+    When `init_model` is given, boosting continues from that model on
+    `df` (warm start) instead of starting from scratch; pass the parent
+    version's `category_schemas` so category codes stay aligned.
+
+    Returns a summary dict suitable for metadata.json.
+    """
+
+    if isinstance(init_model, Path):
+        init_model = lgb.Booster(model_file=str(init_model))
+
+    init_iterations = (
+        init_model.current_iteration() if init_model is not None else 0
+    )
+
+    X, y_log = prepare_features(
+        df, features, target_col, categorical_features, category_schemas
+    )
 
     dataset = lgb.Dataset(
         X,
@@ -34,23 +128,67 @@ def train_lgbm_quantile(
         free_raw_data=False,
     )
 
-    params = {
-        "objective": "quantile",
-        "alpha": quantile,
-        "metric": "quantile",
-        "learning_rate": 0.05,
-        "num_leaves": 64,
-        "min_data_in_leaf": 100,
-        "feature_fraction": 0.8,
-        "bagging_fraction": 0.8,
-        "bagging_freq": 1,
-        "verbosity": -1,
-    }
+    params = build_quantile_params(quantile)
+
+    valid_sets = [dataset]
+    valid_names = ["train"]
+
+    if valid_df is not None:
+        X_valid, y_valid_log = prepare_features(
+            valid_df,
+            features,
+            target_col,
+            categorical_features,
+            category_schemas,
+        )
+        valid_sets.append(dataset.create_valid(X_valid, label=y_valid_log))
+        valid_names.append("valid")
+
+    evals_result: Dict[str, Dict[str, List[float]]] = {}
+    callbacks = [lgb.record_evaluation(evals_result)]
+
+    if valid_df is not None and early_stopping_rounds:
+        callbacks.append(
+            lgb.early_stopping(early_stopping_rounds, verbose=False)
+        )
 
     model = lgb.train(
         params=params,
         train_set=dataset,
-        num_boost_round=300,
+        num_boost_round=num_boost_round,
+        valid_sets=valid_sets,
+        valid_names=valid_names,
+        callbacks=callbacks,
+        init_model=init_model,
+    )
+
+    rounds_trained = len(evals_result["train"]["quantile"])
+
+    # Iterations are counted including the init model's trees;
+    # best_iteration is 0 when early stopping did not run
+    best_iteration = (
+        model.best_iteration or init_iterations + rounds_trained
     )
 
-    model.save_model(str(model_path))
+    model.save_model(str(model_path), num_iteration=best_iteration)
+
+    if curve_path is not None:
+        save_loss_curve(
+            evals_result, curve_path, first_round=init_iterations + 1
+        )
+
+    summary: Dict[str, Any] = {
+        "init_iterations": init_iterations,
+        "num_boost_round": num_boost_round,
+        "rounds_trained": rounds_trained,
+        "best_iteration": best_iteration,
+    }
+
+    if "valid" in evals_result:
+        summary["best_valid_loss"] = float(
+            evals_result["valid"]["quantile"][
+                best_iteration - init_iterations - 1
+            ]
+        )
+
+    return summary
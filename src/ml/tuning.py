@@ -0,0 +1,263 @@
+import itertools
+import math
+import multiprocessing as mp
+import os
+import random
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import lightgbm as lgb
+import numpy as np
+import pandas as pd
+
+from src.features.categorical import extract_category_schemas
+from src.ml.chunked_trainer import encode_features
+from src.ml.feature_config import CATEGORICAL_FEATURES, FEATURES, TARGET_COL
+from src.ml.metrics import coverage, pinball_loss
+from src.ml.trainer import build_quantile_params
+
+
+DEFAULT_SEARCH_SPACE = {
+    "num_leaves": [15, 31, 64, 127],
+    "min_data_in_leaf": [20, 50, 100, 200],
+    "learning_rate": [0.03, 0.05, 0.1],
+    "feature_fraction": [0.6, 0.8, 1.0],
+}
+
+# Fixed once the shared binned Dataset is built; cannot be tuned per trial
+DATASET_PARAMS = {"max_bin", "min_data_in_bin", "bin_construct_sample_cnt"}
+
+
+@dataclass(frozen=True)
+class HalvingSchedule:
+    """
+    Successive-halving budgets: rung k trains for min_rounds * eta**k
+    boosting rounds (capped at max_rounds) and keeps the best 1/eta.
+    """
+    min_rounds: int = 50
+    max_rounds: int = 800
+    eta: int = 3
+
+    def rungs(self) -> List[int]:
+        rounds = []
+        r = self.min_rounds
+        while r < self.max_rounds:
+            rounds.append(r)
+            r *= self.eta
+        rounds.append(self.max_rounds)
+        return rounds
+
+
+def sample_configs(
+    search_space: Dict[str, List[Any]],
+    n_trials: int,
+    seed: int = 42,
+) -> List[Dict[str, Any]]:
+    """
+    Random subset of the search-space grid (the full grid if smaller).
+    """
+    bad = DATASET_PARAMS & set(search_space)
+    if bad:
+        raise ValueError(f"Dataset-level params cannot be searched: {sorted(bad)}")
+
+    keys = sorted(search_space)
+    grid = [
+        dict(zip(keys, values))
+        for values in itertools.product(*(search_space[k] for k in keys))
+    ]
+
+    if len(grid) <= n_trials:
+        return grid
+
+    return random.Random(seed).sample(grid, n_trials)
+
+
+def pareto_front(df: pd.DataFrame, objectives: Sequence[str]) -> np.ndarray:
+    """
+    Boolean mask of rows not dominated on `objectives` (all minimized).
+    """
+    values = df[list(objectives)].to_numpy(dtype=float)
+    mask = np.ones(len(values), dtype=bool)
+
+    for i, v in enumerate(values):
+        dominated = (
+            np.all(values <= v, axis=1) & np.any(values < v, axis=1)
+        )
+        mask[i] = not dominated.any()
+
+    return mask
+
+
+# =====================================================
+# Worker side
+# =====================================================
+
+# Per-process handles, opened once by the pool initializer
+_SHARED: Dict[str, Any] = {}
+
+
+def _attach_shared(directory: Path) -> None:
+    _SHARED["train"] = lgb.Dataset(
+        str(directory / "train.bin"),
+        params={"feature_pre_filter": False, "verbosity": -1},
+    ).construct()
+    _SHARED["X_valid"] = np.load(directory / "X_valid.npy", mmap_mode="r")
+    _SHARED["y_valid"] = np.load(directory / "y_valid.npy", mmap_mode="r")
+
+
+def _predict_ms(model: lgb.Booster, X: np.ndarray, repeats: int = 5) -> float:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        model.predict(X)
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings) * 1000)
+
+
+def _run_trial(
+    trial_id: int,
+    config: Dict[str, Any],
+    quantile: float,
+    rounds: int,
+    num_threads: int,
+    latency_rows: int,
+) -> Dict[str, Any]:
+    params = build_quantile_params(
+        quantile,
+        {**config, "num_threads": num_threads, "feature_pre_filter": False},
+    )
+
+    start = time.perf_counter()
+    model = lgb.train(
+        params=params,
+        train_set=_SHARED["train"],
+        num_boost_round=rounds,
+    )
+    train_seconds = time.perf_counter() - start
+
+    X_valid = np.asarray(_SHARED["X_valid"])
+    y_valid = np.asarray(_SHARED["y_valid"], dtype=np.float64)
+
+    y_hat = np.clip(np.expm1(model.predict(X_valid)), 0, None)
+
+    return {
+        "trial_id": trial_id,
+        "rounds": rounds,
+        "valid_pinball_loss": pinball_loss(y_valid, y_hat, quantile),
+        "valid_coverage": coverage(y_valid, y_hat),
+        "num_trees": model.num_trees(),
+        "model_bytes": len(model.model_to_string().encode()),
+        "predict_ms": _predict_ms(model, X_valid[:latency_rows]),
+        "train_seconds": round(train_seconds, 2),
+    }
+
+
+# =====================================================
+# Driver
+# =====================================================
+
+def run_search(
+    train_df: pd.DataFrame,
+    valid_df: pd.DataFrame,
+    quantile: float,
+    search_space: Optional[Dict[str, List[Any]]] = None,
+    n_trials: int = 27,
+    schedule: HalvingSchedule = HalvingSchedule(),
+    max_workers: Optional[int] = None,
+    latency_rows: int = 1000,
+    seed: int = 42,
+    work_dir: Optional[Path] = None,
+) -> pd.DataFrame:
+    """
+    Successive-halving search over LightGBM quantile params.
+
+    The training Dataset is binned once and saved as a LightGBM binary
+    file that every worker loads (no re-binning per trial); validation
+    features are memory-mapped. Each rung retrains surviving trials
+    with the larger round budget and keeps the best 1/eta by validation
+    pinball loss (unit scale).
+
+    Returns one row per (trial, rung) with loss, coverage, model size
+    and predict latency for `latency_rows` rows; `pareto` marks each
+    trial's last rung when it is non-dominated on
+    (loss, predict_ms, model_bytes).
+    """
+    configs = sample_configs(
+        search_space or DEFAULT_SEARCH_SPACE, n_trials, seed=seed
+    )
+
+    max_workers = max_workers or min(len(configs), os.cpu_count() or 1)
+    num_threads = max(1, (os.cpu_count() or 1) // max_workers)
+
+    schemas = extract_category_schemas(train_df, CATEGORICAL_FEATURES)
+    categorical_idx = [FEATURES.index(c) for c in CATEGORICAL_FEATURES]
+
+    with tempfile.TemporaryDirectory(dir=work_dir) as tmp:
+        directory = Path(tmp)
+
+        lgb.Dataset(
+            encode_features(train_df, FEATURES, schemas),
+            label=np.log1p(train_df[TARGET_COL].clip(lower=0).to_numpy()),
+            feature_name=FEATURES,
+            categorical_feature=categorical_idx,
+            params={"feature_pre_filter": False, "verbosity": -1},
+        ).save_binary(str(directory / "train.bin"))
+
+        np.save(
+            directory / "X_valid.npy",
+            encode_features(valid_df, FEATURES, schemas),
+        )
+        np.save(
+            directory / "y_valid.npy",
+            valid_df[TARGET_COL].to_numpy(dtype=np.float32),
+        )
+
+        alive = list(range(len(configs)))
+        records = []
+
+        # spawn, not fork: building the binary above initialized OpenMP in
+        # this process, and a forked worker training with several threads
+        # can hang in libgomp
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=mp.get_context("spawn"),
+            initializer=_attach_shared,
+            initargs=(directory,),
+        ) as pool:
+            for rung, rounds in enumerate(schedule.rungs()):
+                futures = [
+                    pool.submit(
+                        _run_trial,
+                        trial_id,
+                        configs[trial_id],
+                        quantile,
+                        rounds,
+                        num_threads,
+                        latency_rows,
+                    )
+                    for trial_id in alive
+                ]
+                results = [f.result() for f in futures]
+
+                for res in results:
+                    records.append(
+                        {"rung": rung, **configs[res["trial_id"]], **res}
+                    )
+
+                ranked = sorted(results, key=lambda r: r["valid_pinball_loss"])
+                keep = max(1, math.ceil(len(ranked) / schedule.eta))
+                alive = [r["trial_id"] for r in ranked[:keep]]
+
+    trials = pd.DataFrame(records)
+
+    last = trials.groupby("trial_id")["rung"].transform("max") == trials["rung"]
+    trials["pareto"] = False
+    trials.loc[last, "pareto"] = pareto_front(
+        trials[last], ["valid_pinball_loss", "predict_ms", "model_bytes"]
+    )
+
+    return trials.sort_values(["rung", "valid_pinball_loss"]).reset_index(drop=True)
@@ -0,0 +1,269 @@
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+from src.ml.feature_config import FEATURES
+from src.ml.predictor_factory import build_predictor
+from src.optimization.optimizer import optimize_proportional_allocation_grouped
+from src.optimization.replay import ReplayPolicy
+
+
+SCORING_COLUMNS = sorted(set(FEATURES) | {"store_nbr", "item_nbr", "date"})
+
+MANIFEST_NAME = "_manifest.json"
+DONE_DIR_NAME = "_done"
+
+
+@dataclass(frozen=True)
+class ScoringJob:
+    """
+    Everything a worker needs to score a chunk of stores. The policy
+    is applied per store-day exactly as in the replay (orders from the
+    policy level's raw forecast; forecast_pNN columns are rearranged).
+    """
+    source: Path
+    out_dir: Path
+    policy: ReplayPolicy
+    model_version: Optional[str] = None
+    start_date: Optional[str] = None
+    end_date: Optional[str] = None
+
+    def manifest(self) -> dict:
+        return {
+            "source": str(self.source),
+            "model_version": self.model_version or "latest",
+            "start_date": self.start_date,
+            "end_date": self.end_date,
+            "policy": asdict(self.policy),
+        }
+
+
+@dataclass(frozen=True)
+class ChunkResult:
+    stores: List[int]
+    n_rows: int
+    seconds: float
+
+
+# =====================================================
+# Chunk scoring (runs in worker processes)
+# =====================================================
+
+# One predictor per worker process, built by the pool initializer
+_PREDICTOR = {}
+
+
+def _init_worker(model_version: Optional[str]) -> None:
+    _PREDICTOR["model"] = build_predictor(version=model_version)
+
+
+def _read_store_chunk(job: ScoringJob, stores: Sequence[int]) -> pd.DataFrame:
+    filters = [("store_nbr", "in", list(stores))]
+    if job.start_date is not None:
+        filters.append(("date", ">=", pd.Timestamp(job.start_date)))
+    if job.end_date is not None:
+        filters.append(("date", "<=", pd.Timestamp(job.end_date)))
+
+    df = pd.read_parquet(job.source, columns=SCORING_COLUMNS, filters=filters)
+    df["date"] = pd.to_datetime(df["date"])
+
+    # One row per (store, date, item); each store-day contiguous
+    return (
+        df
+        .sort_values(["store_nbr", "date", "item_nbr"], kind="stable")
+        .drop_duplicates(subset=["store_nbr", "date", "item_nbr"], keep="last")
+        .reset_index(drop=True)
+    )
+
+
+def score_frame(
+    df: pd.DataFrame,
+    predictor,
+    policy: ReplayPolicy,
+) -> pd.DataFrame:
+    """
+    Predict every registered quantile for `df` (sorted by store, date)
+    and allocate each store-day under `policy`. Returns one row per
+    input row with a forecast_pNN column per quantile and order_qty.
+
+    Orders come from the policy level's own forecast (predict_df), as
+    in the replay and /forecast-to-orders. The forecast_pNN columns are
+    rearranged to be non-decreasing across levels (predict_quantiles),
+    so where the models cross they differ from that forecast.
+    """
+    # Raises ValueError for a level without a model
+    forecast = predictor.predict_df(df, service_level=policy.service_level)
+    levels, preds = predictor.predict_quantiles(df)
+
+    decision = df.groupby(["store_nbr", "date"], sort=False).ngroup().to_numpy()
+
+    if policy.capacity_units is not None:
+        capacity = float(policy.capacity_units)
+    else:
+        totals = np.bincount(decision, forecast)
+        capacity = np.floor(policy.capacity_ratio * totals)
+
+    orders = optimize_proportional_allocation_grouped(
+        decision,
+        forecast,
+        capacity=capacity,
+        service_floor_ratio=policy.service_floor_ratio,
+        perishable=df["perishable"].to_numpy(),
+        perishable_weight=policy.perishable_weight,
+    )
+
+    out = df[["store_nbr", "date", "item_nbr", "family", "perishable", "onpromotion"]].copy()
+    for j, level in enumerate(levels):
+        out[f"forecast_p{int(round(level * 100))}"] = preds[:, j]
+    out["order_qty"] = orders.astype(np.int64)
+
+    return out
+
+
+def _write_partitions(scored: pd.DataFrame, out_dir: Path) -> None:
+    """
+    Write date=YYYY-MM-DD/store_nbr=N/part-0.parquet files (partition
+    columns are carried by the path). Each file is written to a temp
+    name and renamed, so a rerun simply overwrites.
+    """
+    for (date, store), part in scored.groupby(["date", "store_nbr"], sort=False):
+        part_dir = out_dir / f"date={date:%Y-%m-%d}" / f"store_nbr={store}"
+        part_dir.mkdir(parents=True, exist_ok=True)
+
+        path = part_dir / "part-0.parquet"
+        tmp = part_dir / "_part-0.parquet.tmp"  # "_" hides it from readers
+        part.drop(columns=["date", "store_nbr"]).to_parquet(tmp, index=False)
+        os.replace(tmp, path)
+
+
+def score_store_chunk(job: ScoringJob, stores: Sequence[int]) -> ChunkResult:
+    """
+    Read, score and write one chunk of stores, then mark each store
+    done. Runs in a worker (predictor from the initializer).
+    """
+    start = time.perf_counter()
+
+    df = _read_store_chunk(job, stores)
+    n_rows = len(df)
+
+    if n_rows:
+        scored = score_frame(df, _PREDICTOR["model"], job.policy)
+        _write_partitions(scored, job.out_dir)
+
+    done_dir = job.out_dir / DONE_DIR_NAME
+    for store in stores:
+        (done_dir / f"store_nbr={store}").touch()
+
+    return ChunkResult(
+        stores=list(stores),
+        n_rows=n_rows,
+        seconds=time.perf_counter() - start,
+    )
+
+
+# =====================================================
+# Driver
+# =====================================================
+
+def list_stores(source: Path) -> List[int]:
+    stores = pq.read_table(source, columns=["store_nbr"]).column(0)
+    return sorted(int(s) for s in np.unique(stores.to_numpy()))
+
+
+def prepare_output(job: ScoringJob, overwrite: bool = False) -> List[int]:
+    """
+    Create (or validate) the output directory and return the stores
+    already completed. A manifest pins the source, model version,
+    window and policy so a resume cannot mix runs.
+    """
+    manifest_path = job.out_dir / MANIFEST_NAME
+    done_dir = job.out_dir / DONE_DIR_NAME
+
+    if manifest_path.exists() and not overwrite:
+        existing = json.loads(manifest_path.read_text())
+        if existing != job.manifest():
+            raise ValueError(
+                f"{job.out_dir} holds a different scoring run "
+                f"({existing}); use a new directory or overwrite"
+            )
+    else:
+        # Fresh run: drop partitions and markers from any earlier run
+        if job.out_dir.exists():
+            for path in job.out_dir.glob("date=*"):
+                shutil.rmtree(path)
+            shutil.rmtree(done_dir, ignore_errors=True)
+
+        job.out_dir.mkdir(parents=True, exist_ok=True)
+        manifest_path.write_text(json.dumps(job.manifest(), indent=2))
+
+    done_dir.mkdir(parents=True, exist_ok=True)
+
+    return sorted(
+        int(p.name.split("=", 1)[1]) for p in done_dir.glob("store_nbr=*")
+    )
+
+
+def run_batch_scoring(
+    job: ScoringJob,
+    stores_per_chunk: int = 1,
+    max_workers: Optional[int] = None,
+    overwrite: bool = False,
+    on_chunk: Optional[Callable[[ChunkResult, int, int], None]] = None,
+) -> dict:
+    """
+    Score every store-day of `job.source` into a parquet dataset
+    partitioned by date/store, `stores_per_chunk` stores per task on a
+    process pool. Stores completed by an earlier (interrupted) run are
+    skipped. `on_chunk(result, chunks_done, chunks_total)` is called as
+    chunks finish. Returns run totals including rows/sec.
+    """
+    completed = set(prepare_output(job, overwrite=overwrite))
+    todo = [s for s in list_stores(job.source) if s not in completed]
+
+    chunks = [
+        todo[i:i + stores_per_chunk]
+        for i in range(0, len(todo), stores_per_chunk)
+    ]
+    max_workers = max_workers or min(len(chunks), os.cpu_count() or 1) or 1
+
+    start = time.perf_counter()
+    n_rows = 0
+
+    if max_workers == 1:
+        _init_worker(job.model_version)
+        results = (score_store_chunk(job, c) for c in chunks)
+        for i, result in enumerate(results, start=1):
+            n_rows += result.n_rows
+            if on_chunk:
+                on_chunk(result, i, len(chunks))
+    else:
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=_init_worker,
+            initargs=(job.model_version,),
+        ) as pool:
+            futures = [pool.submit(score_store_chunk, job, c) for c in chunks]
+            for i, future in enumerate(as_completed(futures), start=1):
+                result = future.result()
+                n_rows += result.n_rows
+                if on_chunk:
+                    on_chunk(result, i, len(chunks))
+
+    seconds = time.perf_counter() - start
+
+    return {
+        "stores_skipped": len(completed),
+        "stores_scored": len(todo),
+        "rows": n_rows,
+        "seconds": seconds,
+        "rows_per_sec": n_rows / seconds if seconds > 0 else 0.0,
+    }
@@ -0,0 +1,160 @@
+import math
+from dataclasses import dataclass
+from typing import Optional, Union
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class CapacityCurve:
+    """
+    Exact piecewise-linear response of the proportional allocator to
+    capacity (continuous relaxation, before integer rounding).
+
+    `capacity`, `allocated` and `served` are aligned breakpoints;
+    values between breakpoints are linear, and flat past the last one.
+    """
+    capacity: np.ndarray
+    allocated: np.ndarray
+    served: np.ndarray
+    total_demand: float
+
+    @property
+    def coverage(self) -> np.ndarray:
+        if self.total_demand <= 0:
+            return np.zeros_like(self.served)
+        return self.served / self.total_demand
+
+    def served_at(self, capacity):
+        return np.interp(capacity, self.capacity, self.served)
+
+    def allocated_at(self, capacity):
+        return np.interp(capacity, self.capacity, self.allocated)
+
+    def min_capacity_for_coverage(self, target: float) -> Optional[int]:
+        """
+        Smallest integer capacity whose served fraction reaches `target`,
+        by binary search over the breakpoints. None if unreachable.
+        """
+        if self.total_demand <= 0:
+            return 0
+
+        goal = target * self.total_demand
+        served = self.served
+
+        if goal <= 0:
+            return 0
+        if goal > served[-1] * (1 + 1e-12):
+            return None
+        # Within tolerance of the maximum: the first capacity serving it,
+        # not a point on the flat tail past it
+        goal = min(goal, served[-1])
+
+        # First breakpoint at or above the goal; interpolate back into
+        # the segment that ends there (served is non-decreasing)
+        k = int(np.searchsorted(served, goal, side="left"))
+
+        c0, c1 = self.capacity[k - 1], self.capacity[k]
+        s0, s1 = served[k - 1], served[k]
+
+        if s1 == s0:
+            # Flat segment: s0 is already reached at its start
+            return int(math.ceil(c0))
+
+        exact = c0 + (goal - s0) * (c1 - c0) / (s1 - s0)
+        return int(math.ceil(exact - 1e-9))
+
+
+def capacity_coverage_curve(
+    demand: np.ndarray,
+    service_floor_ratio: Union[float, np.ndarray] = 0.0,
+    perishable: Optional[np.ndarray] = None,
+    perishable_weight: float = 1.0,
+) -> CapacityCurve:
+    """
+    Breakpoints of allocated units and demand served versus capacity
+    for optimize_proportional_allocation_arrays (fill_capacity=False),
+    in O(n log n).
+
+    With weighted demand w_i, floors F_i = ratio_i * w_i, F = sum(F_i)
+    and W = sum(w_i), each SKU's allocation is linear on [0, F]
+    (scaled floors), linear on [F, W] (floor + proportional residual)
+    and flat beyond W. Demand served is sum(min(alloc_i, demand_i)), so
+    each SKU whose weighted demand exceeds its demand (perishable
+    weight > 1) adds one more kink where its allocation reaches demand.
+    """
+    demand = np.maximum(np.asarray(demand, dtype=np.float64), 0.0)
+
+    if perishable is not None:
+        weighted = np.where(
+            np.asarray(perishable, dtype=bool),
+            demand * perishable_weight,
+            demand,
+        )
+    else:
+        weighted = demand
+
+    total_demand = float(demand.sum())
+    W = float(weighted.sum())
+
+    if W == 0:
+        zero = np.zeros(1)
+        return CapacityCurve(zero, zero, zero, total_demand)
+
+    floors = np.broadcast_to(service_floor_ratio, weighted.shape) * weighted
+    F = float(floors.sum())
+
+    # Per-SKU slope on each linear segment of allocation vs capacity
+    slope_1 = floors / F if F > 0 else np.zeros_like(weighted)
+    slope_2 = (
+        (weighted - floors) / (W - F) if W > F else np.zeros_like(weighted)
+    )
+
+    # Capacity at which allocation reaches demand (only if it ever does)
+    crosses = demand < weighted
+    in_seg_1 = crosses & (demand <= floors) & (F > 0)
+    in_seg_2 = crosses & ~in_seg_1
+
+    cross_1 = np.divide(
+        demand * F, floors, out=np.zeros_like(demand), where=in_seg_1
+    )
+    cross_2 = F + np.divide(
+        (demand - floors) * (W - F),
+        weighted - floors,
+        out=np.zeros_like(demand),
+        where=in_seg_2,
+    )
+
+    # ---- Sweep: breakpoints and the total slope after each ----
+    order_1 = np.argsort(cross_1[in_seg_1], kind="stable")
+    order_2 = np.argsort(cross_2[in_seg_2], kind="stable")
+
+    knots_1 = cross_1[in_seg_1][order_1]
+    knots_2 = cross_2[in_seg_2][order_2]
+
+    start_slope_1 = slope_1.sum()
+    slopes_1 = start_slope_1 - np.cumsum(slope_1[in_seg_1][order_1])
+
+    start_slope_2 = slope_2[~in_seg_1].sum()
+    slopes_2 = start_slope_2 - np.cumsum(slope_2[in_seg_2][order_2])
+
+    knots = np.concatenate([[0.0], knots_1, [F], knots_2, [W]])
+    slopes = np.concatenate(
+        [[start_slope_1], slopes_1, [start_slope_2], slopes_2]
+    )
+
+    served = np.concatenate(
+        [[0.0], np.cumsum(np.clip(slopes, 0, None) * np.diff(knots))]
+    )
+
+    # Collapse duplicate knots (e.g. F == 0, or shared crossings)
+    keep = np.concatenate([[True], np.diff(knots) > 0])
+    knots = knots[keep]
+    served = np.minimum(served[keep], total_demand)
+
+    return CapacityCurve(
+        capacity=knots,
+        allocated=np.minimum(knots, W),
+        served=served,
+        total_demand=total_demand,
+    )
@@ -0,0 +1,74 @@
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.optimization.joint import optimize_joint_allocation
+
+
+def chain_decision_rows(
+    df_day: pd.DataFrame,
+    stores: Optional[Sequence[int]] = None,
+    item_promos: Optional[Dict[int, bool]] = None,
+) -> pd.DataFrame:
+    """
+    One row per (store, SKU) for a single date, restricted to `stores`
+    and to the SKUs in `item_promos` (item_nbr -> onpromotion), whose
+    promo flags replace the snapshot's. None means no restriction.
+    """
+    mask = np.ones(len(df_day), dtype=bool)
+    if stores is not None:
+        mask &= df_day["store_nbr"].isin(stores).to_numpy()
+    if item_promos is not None:
+        mask &= df_day["item_nbr"].isin(item_promos.keys()).to_numpy()
+
+    df_slice = (
+        df_day[mask]
+        .sort_values(["store_nbr", "item_nbr"])
+        .drop_duplicates(subset=["store_nbr", "item_nbr"], keep="last")
+        .reset_index(drop=True)
+    )
+
+    if item_promos is not None:
+        df_slice["onpromotion"] = (
+            df_slice["item_nbr"].map(item_promos).astype(int)
+        )
+
+    return df_slice
+
+
+def plan_chain_day(
+    df_slice: pd.DataFrame,
+    predictor,
+    service_level: float,
+    dc_capacity: int,
+    store_caps: Optional[Dict[int, int]] = None,
+    service_floor_ratio: float = 0.0,
+    perishable_weight: float = 1.0,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Forecast every (store, SKU) row of `df_slice` in one predict call
+    and split the DC capacity jointly, honoring per-store caps.
+    Returns (forecast, orders) aligned with `df_slice`.
+    """
+    store_caps = store_caps or {}
+
+    forecast = predictor.predict_df(df_slice, service_level=service_level)
+
+    store_ids = df_slice["store_nbr"].to_numpy()
+    caps = np.array(
+        [store_caps.get(int(s), np.inf) for s in np.unique(store_ids)],
+        dtype=np.float64,
+    )
+
+    orders = optimize_joint_allocation(
+        store_ids,
+        forecast,
+        dc_capacity=dc_capacity,
+        store_caps=caps,
+        service_floor_ratio=service_floor_ratio,
+        perishable=df_slice["perishable"].to_numpy(),
+        perishable_weight=perishable_weight,
+    )
+
+    return forecast, orders
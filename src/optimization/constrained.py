@@ -0,0 +1,215 @@
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class ResourceConstraint:
+    """
+    Linear resource limit: sum(coefficients * orders) <= limit.
+
+    `coefficients` is per-SKU usage of the resource (units, volume,
+    cost); SKUs with a zero coefficient do not consume it.
+    """
+    name: str
+    coefficients: np.ndarray
+    limit: float
+
+
+def family_cap_constraints(
+    families: np.ndarray,
+    caps: Dict[str, float],
+    unit_volume: Optional[np.ndarray] = None,
+) -> List[ResourceConstraint]:
+    """
+    One shelf-space constraint per capped family (volume defaults to
+    one per unit). Families without a cap are unconstrained.
+    """
+    families = np.asarray(families)
+    volume = (
+        np.ones(families.size) if unit_volume is None
+        else np.asarray(unit_volume, dtype=np.float64)
+    )
+
+    return [
+        ResourceConstraint(
+            name=f"family:{family}",
+            coefficients=np.where(families == family, volume, 0.0),
+            limit=float(cap),
+        )
+        for family, cap in caps.items()
+    ]
+
+
+def cold_chain_constraint(
+    perishable: np.ndarray,
+    limit: float,
+    unit_volume: Optional[np.ndarray] = None,
+) -> ResourceConstraint:
+    """
+    Cold-chain space shared by perishable SKUs.
+    """
+    perishable = np.asarray(perishable, dtype=bool)
+    volume = (
+        np.ones(perishable.size) if unit_volume is None
+        else np.asarray(unit_volume, dtype=np.float64)
+    )
+
+    return ResourceConstraint(
+        name="cold_chain",
+        coefficients=np.where(perishable, volume, 0.0),
+        limit=float(limit),
+    )
+
+
+def budget_constraint(
+    unit_cost: np.ndarray,
+    budget: float,
+) -> ResourceConstraint:
+    """
+    Purchase budget over per-unit costs.
+    """
+    return ResourceConstraint(
+        name="budget",
+        coefficients=np.asarray(unit_cost, dtype=np.float64),
+        limit=float(budget),
+    )
+
+
+def _progressive_fill(
+    x: np.ndarray,
+    direction: np.ndarray,
+    A: np.ndarray,
+    b: np.ndarray,
+    active: np.ndarray,
+) -> None:
+    """
+    Raise x += t * direction on active SKUs for a common t in [0, 1],
+    freezing every SKU in a constraint as soon as it binds, then keep
+    raising the rest (max-min fair fill). Updates x / active in place.
+    """
+    progress = 0.0
+
+    while progress < 1.0:
+        moving = active & (direction > 0)
+        if not moving.any():
+            break
+
+        step = np.where(moving, direction, 0.0)
+        rate = A @ step
+        slack = np.maximum(b - A @ x, 0.0)
+
+        limited = rate > 0
+        t_bind = np.full(b.size, np.inf)
+        t_bind[limited] = slack[limited] / rate[limited]
+
+        t = min(1.0 - progress, float(t_bind.min(initial=np.inf)))
+        x += t * step
+        progress += t
+
+        binding = limited & (t_bind <= t + 1e-12 * max(1.0, t))
+        if not binding.any():
+            break
+
+        active &= ~(A[binding] > 0).any(axis=0)
+
+
+def optimize_constrained_allocation(
+    demand: np.ndarray,
+    capacity: float,
+    constraints: Sequence[ResourceConstraint] = (),
+    service_floor_ratio: Union[float, np.ndarray] = 0.0,
+    perishable: Optional[np.ndarray] = None,
+    perishable_weight: float = 1.0,
+) -> np.ndarray:
+    """
+    Proportional allocation under several linear resource constraints
+    (total capacity plus e.g. family shelf space, cold-chain space and
+    purchase budget).
+
+    Continuous relaxation by progressive filling, in two phases: first
+    service floors, then the residual up to weighted demand. All SKUs
+    rise at the same fraction until a constraint binds, which freezes
+    the SKUs using it while the others keep rising. With capacity as
+    the only constraint this is exactly the proportional allocator's
+    continuous solution. At most one pass per constraint, each a
+    (constraints x SKUs) mat-vec.
+
+    Integer repair floors the relaxation, then adds units back by
+    largest remainder (ties by position), skipping any SKU whose extra
+    unit would exceed a constraint. Returns int64 order quantities.
+    """
+    demand = np.asarray(demand, dtype=np.float64)
+    n = demand.size
+
+    if capacity <= 0 or n == 0:
+        return np.zeros(n, dtype=np.int64)
+
+    # ---- Clean demand & perishable weighting ----
+    demand = np.maximum(demand, 0.0)
+
+    if perishable is not None:
+        weighted_demand = np.where(
+            np.asarray(perishable, dtype=bool),
+            demand * perishable_weight,
+            demand,
+        )
+    else:
+        weighted_demand = demand
+
+    if weighted_demand.sum() == 0:
+        return np.zeros(n, dtype=np.int64)
+
+    # ---- Constraint matrix (capacity first) ----
+    A = np.vstack(
+        [np.ones(n)]
+        + [np.asarray(c.coefficients, dtype=np.float64) for c in constraints]
+    )
+    b = np.array([float(capacity)] + [c.limit for c in constraints])
+
+    if (A < 0).any():
+        raise ValueError("Constraint coefficients must be non-negative")
+
+    # ---- Continuous relaxation ----
+    floors = service_floor_ratio * weighted_demand
+    residual = np.maximum(weighted_demand - floors, 0.0)
+
+    x = np.zeros(n)
+    active = np.ones(n, dtype=bool)
+
+    _progressive_fill(x, floors, A, b, active)
+    _progressive_fill(x, residual, A, b, active)
+
+    # ---- Integer repair (largest remainder, constraint-aware) ----
+    rounded = np.floor(x + 1e-9).astype(np.int64)
+    gap = int(round(x.sum() - rounded.sum()))
+
+    if gap <= 0:
+        return rounded
+
+    slack = b - A @ rounded + 1e-9 * np.maximum(1.0, np.abs(b))
+
+    remainders = x - rounded
+    candidates = np.argsort(-remainders, kind="stable")
+    candidates = candidates[remainders[candidates] > 0]
+
+    while gap > 0 and candidates.size:
+        # Drop SKUs that no longer fit on their own
+        usage = A[:, candidates]
+        candidates = candidates[(usage <= slack[:, None]).all(axis=0)]
+        if not candidates.size:
+            break
+
+        # Longest prefix that fits jointly
+        cum = np.cumsum(A[:, candidates[:gap]], axis=1)
+        fits = (cum <= slack[:, None]).all(axis=0)
+        take = int(np.argmin(fits)) if not fits.all() else fits.size
+
+        accepted = candidates[:take]
+        rounded[accepted] += 1
+        slack -= cum[:, take - 1]
+        gap -= take
+        candidates = candidates[take:]
+
+    return rounded
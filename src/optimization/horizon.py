@@ -0,0 +1,122 @@
+from dataclasses import dataclass
+from typing import Optional, Union
+
+import numpy as np
+
+from src.optimization.optimizer import optimize_proportional_allocation_arrays
+
+
+@dataclass(frozen=True)
+class HorizonPlan:
+    """
+    Day-by-day plan and simulated inventory flows, each shaped
+    (n_skus, n_days). `begin_on_hand` is stock before the day's order
+    arrives; `end_on_hand` is what carries over after sales and waste.
+    """
+    orders: np.ndarray
+    begin_on_hand: np.ndarray
+    expected_sales: np.ndarray
+    lost_sales: np.ndarray
+    waste: np.ndarray
+    end_on_hand: np.ndarray
+
+
+def _consume_fifo(buckets: np.ndarray, demand: np.ndarray) -> np.ndarray:
+    """
+    Units sold from each age bucket, oldest first. `buckets` columns
+    are ages 0..L-1, so consumption runs from the last column back.
+    """
+    oldest_first = buckets[:, ::-1]
+    before = np.cumsum(oldest_first, axis=1) - oldest_first
+    sold = np.clip(demand[:, None] - before, 0, oldest_first)
+    return sold[:, ::-1]
+
+
+def plan_order_horizon(
+    order_forecast: np.ndarray,
+    sales_forecast: np.ndarray,
+    capacity: Union[float, np.ndarray],
+    on_hand: Optional[np.ndarray] = None,
+    shelf_life_days: Optional[np.ndarray] = None,
+    service_floor_ratio: float = 0.0,
+    perishable: Optional[np.ndarray] = None,
+    perishable_weight: float = 1.0,
+) -> HorizonPlan:
+    """
+    Plan daily orders over a horizon with inventory carry-over.
+
+    Each day orders cover the service-level forecast (`order_forecast`)
+    net of usable stock on hand, allocated under that day's capacity
+    with the proportional allocator. Stock is then depleted FIFO by the
+    expected demand (`sales_forecast`, typically a lower quantile), and
+    units reaching their shelf life (days, per SKU; inf = no expiry)
+    are written off as waste.
+
+    The loop runs over days only; every day is vectorized across SKUs.
+    """
+    order_forecast = np.asarray(order_forecast, dtype=np.float64)
+    sales_forecast = np.asarray(sales_forecast, dtype=np.float64)
+    n_skus, n_days = order_forecast.shape
+
+    capacity = np.broadcast_to(np.asarray(capacity), (n_days,))
+
+    if shelf_life_days is None:
+        shelf_life_days = np.full(n_skus, np.inf)
+    shelf_life = np.asarray(shelf_life_days, dtype=np.float64)
+
+    # Age buckets: anything older than the horizon never matters
+    n_ages = n_days + 1
+    ages = np.arange(n_ages)
+    expires = ages[None, :] + 1 >= shelf_life[:, None]
+
+    buckets = np.zeros((n_skus, n_ages))
+    if on_hand is not None:
+        buckets[:, 0] = np.maximum(np.asarray(on_hand, dtype=np.float64), 0)
+
+    out = {
+        name: np.zeros((n_skus, n_days))
+        for name in (
+            "orders", "begin_on_hand", "expected_sales",
+            "lost_sales", "waste", "end_on_hand",
+        )
+    }
+
+    for day in range(n_days):
+        available = buckets.sum(axis=1)
+        out["begin_on_hand"][:, day] = available
+
+        # ---- Order the shortfall vs the service-level forecast ----
+        need = np.maximum(order_forecast[:, day] - available, 0.0)
+
+        orders = optimize_proportional_allocation_arrays(
+            need,
+            capacity=capacity[day],
+            service_floor_ratio=service_floor_ratio,
+            perishable=perishable,
+            perishable_weight=perishable_weight,
+        )
+        out["orders"][:, day] = orders
+
+        # Orders arrive fresh (age 0) at the start of the day
+        buckets[:, 0] += orders
+
+        # ---- Sell oldest first ----
+        demand = sales_forecast[:, day]
+        sold = _consume_fifo(buckets, demand)
+        buckets -= sold
+
+        sales = sold.sum(axis=1)
+        out["expected_sales"][:, day] = sales
+        out["lost_sales"][:, day] = np.maximum(demand - sales, 0.0)
+
+        # ---- Expire, then age by one day ----
+        out["waste"][:, day] = np.where(expires, buckets, 0.0).sum(axis=1)
+        buckets = np.where(expires, 0.0, buckets)
+        buckets[:, 1:] = buckets[:, :-1].copy()
+        buckets[:, 0] = 0.0
+
+        out["end_on_hand"][:, day] = buckets.sum(axis=1)
+
+    out["orders"] = out["orders"].astype(np.int64)
+
+    return HorizonPlan(**out)
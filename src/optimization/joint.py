@@ -0,0 +1,144 @@
+from typing import Optional, Union
+
+import numpy as np
+
+
+def _group_water_fill(
+    x: np.ndarray,
+    direction: np.ndarray,
+    row_idx: np.ndarray,
+    group_slack: np.ndarray,
+    total_slack: float,
+) -> None:
+    """
+    Raise x += t_g * direction with one fill level per group: every
+    group rises at a common level t until it saturates its own slack,
+    the pool slack runs out, or t reaches 1. Updates x in place.
+
+    Group g saturates at t_g = slack_g / D_g (D_g its total direction),
+    so the pool level solves sum_g D_g * min(t, t_g) = total_slack, a
+    piecewise-linear equation solved over groups sorted by t_g.
+    """
+    n_groups = group_slack.size
+    D = np.bincount(row_idx, weights=direction, minlength=n_groups)
+
+    cap_level = np.ones(n_groups)
+    pos = D > 0
+    cap_level[pos] = np.minimum(1.0, group_slack[pos] / D[pos])
+
+    order = np.argsort(cap_level, kind="stable")
+    levels = cap_level[order]
+    D_sorted = D[order]
+
+    # Pool usage if the common level stops exactly at levels[k]:
+    # saturated groups below contribute D*t_g, the rest D*levels[k]
+    saturated_use = np.concatenate([[0.0], np.cumsum(D_sorted * levels)])
+    rest = np.concatenate([np.cumsum(D_sorted[::-1])[::-1], [0.0]])
+    use_at = saturated_use[:-1] + rest[:-1] * levels
+
+    if use_at.size == 0 or use_at[-1] <= total_slack:
+        level = np.inf
+    else:
+        k = int(np.searchsorted(use_at, total_slack, side="right"))
+        level = (total_slack - saturated_use[k]) / rest[k]
+
+    fill = np.minimum(cap_level, level)
+    x += fill[row_idx] * direction
+
+
+def optimize_joint_allocation(
+    store_ids: np.ndarray,
+    demand: np.ndarray,
+    dc_capacity: float,
+    store_caps: Optional[Union[float, np.ndarray]] = None,
+    service_floor_ratio: Union[float, np.ndarray] = 0.0,
+    perishable: Optional[np.ndarray] = None,
+    perishable_weight: float = 1.0,
+) -> np.ndarray:
+    """
+    Split one distribution-center capacity across all (store, item)
+    demands, honoring optional per-store caps.
+
+    Proportional allocation over the whole pool (same floor and
+    perishable rules as optimize_proportional_allocation_arrays); a
+    store that reaches its cap stops and the rest of the DC capacity
+    keeps flowing to the others. Without store caps this is one
+    proportional allocation over every pair.
+
+    `store_caps` is a scalar or one value per sorted unique store id
+    (np.inf = uncapped). Rounding is largest remainder over the DC gap,
+    skipping stores with no whole unit left; O(n log n) overall.
+    Returns orders aligned with `demand`.
+    """
+    demand = np.asarray(demand, dtype=np.float64)
+    n = demand.size
+
+    if dc_capacity <= 0 or n == 0:
+        return np.zeros(n, dtype=np.int64)
+
+    stores, row_idx = np.unique(np.asarray(store_ids), return_inverse=True)
+    row_idx = row_idx.ravel()
+
+    caps = np.broadcast_to(
+        np.inf if store_caps is None else np.asarray(store_caps, dtype=np.float64),
+        stores.shape,
+    ).astype(np.float64)
+    caps = np.maximum(caps, 0.0)
+
+    # ---- Clean demand & perishable weighting ----
+    demand = np.maximum(demand, 0.0)
+
+    if perishable is not None:
+        weighted_demand = np.where(
+            np.asarray(perishable, dtype=bool),
+            demand * perishable_weight,
+            demand,
+        )
+    else:
+        weighted_demand = demand
+
+    if weighted_demand.sum() == 0:
+        return np.zeros(n, dtype=np.int64)
+
+    # ---- Continuous allocation: floors, then residual ----
+    floors = service_floor_ratio * weighted_demand
+    residual = np.maximum(weighted_demand - floors, 0.0)
+
+    x = np.zeros(n)
+
+    for direction in (floors, residual):
+        used = np.bincount(row_idx, weights=x, minlength=stores.size)
+        _group_water_fill(
+            x,
+            direction,
+            row_idx,
+            group_slack=np.maximum(caps - used, 0.0),
+            total_slack=max(float(dc_capacity) - x.sum(), 0.0),
+        )
+
+    # ---- Rounding (largest remainder, store-cap aware) ----
+    rounded = np.floor(x + 1e-9).astype(np.int64)
+    gap = int(round(x.sum() - rounded.sum()))
+
+    if gap <= 0:
+        return rounded
+
+    used = np.bincount(row_idx, weights=rounded, minlength=stores.size)
+    store_room = np.floor(np.minimum(caps - used, n) + 1e-9).astype(np.int64)
+
+    remainders = x - rounded
+    candidates = np.argsort(-remainders, kind="stable")
+    candidates = candidates[remainders[candidates] > 0]
+
+    # Rank of each candidate within its store, in remainder order
+    cand_store = row_idx[candidates]
+    by_store = np.argsort(cand_store, kind="stable")
+    counts = np.bincount(cand_store, minlength=stores.size)
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    rank = np.empty(candidates.size, dtype=np.int64)
+    rank[by_store] = np.arange(candidates.size) - starts[cand_store[by_store]]
+
+    eligible = candidates[rank < store_room[cand_store]]
+    rounded[eligible[:gap]] += 1
+
+    return rounded
@@ -0,0 +1,148 @@
+from typing import Tuple, Union
+
+import numpy as np
+
+
+def piecewise_linear_cdf(
+    quantile_levels: np.ndarray,
+    quantile_values: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Per-SKU piecewise-linear demand CDF through the predicted quantiles.
+
+    Knots are (0, 0), then (q_k, alpha_k) for each level, then a tail
+    continuing the last segment's slope up to F = 1. Returns knot
+    positions and CDF values, both shaped (n_skus, n_levels + 2).
+    """
+    levels = np.asarray(quantile_levels, dtype=np.float64)
+    values = np.maximum.accumulate(
+        np.clip(np.asarray(quantile_values, dtype=np.float64), 0, None),
+        axis=1,
+    )
+    n = values.shape[0]
+
+    # ---- Tail: extend the last segment's density until F = 1 ----
+    prev_x = values[:, -2] if levels.size > 1 else np.zeros(n)
+    prev_f = levels[-2] if levels.size > 1 else 0.0
+
+    width = values[:, -1] - prev_x
+    tail = values[:, -1] + width * (1.0 - levels[-1]) / (levels[-1] - prev_f)
+
+    x = np.column_stack([np.zeros(n), values, tail])
+    F = np.broadcast_to(
+        np.concatenate([[0.0], levels, [1.0]]), x.shape
+    ).copy()
+
+    return x, F
+
+
+def _cdf_integral(x: np.ndarray, F: np.ndarray, rows: np.ndarray, at: np.ndarray) -> np.ndarray:
+    """
+    G(at) = integral of F from 0 to `at` for SKU rows[i], i.e. expected
+    leftover E[(at - D)+] under the piecewise-linear CDF.
+    """
+    dx = np.diff(x, axis=1)
+    G_knots = np.concatenate(
+        [
+            np.zeros((x.shape[0], 1)),
+            np.cumsum(0.5 * (F[:, :-1] + F[:, 1:]) * dx, axis=1),
+        ],
+        axis=1,
+    )
+
+    xr = x[rows]
+    seg = (at[:, None] >= xr).sum(axis=1) - 1
+    seg = np.clip(seg, 0, x.shape[1] - 1)
+
+    x0 = xr[np.arange(rows.size), seg]
+    F0 = F[rows, seg]
+    G0 = G_knots[rows, seg]
+
+    last = seg == x.shape[1] - 1
+    nxt = np.minimum(seg + 1, x.shape[1] - 1)
+    span = x[rows, nxt] - x0
+    slope = np.divide(
+        F[rows, nxt] - F0,
+        span,
+        out=np.zeros_like(span),
+        where=(span > 0) & ~last,
+    )
+
+    d = at - x0
+    return G0 + F0 * d + 0.5 * slope * d * d
+
+
+def expected_newsvendor_profit(
+    quantile_levels: np.ndarray,
+    quantile_values: np.ndarray,
+    orders: np.ndarray,
+    unit_margin: Union[float, np.ndarray],
+    unit_holding_cost: Union[float, np.ndarray],
+) -> np.ndarray:
+    """
+    Per-SKU expected profit m * E[min(D, Q)] - h * E[(Q - D)+]
+    = m * Q - (m + h) * G(Q) under the piecewise-linear CDF.
+    """
+    x, F = piecewise_linear_cdf(quantile_levels, quantile_values)
+    orders = np.asarray(orders, dtype=np.float64)
+    n = orders.size
+
+    m = np.broadcast_to(np.asarray(unit_margin, dtype=np.float64), (n,))
+    h = np.broadcast_to(np.asarray(unit_holding_cost, dtype=np.float64), (n,))
+
+    G = _cdf_integral(x, F, np.arange(n), orders)
+    return m * orders - (m + h) * G
+
+
+def optimize_newsvendor_allocation(
+    quantile_levels: np.ndarray,
+    quantile_values: np.ndarray,
+    capacity: int,
+    unit_margin: Union[float, np.ndarray] = 1.0,
+    unit_holding_cost: Union[float, np.ndarray] = 0.5,
+) -> np.ndarray:
+    """
+    Capacity-capped allocation maximizing total expected newsvendor
+    profit over per-SKU quantile forecasts.
+
+    Each SKU's demand CDF is piecewise linear through its quantiles;
+    the u-th unit earns m - (m + h) * (G(u) - G(u-1)), which decreases
+    in u, so taking the best marginal units first is optimal. All
+    profitable units are scored at once and the top `capacity` kept by
+    a vectorized selection (the batch form of a priority queue); units
+    with non-positive marginal profit are never ordered, so capacity is
+    a cap, not a target. Returns int64 order quantities.
+    """
+    values = np.asarray(quantile_values, dtype=np.float64)
+    n = values.shape[0]
+
+    if capacity <= 0 or n == 0:
+        return np.zeros(n, dtype=np.int64)
+
+    m = np.broadcast_to(np.asarray(unit_margin, dtype=np.float64), (n,))
+    h = np.broadcast_to(np.asarray(unit_holding_cost, dtype=np.float64), (n,))
+
+    x, F = piecewise_linear_cdf(quantile_levels, values)
+
+    # Past the tail F = 1 and a unit only costs h: stop there
+    max_units = np.ceil(x[:, -1]).astype(np.int64)
+    max_units[m <= 0] = 0
+
+    rows = np.repeat(np.arange(n), max_units)
+    if rows.size == 0:
+        return np.zeros(n, dtype=np.int64)
+
+    starts = np.concatenate([[0], np.cumsum(max_units)[:-1]])
+    unit = np.arange(rows.size) - starts[rows] + 1.0
+
+    G_hi = _cdf_integral(x, F, rows, unit)
+    G_lo = _cdf_integral(x, F, rows, unit - 1.0)
+
+    gain = m[rows] - (m[rows] + h[rows]) * (G_hi - G_lo)
+
+    profitable = np.flatnonzero(gain > 0)
+    if profitable.size > capacity:
+        top = np.argpartition(-gain[profitable], capacity - 1)[:capacity]
+        profitable = profitable[top]
+
+    return np.bincount(rows[profitable], minlength=n).astype(np.int64)
@@ -1,14 +1,145 @@
-from typing import Dict, Optional
+from typing import Dict, Optional, Tuple, Union
 import numpy as np
 
 
+def _sequential_sum(x: np.ndarray) -> float:
+    """
+    Left-to-right float sum, matching Python's sum() bit for bit
+    (np.sum uses pairwise summation, which can differ in the last ulp).
+    """
+    if x.size == 0:
+        return 0.0
+    return float(np.cumsum(x)[-1])
+
+
+def _largest_remainder_top(remainders: np.ndarray, gap: int) -> np.ndarray:
+    """
+    Indices of the `gap` largest remainders, ties broken by position
+    (same order as a stable descending sort), found with argpartition.
+    """
+    if gap <= 0:
+        return np.empty(0, dtype=np.int64)
+    if gap >= remainders.size:
+        return np.arange(remainders.size)
+
+    top = np.argpartition(-remainders, gap - 1)[:gap]
+    threshold = remainders[top].min()
+
+    above = np.flatnonzero(remainders > threshold)
+    ties = np.flatnonzero(remainders == threshold)[: gap - above.size]
+
+    return np.concatenate([above, ties])
+
+
+def proportional_targets(
+    demand: np.ndarray,
+    capacity: int,
+    service_floor_ratio: Union[float, np.ndarray] = 0.0,
+    perishable: Optional[np.ndarray] = None,
+    perishable_weight: float = 1.0,
+    fill_capacity: bool = False,
+) -> Tuple[np.ndarray, float]:
+    """
+    Continuous (pre-rounding) proportional allocation and the effective
+    capacity it fills. Zero targets when there is nothing to allocate.
+    """
+    demand = np.asarray(demand, dtype=np.float64)
+    n = demand.size
+
+    if capacity <= 0 or n == 0:
+        return np.zeros(n), 0.0
+
+    # ---- Clean demand ----
+    demand = np.maximum(demand, 0.0)
+
+    # ---- Apply perishable weighting ----
+    if perishable is not None:
+        weighted_demand = np.where(
+            np.asarray(perishable, dtype=bool),
+            demand * perishable_weight,
+            demand,
+        )
+    else:
+        weighted_demand = demand
+
+    total_weighted_demand = _sequential_sum(weighted_demand)
+    if total_weighted_demand == 0:
+        return np.zeros(n), 0.0
+
+    # ---- Effective capacity ----
+    effective_capacity = (
+        capacity if fill_capacity
+        else min(capacity, total_weighted_demand)
+    )
+
+    # ---- Service floors ----
+    floors = service_floor_ratio * weighted_demand
+    total_floor = _sequential_sum(floors)
+
+    if total_floor > effective_capacity:
+        floors = floors * (effective_capacity / total_floor)
+
+    remaining_capacity = effective_capacity - _sequential_sum(floors)
+
+    # ---- Residual demand ----
+    residual_demand = np.maximum(weighted_demand - floors, 0.0)
+    residual_total = _sequential_sum(residual_demand)
+
+    # ---- Proportional allocation ----
+    if residual_total > 0:
+        continuous = floors + remaining_capacity * (
+            residual_demand / residual_total
+        )
+    else:
+        continuous = floors
+
+    return continuous, effective_capacity
+
+
+def optimize_proportional_allocation_arrays(
+    demand: np.ndarray,
+    capacity: int,
+    service_floor_ratio: Union[float, np.ndarray] = 0.0,
+    perishable: Optional[np.ndarray] = None,
+    perishable_weight: float = 1.0,
+    fill_capacity: bool = False,
+) -> np.ndarray:
+    """
+    Array-native proportional allocation over aligned per-SKU arrays.
+
+    Same rules (and identical results) as
+    optimize_proportional_allocation; `service_floor_ratio` may be a
+    scalar or a per-SKU array. Returns int64 order quantities.
+    """
+    continuous, effective_capacity = proportional_targets(
+        demand,
+        capacity,
+        service_floor_ratio=service_floor_ratio,
+        perishable=perishable,
+        perishable_weight=perishable_weight,
+        fill_capacity=fill_capacity,
+    )
+
+    if effective_capacity == 0:
+        return np.zeros(continuous.size, dtype=np.int64)
+
+    # ---- Rounding (largest remainder) ----
+    rounded = np.floor(continuous).astype(np.int64)
+    gap = int(round(effective_capacity - int(rounded.sum())))
+
+    remainders = continuous - rounded
+    rounded[_largest_remainder_top(remainders, gap)] += 1
+
+    return rounded
+
+
 def optimize_proportional_allocation(
     demand: Dict[int, float],
     capacity: int,
     service_floor_ratio: float = 0.0,
     perishable_flags: Optional[Dict[int, bool]] = None,
     perishable_weight: float = 1.0,
-    fill_capacity: bool = False,   # 👈 NEW
+    fill_capacity: bool = False,
 ) -> Dict[int, int]:
     """
     Proportionally allocate inventory with:
@@ -16,86 +147,248 @@ def optimize_proportional_allocation(
     - optional exact-capacity fill
     - adaptive service-level floors
     - optional perishable weighting
-    """
 
-    if capacity <= 0 or not demand:
-        return {k: 0 for k in demand}
+    Dict wrapper around optimize_proportional_allocation_arrays.
+    """
+    keys = list(demand)
 
-    # ---- Clean demand ----
-    demand = {k: max(v, 0.0) for k, v in demand.items()}
+    demand_arr = np.fromiter(
+        demand.values(), dtype=np.float64, count=len(keys)
+    )
 
-    # ---- Apply perishable weighting ----
+    perishable = None
     if perishable_flags:
-        weighted_demand = {
-            k: (
-                demand[k] * perishable_weight
-                if perishable_flags.get(k, False)
-                else demand[k]
-            )
-            for k in demand
-        }
+        perishable = np.fromiter(
+            (bool(perishable_flags.get(k, False)) for k in keys),
+            dtype=bool,
+            count=len(keys),
+        )
+
+    orders = optimize_proportional_allocation_arrays(
+        demand_arr,
+        capacity=capacity,
+        service_floor_ratio=service_floor_ratio,
+        perishable=perishable,
+        perishable_weight=perishable_weight,
+        fill_capacity=fill_capacity,
+    )
+
+    return dict(zip(keys, orders.tolist()))
+
+
+def _row_sums(x: np.ndarray) -> np.ndarray:
+    """
+    Per-row left-to-right sums (see _sequential_sum); trailing padding
+    zeros leave each row's sum unchanged.
+    """
+    if x.shape[1] == 0:
+        return np.zeros(x.shape[0])
+    return np.cumsum(x, axis=1)[:, -1]
+
+
+def optimize_proportional_allocation_batch(
+    demand: np.ndarray,
+    capacity: Union[float, np.ndarray],
+    service_floor_ratio: Union[float, np.ndarray] = 0.0,
+    perishable: Optional[np.ndarray] = None,
+    perishable_weight: Union[float, np.ndarray] = 1.0,
+    valid: Optional[np.ndarray] = None,
+    fill_capacity: bool = False,
+) -> np.ndarray:
+    """
+    Solve many independent allocation decisions in one vectorized pass.
+
+    `demand` is a padded (n_decisions, max_skus) matrix; `valid` masks
+    real entries (padding never receives units). `capacity`,
+    `service_floor_ratio` and `perishable_weight` are scalars or one
+    value per row. Each row gets exactly the result
+    optimize_proportional_allocation_arrays would return for it.
+    """
+    demand = np.asarray(demand, dtype=np.float64)
+    n_rows, n_cols = demand.shape
+
+    if valid is None:
+        valid = np.ones(demand.shape, dtype=bool)
+
+    def per_row(x):
+        return np.broadcast_to(np.asarray(x, dtype=np.float64), (n_rows,))
+
+    capacity = per_row(capacity)
+    ratio = per_row(service_floor_ratio)[:, None]
+    weight = per_row(perishable_weight)[:, None]
+
+    # ---- Clean demand & perishable weighting ----
+    demand = np.where(valid, np.maximum(demand, 0.0), 0.0)
+
+    if perishable is not None:
+        weighted_demand = np.where(
+            np.asarray(perishable, dtype=bool), demand * weight, demand
+        )
     else:
-        weighted_demand = demand.copy()
+        weighted_demand = demand
 
-    total_weighted_demand = sum(weighted_demand.values())
-    if total_weighted_demand == 0:
-        return {k: 0 for k in demand}
+    total_weighted_demand = _row_sums(weighted_demand)
 
-    # ---- Effective capacity (KEY FIX) ----
-    effective_capacity = (
+    active = (
+        (capacity > 0)
+        & (total_weighted_demand != 0)
+        & valid.any(axis=1)
+    )
+
+    # ---- Effective capacity ----
+    effective_capacity = np.where(
+        active,
         capacity if fill_capacity
-        else min(capacity, total_weighted_demand)
+        else np.minimum(capacity, total_weighted_demand),
+        0.0,
     )
 
     # ---- Service floors ----
-    raw_floors = {
-        k: service_floor_ratio * weighted_demand[k]
-        for k in weighted_demand
-    }
+    floors = ratio * weighted_demand
+    total_floor = _row_sums(floors)
 
-    total_floor = sum(raw_floors.values())
+    over = total_floor > effective_capacity
+    if over.any():
+        floors[over] = floors[over] * (
+            effective_capacity[over] / total_floor[over]
+        )[:, None]
 
-    if total_floor > effective_capacity:
-        scale = effective_capacity / total_floor
-        floors = {k: v * scale for k, v in raw_floors.items()}
-    else:
-        floors = raw_floors
+    remaining_capacity = effective_capacity - _row_sums(floors)
 
-    remaining_capacity = effective_capacity - sum(floors.values())
+    # ---- Residual demand & proportional allocation ----
+    residual_demand = np.maximum(weighted_demand - floors, 0.0)
+    residual_total = _row_sums(residual_demand)
 
-    # ---- Residual demand ----
-    residual_demand = {
-        k: max(weighted_demand[k] - floors[k], 0.0)
-        for k in weighted_demand
-    }
+    has_residual = residual_total > 0
+    share = np.divide(
+        residual_demand,
+        residual_total[:, None],
+        out=np.zeros_like(residual_demand),
+        where=has_residual[:, None],
+    )
+    continuous = np.where(
+        has_residual[:, None],
+        floors + remaining_capacity[:, None] * share,
+        floors,
+    )
 
-    residual_total = sum(residual_demand.values())
+    # ---- Rounding (largest remainder, per row) ----
+    rounded = np.floor(continuous).astype(np.int64)
+    gap = np.rint(effective_capacity - rounded.sum(axis=1)).astype(np.int64)
+    gap = np.clip(gap, 0, valid.sum(axis=1))
 
-    # ---- Proportional allocation ----
-    continuous = {}
-    for k in weighted_demand:
-        if residual_total > 0:
-            alloc = floors[k] + remaining_capacity * (
-                residual_demand[k] / residual_total
-            )
-        else:
-            alloc = floors[k]
-        continuous[k] = alloc
+    remainders = np.where(valid, continuous - rounded, -np.inf)
 
-    # ---- Rounding (largest remainder) ----
-    rounded = {k: int(np.floor(v)) for k, v in continuous.items()}
-    current_total = sum(rounded.values())
-    gap = int(round(effective_capacity - current_total))
+    rows = np.flatnonzero(active & (gap > 0))
+    if rows.size:
+        rem = remainders[rows]
+        row_gap = gap[rows]
+        max_gap = int(row_gap.max())
+
+        # Each row's gap-th largest remainder, from the top max_gap only
+        top = -np.partition(-rem, max_gap - 1, axis=1)[:, :max_gap]
+        top.sort(axis=1)
+        threshold = top[np.arange(rows.size), max_gap - row_gap][:, None]
+
+        # Everything above the threshold, then ties in position order
+        # (same picks as a stable descending sort)
+        above = rem > threshold
+        ties = rem == threshold
+        n_ties = (row_gap - above.sum(axis=1))[:, None]
+        take = above | (ties & (np.cumsum(ties, axis=1) <= n_ties))
 
-    remainders = {
-        k: continuous[k] - rounded[k]
-        for k in continuous
-    }
+        rounded[rows] += take
 
-    for k, _ in sorted(remainders.items(), key=lambda x: x[1], reverse=True):
-        if gap <= 0:
-            break
-        rounded[k] += 1
-        gap -= 1
+    rounded[~active] = 0
+    rounded[~valid] = 0
 
     return rounded
+
+
+def pad_by_group(
+    group_ids: np.ndarray,
+    *columns: np.ndarray,
+):
+    """
+    Scatter flat per-SKU columns into padded (n_groups, max_size)
+    matrices, preserving input order within each group.
+
+    Returns (valid, padded_columns, (row_idx, col_idx)) where
+    padded[row_idx[i], col_idx[i]] holds input element i.
+    """
+    group_ids = np.asarray(group_ids)
+
+    if group_ids.size and np.all(group_ids[1:] >= group_ids[:-1]):
+        # Already grouped (e.g. frame sorted by store/date): skip sorting
+        row_idx = np.zeros(group_ids.size, dtype=np.int64)
+        np.cumsum(group_ids[1:] != group_ids[:-1], out=row_idx[1:])
+        order = None
+    else:
+        _, row_idx = np.unique(group_ids, return_inverse=True)
+        row_idx = row_idx.ravel()
+        order = np.argsort(row_idx, kind="stable")
+
+    counts = np.bincount(row_idx)
+    n_groups = counts.size
+    max_size = int(counts.max()) if n_groups else 0
+
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+
+    if order is None:
+        col_idx = np.arange(row_idx.size) - starts[row_idx]
+    else:
+        col_idx = np.empty(row_idx.size, dtype=np.int64)
+        col_idx[order] = np.arange(row_idx.size) - starts[row_idx[order]]
+
+    # Flat scatter is much cheaper than 2-D fancy indexing
+    flat_idx = row_idx * max_size + col_idx
+
+    valid = np.zeros(n_groups * max_size, dtype=bool)
+    valid[flat_idx] = True
+    valid = valid.reshape(n_groups, max_size)
+
+    padded = []
+    for col in columns:
+        col = np.asarray(col)
+        out = np.zeros(n_groups * max_size, dtype=col.dtype)
+        out[flat_idx] = col
+        padded.append(out.reshape(n_groups, max_size))
+
+    return valid, padded, (row_idx, col_idx)
+
+
+def optimize_proportional_allocation_grouped(
+    group_ids: np.ndarray,
+    demand: np.ndarray,
+    capacity: Union[float, np.ndarray],
+    service_floor_ratio: Union[float, np.ndarray] = 0.0,
+    perishable: Optional[np.ndarray] = None,
+    perishable_weight: Union[float, np.ndarray] = 1.0,
+    fill_capacity: bool = False,
+) -> np.ndarray:
+    """
+    Flat (ragged) front-end to optimize_proportional_allocation_batch.
+
+    `group_ids` identifies the decision (e.g. a store-date code) of
+    each SKU row; per-decision params are scalars or arrays indexed by
+    the sorted unique group id. Returns orders aligned with `demand`.
+    """
+    demand = np.asarray(demand, dtype=np.float64)
+    if perishable is None:
+        perishable = np.zeros(demand.size, dtype=bool)
+
+    valid, (demand_2d, perishable_2d), (row_idx, col_idx) = pad_by_group(
+        group_ids, demand, np.asarray(perishable, dtype=bool)
+    )
+
+    orders = optimize_proportional_allocation_batch(
+        demand_2d,
+        capacity=capacity,
+        service_floor_ratio=service_floor_ratio,
+        perishable=perishable_2d,
+        perishable_weight=perishable_weight,
+        valid=valid,
+        fill_capacity=fill_capacity,
+    )
+
+    return orders.ravel()[row_idx * orders.shape[1] + col_idx]
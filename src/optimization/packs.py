@@ -0,0 +1,120 @@
+from dataclasses import dataclass
+from typing import Optional, Union
+
+import numpy as np
+
+from src.optimization.optimizer import proportional_targets
+
+
+@dataclass(frozen=True)
+class PackAllocation:
+    """
+    Pack-aware allocation result.
+
+    `target_units` is what the unit-level allocator would place
+    (round of its effective capacity); `packing_unused_units` is the
+    part of it left unplaced because no remaining case fits.
+    """
+    orders: np.ndarray
+    target_units: int
+    packing_unused_units: int
+
+
+def optimize_pack_allocation(
+    demand: np.ndarray,
+    capacity: int,
+    pack_size: Optional[Union[int, np.ndarray]] = None,
+    moq: Optional[Union[int, np.ndarray]] = None,
+    service_floor_ratio: Union[float, np.ndarray] = 0.0,
+    perishable: Optional[np.ndarray] = None,
+    perishable_weight: float = 1.0,
+) -> PackAllocation:
+    """
+    Integer allocation in whole cases with per-SKU minimum order
+    quantities, under the capacity cap.
+
+    Each SKU's orderable quantities are 0, its first step (MOQ rounded
+    up to whole packs, at least one pack) and then one pack at a time.
+    Steps are ranked by how much of them the proportional target still
+    needs, (target - quantity so far) / step size, and taken greedily
+    while they fit in the target total; a step that does not fit blocks
+    the rest of its SKU. With pack size and MOQ of 1 this is exactly
+    largest-remainder rounding (optimize_proportional_allocation_arrays).
+    """
+    targets, effective_capacity = proportional_targets(
+        demand,
+        capacity,
+        service_floor_ratio=service_floor_ratio,
+        perishable=perishable,
+        perishable_weight=perishable_weight,
+    )
+    n = targets.size
+    budget = int(round(effective_capacity))
+
+    if budget <= 0:
+        return PackAllocation(np.zeros(n, dtype=np.int64), 0, 0)
+
+    pack = np.broadcast_to(
+        np.asarray(1 if pack_size is None else pack_size, dtype=np.int64),
+        (n,),
+    )
+    pack = np.maximum(pack, 1)
+    min_qty = np.broadcast_to(
+        np.asarray(0 if moq is None else moq, dtype=np.int64), (n,)
+    )
+    first = np.maximum(-(-min_qty // pack), 1) * pack
+
+    # ---- Enumerate steps with positive need ----
+    extra = np.ceil(np.maximum(targets - first, 0) / pack).astype(np.int64)
+    n_steps = np.where(targets > 0, 1 + extra, 0)
+
+    sku = np.repeat(np.arange(n), n_steps)
+    starts = np.concatenate([[0], np.cumsum(n_steps)[:-1]])
+    step = np.arange(sku.size) - starts[sku]
+
+    before = np.where(step == 0, 0, first[sku] + (step - 1) * pack[sku])
+    size = np.where(step == 0, first[sku], pack[sku])
+    priority = (targets[sku] - before) / size
+
+    # A large MOQ step can rank below the packs after it: cap later
+    # steps at the first step's priority so steps stay in sequence
+    priority = np.minimum(priority, priority[starts[sku]])
+
+    order = np.argsort(-priority, kind="stable")
+    cand_sku, cand_step, cand_size = sku[order], step[order], size[order]
+
+    # ---- Greedy fill: take the longest fitting prefix, then drop
+    #      whatever can no longer fit (and the SKU's later steps) ----
+    orders = np.zeros(n, dtype=np.int64)
+    blocked_from = np.full(n, np.iinfo(np.int64).max)
+    room = budget
+
+    while cand_sku.size and room > 0:
+        keep = (cand_step < blocked_from[cand_sku])
+
+        too_big = keep & (cand_size > room)
+        if too_big.any():
+            np.minimum.at(blocked_from, cand_sku[too_big], cand_step[too_big])
+            keep &= cand_step < blocked_from[cand_sku]
+
+        cand_sku, cand_step, cand_size = (
+            cand_sku[keep], cand_step[keep], cand_size[keep]
+        )
+        if not cand_sku.size:
+            break
+
+        used = np.cumsum(cand_size)
+        take = int(np.searchsorted(used, room, side="right"))
+
+        np.add.at(orders, cand_sku[:take], cand_size[:take])
+        room -= int(used[take - 1]) if take else 0
+
+        cand_sku, cand_step, cand_size = (
+            cand_sku[take:], cand_step[take:], cand_size[take:]
+        )
+
+    return PackAllocation(
+        orders=orders,
+        target_units=budget,
+        packing_unused_units=room,
+    )
@@ -0,0 +1,86 @@
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from src.optimization.optimizer import optimize_proportional_allocation_batch
+
+
+@dataclass(frozen=True)
+class PromoWhatIf:
+    """
+    Forecasts and orders for one decision under two promo states:
+    base (toggled SKUs off promotion) and promo (toggled SKUs on).
+    SKUs outside the toggle keep their own flag in both states.
+    """
+    toggled: np.ndarray
+    base_demand: np.ndarray
+    promo_demand: np.ndarray
+    base_orders: np.ndarray
+    promo_orders: np.ndarray
+
+    @property
+    def uplift(self) -> np.ndarray:
+        return self.promo_demand - self.base_demand
+
+
+def stack_promo_states(
+    df_decision: pd.DataFrame,
+    toggled: np.ndarray,
+) -> pd.DataFrame:
+    """
+    Base rows followed by promo rows for the same SKUs, so both states
+    are scored in a single predict call.
+    """
+    flags = df_decision["onpromotion"].to_numpy()
+
+    base = df_decision.assign(onpromotion=np.where(toggled, 0, flags))
+    promo = df_decision.assign(onpromotion=np.where(toggled, 1, flags))
+
+    return pd.concat([base, promo], ignore_index=True)
+
+
+def promo_what_if(
+    df_decision: pd.DataFrame,
+    predictor,
+    service_level: float,
+    capacity: int,
+    toggled: Optional[np.ndarray] = None,
+    service_floor_ratio: float = 0.0,
+    perishable_weight: float = 1.0,
+) -> PromoWhatIf:
+    """
+    Predict both promo states with one stacked predict and allocate
+    each under `capacity` in one batched pass (capacity is a cap, as
+    in /forecast-to-orders). `toggled` masks the SKUs whose promotion
+    is switched; default is every SKU.
+    """
+    n = len(df_decision)
+    toggled = (
+        np.ones(n, dtype=bool) if toggled is None
+        else np.asarray(toggled, dtype=bool)
+    )
+
+    stacked = stack_promo_states(df_decision, toggled)
+    demand = predictor.predict_df(stacked, service_level=service_level)
+    demand = demand.reshape(2, n)
+
+    orders = optimize_proportional_allocation_batch(
+        demand,
+        capacity=capacity,
+        service_floor_ratio=service_floor_ratio,
+        perishable=np.broadcast_to(
+            df_decision["perishable"].to_numpy().astype(bool), (2, n)
+        ),
+        perishable_weight=perishable_weight,
+        fill_capacity=False,
+    )
+
+    return PromoWhatIf(
+        toggled=toggled,
+        base_demand=demand[0],
+        promo_demand=demand[1],
+        base_orders=orders[0],
+        promo_orders=orders[1],
+    )
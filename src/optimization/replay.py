@@ -0,0 +1,270 @@
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.ml.feature_config import TARGET_COL
+from src.optimization.optimizer import optimize_proportional_allocation_grouped
+
+
+REPLAY_DIMENSIONS = ("store_nbr", "family", "date")
+
+
+@dataclass(frozen=True)
+class ReplayPolicy:
+    """
+    One forecast-to-orders policy, applied to every store-day.
+
+    Capacity is `capacity_units` per store-day when set, otherwise
+    `capacity_ratio` x the store-day's total forecast.
+    """
+    service_level: float = 0.90
+    capacity_ratio: float = 1.0
+    capacity_units: Optional[int] = None
+    service_floor_ratio: float = 0.0
+    perishable_weight: float = 1.0
+
+
+# =====================================================
+# Replay arrays (shared with workers, memory-mapped)
+# =====================================================
+
+@dataclass(frozen=True)
+class ReplayArrays:
+    """
+    .npy files for a replay: decision codes, realized sales,
+    perishable flags, one code column per dimension and one forecast
+    column per service level.
+    """
+    directory: Path
+    n_decisions: int
+    dimension_labels: Dict[str, List[str]]
+    service_levels: List[float]
+
+    def path(self, name: str) -> Path:
+        return self.directory / f"{name}.npy"
+
+    def forecast_name(self, service_level: float) -> str:
+        return f"forecast_p{int(round(service_level * 100))}"
+
+
+def write_replay_arrays(
+    df: pd.DataFrame,
+    forecasts: Dict[float, np.ndarray],
+    directory: Path,
+    dimensions: Sequence[str] = REPLAY_DIMENSIONS,
+) -> ReplayArrays:
+    """
+    Write the replay inputs for `df` (one row per store/date/item,
+    sorted by store and date so each decision is contiguous).
+    `forecasts` maps service level -> predictions aligned with `df`.
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+
+    decision = df.groupby(["store_nbr", "date"], sort=False).ngroup()
+
+    np.save(directory / "decision.npy", decision.to_numpy(dtype=np.int64))
+    np.save(
+        directory / "sales.npy",
+        df[TARGET_COL].clip(lower=0).to_numpy(dtype=np.float64),
+    )
+    np.save(
+        directory / "perishable.npy",
+        df["perishable"].to_numpy().astype(bool),
+    )
+
+    labels = {}
+    for dim in dimensions:
+        values = df[dim]
+        if dim == "date":
+            values = pd.to_datetime(values).dt.strftime("%Y-%m-%d")
+        cat = pd.Categorical(values.astype(str))
+        np.save(directory / f"dim_{dim}.npy", cat.codes.astype(np.int32))
+        labels[dim] = list(cat.categories)
+
+    arrays = ReplayArrays(
+        directory=directory,
+        n_decisions=int(decision.max()) + 1 if len(df) else 0,
+        dimension_labels=labels,
+        service_levels=sorted(forecasts),
+    )
+
+    for level, values in forecasts.items():
+        np.save(
+            arrays.path(arrays.forecast_name(level)),
+            np.asarray(values, dtype=np.float64),
+        )
+
+    return arrays
+
+
+# Per-process handles, opened once by the pool initializer
+_SHARED: Dict[str, np.ndarray] = {}
+
+
+def _attach_shared(arrays: ReplayArrays) -> None:
+    _SHARED.clear()
+    for name in ("decision", "sales", "perishable"):
+        _SHARED[name] = np.load(arrays.path(name), mmap_mode="r")
+    for dim in arrays.dimension_labels:
+        _SHARED[f"dim_{dim}"] = np.load(arrays.path(f"dim_{dim}"), mmap_mode="r")
+    for level in arrays.service_levels:
+        name = arrays.forecast_name(level)
+        _SHARED[name] = np.load(arrays.path(name), mmap_mode="r")
+
+
+def _replay_one(
+    arrays: ReplayArrays,
+    policy: ReplayPolicy,
+) -> Dict[str, Dict[str, np.ndarray]]:
+    """
+    Allocate every store-day under `policy` in one batched pass and
+    return per-dimension sums of the replay metrics.
+    """
+    decision = np.asarray(_SHARED["decision"])
+    sales = np.asarray(_SHARED["sales"])
+    perishable = np.asarray(_SHARED["perishable"])
+    forecast = np.asarray(_SHARED[arrays.forecast_name(policy.service_level)])
+
+    if policy.capacity_units is not None:
+        capacity = float(policy.capacity_units)
+    else:
+        totals = np.bincount(decision, forecast, minlength=arrays.n_decisions)
+        capacity = np.floor(policy.capacity_ratio * totals)
+
+    orders = optimize_proportional_allocation_grouped(
+        decision,
+        forecast,
+        capacity=capacity,
+        service_floor_ratio=policy.service_floor_ratio,
+        perishable=perishable,
+        perishable_weight=policy.perishable_weight,
+    ).astype(np.float64)
+
+    # Single-day decisions: unsold perishables are written off
+    served = np.minimum(orders, sales)
+    overstock = orders - served
+
+    metrics = {
+        "orders": orders,
+        "sales": sales,
+        "served": served,
+        "lost_sales": sales - served,
+        "overstock": overstock,
+        "waste": np.where(perishable, overstock, 0.0),
+    }
+
+    out = {}
+    for dim, labels in arrays.dimension_labels.items():
+        codes = np.asarray(_SHARED[f"dim_{dim}"])
+        out[dim] = {
+            "n_rows": np.bincount(codes, minlength=len(labels)),
+            **{
+                name: np.bincount(codes, values, minlength=len(labels))
+                for name, values in metrics.items()
+            },
+        }
+    out["ALL"] = {
+        "n_rows": np.array([sales.size]),
+        **{name: np.array([values.sum()]) for name, values in metrics.items()},
+    }
+
+    return out
+
+
+def _to_frame(
+    arrays: ReplayArrays,
+    policy_id: int,
+    policy: ReplayPolicy,
+    sums: Dict[str, Dict[str, np.ndarray]],
+) -> pd.DataFrame:
+    frames = []
+    for dim, values in sums.items():
+        labels = arrays.dimension_labels.get(dim, ["ALL"])
+        frame = pd.DataFrame({"segment": labels, **values})
+        frame.insert(0, "dimension", dim)
+        frames.append(frame[frame["n_rows"] > 0])
+
+    out = pd.concat(frames, ignore_index=True)
+    out["fill_rate"] = (out["served"] / out["sales"]).where(out["sales"] > 0, 1.0)
+
+    for i, (key, value) in enumerate(asdict(policy).items()):
+        out.insert(i, key, value)
+    out.insert(0, "policy_id", policy_id)
+
+    return out
+
+
+# =====================================================
+# Driver
+# =====================================================
+
+def prepare_replay_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    One row per (store, date, item), sorted so each store-day decision
+    is a contiguous block.
+    """
+    return (
+        df
+        .sort_values(["store_nbr", "date", "item_nbr"], kind="stable")
+        .drop_duplicates(subset=["store_nbr", "date", "item_nbr"], keep="last")
+        .reset_index(drop=True)
+    )
+
+
+def run_replay(
+    df: pd.DataFrame,
+    forecasts: Dict[float, np.ndarray],
+    policies: Sequence[ReplayPolicy],
+    dimensions: Sequence[str] = REPLAY_DIMENSIONS,
+    max_workers: Optional[int] = None,
+    work_dir: Optional[Path] = None,
+) -> pd.DataFrame:
+    """
+    Replay forecast-to-orders over every store-day of `df` (from
+    prepare_replay_frame) for each policy, against realized unit_sales.
+
+    Forecasts are computed once per service level by the caller and
+    shared by all policies. A single policy runs in-process; a grid
+    runs in a process pool over memory-mapped replay arrays.
+
+    Returns one row per (policy, dimension, segment) plus an "ALL"
+    row per policy with order/sales totals, served units, lost sales,
+    overstock, perishable waste and fill rate (served / sales).
+    """
+    missing = {p.service_level for p in policies} - set(forecasts)
+    if missing:
+        raise ValueError(f"No forecasts for service levels {sorted(missing)}")
+
+    max_workers = max_workers or min(len(policies), os.cpu_count() or 1)
+
+    with tempfile.TemporaryDirectory(dir=work_dir) as tmp:
+        arrays = write_replay_arrays(df, forecasts, Path(tmp), dimensions)
+
+        if len(policies) == 1 or max_workers == 1:
+            _attach_shared(arrays)
+            sums = [_replay_one(arrays, p) for p in policies]
+            _SHARED.clear()
+        else:
+            with ProcessPoolExecutor(
+                max_workers=max_workers,
+                initializer=_attach_shared,
+                initargs=(arrays,),
+            ) as pool:
+                futures = [
+                    pool.submit(_replay_one, arrays, p) for p in policies
+                ]
+                sums = [f.result() for f in futures]
+
+    return pd.concat(
+        [
+            _to_frame(arrays, i, policy, s)
+            for i, (policy, s) in enumerate(zip(policies, sums))
+        ],
+        ignore_index=True,
+    )
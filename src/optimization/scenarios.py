@@ -0,0 +1,125 @@
+import itertools
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.optimization.optimizer import optimize_proportional_allocation_batch
+
+
+@dataclass(frozen=True)
+class Scenario:
+    """
+    One ordering policy for a fixed decision (store, date, SKUs).
+    `capacity` falls back to the grid-wide capacity when None.
+    """
+    service_level: float
+    service_floor_ratio: float = 0.0
+    perishable_weight: float = 1.0
+    capacity: Optional[int] = None
+
+
+def scenario_grid(
+    service_levels: Iterable[float],
+    floor_ratios: Iterable[float] = (0.0,),
+    perishable_weights: Iterable[float] = (1.0,),
+    capacities: Iterable[Optional[int]] = (None,),
+) -> List[Scenario]:
+    """
+    Cartesian product of policy knobs.
+    """
+    return [
+        Scenario(sl, floor, weight, cap)
+        for sl, floor, weight, cap in itertools.product(
+            service_levels, floor_ratios, perishable_weights, capacities
+        )
+    ]
+
+
+def predict_scenario_forecasts(
+    df_decision: pd.DataFrame,
+    predictor,
+    scenarios: Sequence[Scenario],
+) -> Dict[float, np.ndarray]:
+    """
+    Forecasts for the distinct service levels in `scenarios`, each
+    predicted once.
+    """
+    return {
+        level: predictor.predict_df(df_decision, service_level=level)
+        for level in sorted({s.service_level for s in scenarios})
+    }
+
+
+def evaluate_scenarios(
+    forecasts: Dict[float, np.ndarray],
+    perishable: np.ndarray,
+    scenarios: Sequence[Scenario],
+    capacity: Optional[int] = None,
+    top_n: int = 20,
+) -> pd.DataFrame:
+    """
+    Allocate every scenario in one batched pass (one row per scenario
+    over shared forecasts) and summarize each allocation: total units,
+    perishable share, top-N SKU share and average units per SKU.
+    """
+    levels = sorted(forecasts)
+    stacked = np.vstack([np.asarray(forecasts[l], dtype=np.float64) for l in levels])
+    n_skus = stacked.shape[1]
+
+    row_level = np.searchsorted(levels, [s.service_level for s in scenarios])
+    caps = [capacity if s.capacity is None else s.capacity for s in scenarios]
+    if any(c is None for c in caps):
+        raise ValueError("Every scenario needs a capacity (or pass a default)")
+
+    perishable = np.asarray(perishable, dtype=bool)
+
+    orders = optimize_proportional_allocation_batch(
+        stacked[row_level],
+        capacity=np.array(caps, dtype=np.float64),
+        service_floor_ratio=np.array([s.service_floor_ratio for s in scenarios]),
+        perishable=np.broadcast_to(perishable, (len(scenarios), n_skus)),
+        perishable_weight=np.array([s.perishable_weight for s in scenarios]),
+    )
+
+    total = orders.sum(axis=1)
+    safe_total = np.where(total > 0, total, 1)
+
+    k = min(top_n, n_skus)
+    top = (
+        -np.partition(-orders, k - 1, axis=1)[:, :k]
+        if k > 0 else np.zeros((len(scenarios), 0))
+    )
+
+    result = pd.DataFrame([asdict(s) for s in scenarios])
+    result["capacity"] = caps
+    result["total_units"] = total
+    result["perishable_share"] = (orders @ perishable) / safe_total
+    result[f"top{top_n}_share"] = top.sum(axis=1) / safe_total
+    result["avg_units_per_sku"] = orders.mean(axis=1) if n_skus else 0.0
+
+    return result
+
+
+def run_scenario_grid(
+    df_decision: pd.DataFrame,
+    predictor,
+    scenarios: Sequence[Scenario],
+    capacity: Optional[int] = None,
+    top_n: int = 20,
+) -> pd.DataFrame:
+    """
+    Predict each distinct quantile once for the decision rows, then
+    evaluate the whole grid; hundreds of scenarios cost about one
+    forecast plus one batched allocation.
+    """
+    forecasts = predict_scenario_forecasts(df_decision, predictor, scenarios)
+
+    return evaluate_scenarios(
+        forecasts,
+        df_decision["perishable"].to_numpy(),
+        scenarios,
+        capacity=capacity,
+        top_n=top_n,
+    )
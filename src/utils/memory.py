@@ -0,0 +1,37 @@
+import os
+import resource
+from typing import Dict, Optional
+
+
+def process_memory_mb(pid: Optional[int] = None) -> Dict[str, float]:
+    """
+    Memory of a process (default: this one) in MB. On Linux this reads
+    /proc/<pid>/smaps_rollup: `rss` counts shared pages in full while
+    `pss` charges each page 1/N to the N processes mapping it, so PSS
+    summed over workers is their real footprint. Elsewhere only the
+    peak RSS of the current process is available.
+    """
+    try:
+        with open(f"/proc/{pid or 'self'}/smaps_rollup") as f:
+            fields = {}
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[0].endswith(":") and parts[1].isdigit():
+                    fields[parts[0][:-1]] = int(parts[1]) / 1024
+    except OSError:
+        if pid is not None and pid != os.getpid():
+            return {"pid": pid}
+        peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return {"pid": os.getpid(), "rss_mb": round(peak_kb / 1024, 1)}
+
+    return {
+        "pid": pid or os.getpid(),
+        "rss_mb": round(fields.get("Rss", 0.0), 1),
+        "pss_mb": round(fields.get("Pss", 0.0), 1),
+        "shared_mb": round(
+            fields.get("Shared_Clean", 0.0) + fields.get("Shared_Dirty", 0.0), 1
+        ),
+        "private_mb": round(
+            fields.get("Private_Clean", 0.0) + fields.get("Private_Dirty", 0.0), 1
+        ),
+    }
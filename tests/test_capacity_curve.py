@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from src.optimization.capacity_curve import capacity_coverage_curve
+from src.optimization.optimizer import proportional_targets
+
+
+def _served(demand, capacity, **kwargs):
+    continuous, _ = proportional_targets(demand, capacity, **kwargs)
+    return float(np.minimum(continuous, demand).sum())
+
+
+def test_full_coverage_with_flat_tail():
+    # The perishable's weighted demand (10.05) exceeds its demand, so the
+    # curve is flat from 6.7 on; full coverage is reached at capacity 7
+    curve = capacity_coverage_curve(
+        np.array([6.7, 0.0]),
+        service_floor_ratio=0.2,
+        perishable=np.array([True, False]),
+        perishable_weight=1.5,
+    )
+
+    assert curve.min_capacity_for_coverage(1.0) == 7
+
+
+def test_curve_matches_allocator():
+    rng = np.random.default_rng(0)
+    demand = rng.gamma(2.0, 5.0, size=40)
+    perishable = rng.random(40) < 0.3
+    kwargs = dict(service_floor_ratio=0.2, perishable=perishable, perishable_weight=1.5)
+
+    curve = capacity_coverage_curve(demand, **kwargs)
+
+    for capacity in (1, 25, 100, 250, 400, 1000):
+        assert curve.served_at(capacity) == pytest.approx(
+            _served(demand, capacity, **kwargs), rel=1e-9, abs=1e-9
+        )
+
+
+@pytest.mark.parametrize("target", [0.1, 0.5, 0.9, 0.99, 1.0])
+def test_min_capacity_is_smallest_reaching_target(target):
+    rng = np.random.default_rng(1)
+    demand = rng.gamma(2.0, 5.0, size=40)
+    perishable = rng.random(40) < 0.3
+
+    curve = capacity_coverage_curve(
+        demand, service_floor_ratio=0.2, perishable=perishable, perishable_weight=1.5
+    )
+    capacity = curve.min_capacity_for_coverage(target)
+    goal = target * curve.total_demand
+
+    assert curve.served_at(capacity) >= goal * (1 - 1e-9)
+    assert capacity == 0 or curve.served_at(capacity - 1) < goal
+
+
+def test_unreachable_coverage_is_none():
+    # Perishable weight < 1 never allocates the perishable its full demand
+    curve = capacity_coverage_curve(
+        np.array([10.0, 5.0]), perishable=np.array([True, False]), perishable_weight=0.5
+    )
+
+    assert curve.min_capacity_for_coverage(1.0) is None
+    assert curve.min_capacity_for_coverage(0.5) is not None
+
+
+def test_no_demand_needs_no_capacity():
+    curve = capacity_coverage_curve(np.zeros(3))
+
+    assert curve.min_capacity_for_coverage(1.0) == 0
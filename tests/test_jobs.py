@@ -0,0 +1,111 @@
+import os
+import sqlite3
+import subprocess
+import sys
+
+import pytest
+
+from api.jobs import JobStore, QueueFullError
+
+
+def _dead_pid() -> int:
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+def test_submit_rejects_beyond_queue_bound(tmp_path):
+    store = JobStore(tmp_path / "jobs.sqlite")
+    store.submit("chain_plan", {}, tasks_total=1, max_queued=2)
+    store.submit("chain_plan", {}, tasks_total=1, max_queued=2)
+
+    with pytest.raises(QueueFullError):
+        store.submit("chain_plan", {}, tasks_total=1, max_queued=2)
+
+    # A running job no longer counts toward the bound
+    store.claim_next()
+    store.submit("chain_plan", {}, tasks_total=1, max_queued=2)
+
+
+def test_claim_next_takes_oldest_queued(tmp_path):
+    store = JobStore(tmp_path / "jobs.sqlite")
+    first = store.submit("chain_plan", {"n": 1}, tasks_total=3, max_queued=8)
+    second = store.submit("chain_plan", {"n": 2}, tasks_total=3, max_queued=8)
+
+    job = store.claim_next()
+    assert job["job_id"] == first
+    assert job["status"] == "running"
+    assert job["owner_pid"] == os.getpid()
+
+    assert store.claim_next()["job_id"] == second
+    assert store.claim_next() is None
+
+
+def test_request_cancel(tmp_path):
+    store = JobStore(tmp_path / "jobs.sqlite")
+    running = store.submit("chain_plan", {}, tasks_total=1, max_queued=8)
+    store.claim_next()
+    queued = store.submit("chain_plan", {}, tasks_total=1, max_queued=8)
+    done = store.submit("chain_plan", {}, tasks_total=1, max_queued=8)
+    store.finish(done, "done")
+
+    assert store.request_cancel(queued)["status"] == "cancelled"
+    assert store.request_cancel(running)["status"] == "cancelling"
+    assert store.request_cancel(done)["status"] == "done"
+
+
+def test_fail_orphaned_only_fails_dead_owners(tmp_path):
+    store = JobStore(tmp_path / "jobs.sqlite")
+    orphan = store.submit("chain_plan", {}, tasks_total=1, max_queued=8)
+    store.claim_next()
+    alive = store.submit("chain_plan", {}, tasks_total=1, max_queued=8)
+    store.claim_next()
+
+    store._execute(
+        "UPDATE jobs SET owner_pid = ? WHERE job_id = ?", (_dead_pid(), orphan)
+    )
+    store.fail_orphaned()
+
+    assert store.get(orphan)["status"] == "failed"
+    assert store.get(alive)["status"] == "running"
+
+
+def test_requeue_keeps_queue_position(tmp_path):
+    store = JobStore(tmp_path / "jobs.sqlite")
+    first = store.submit("chain_plan", {}, tasks_total=2, max_queued=8)
+    store.claim_next()
+    store.update_progress(first, tasks_done=1, n_rows=10)
+    store.submit("chain_plan", {}, tasks_total=2, max_queued=8)
+
+    store.requeue(first)
+
+    job = store.get(first)
+    assert (job["status"], job["tasks_done"], job["owner_pid"]) == ("queued", 0, None)
+    assert store.claim_next()["job_id"] == first
+
+
+def test_opens_job_file_from_before_added_columns(tmp_path):
+    path = tmp_path / "jobs.sqlite"
+    conn = sqlite3.connect(str(path))
+    conn.execute(
+        "CREATE TABLE jobs (job_id TEXT PRIMARY KEY, kind TEXT NOT NULL, "
+        "status TEXT NOT NULL, params TEXT NOT NULL, tasks_total INTEGER NOT NULL, "
+        "tasks_done INTEGER NOT NULL DEFAULT 0, n_rows INTEGER NOT NULL DEFAULT 0, "
+        "submitted_at REAL NOT NULL, started_at REAL, finished_at REAL, "
+        "owner_pid INTEGER, result_path TEXT, error TEXT)"
+    )
+    conn.execute(
+        "INSERT INTO jobs (job_id, kind, status, params, tasks_total, submitted_at) "
+        "VALUES ('old', 'chain_plan', 'done', '{}', 1, 0)"
+    )
+    conn.commit()
+    conn.close()
+
+    store = JobStore(path)
+    store.record_source("old", "v1", "test")
+
+    job = store.get("old")
+    assert (job["status"], job["model_version"], job["dataset"]) == ("done", "v1", "test")
+
+    # Opening an already migrated file is a no-op
+    JobStore(path)
@@ -0,0 +1,47 @@
+import pytest
+
+import src.ml.predictor_factory as factory
+from src.ml.predictor_factory import REQUIRED_ARTIFACTS, PredictorCache
+
+
+@pytest.fixture
+def models_dir(tmp_path, monkeypatch):
+    # Boosters load lazily, so placeholder artifacts are enough here
+    for version in ("latest", "v1", "v2", "v3"):
+        for name in REQUIRED_ARTIFACTS:
+            path = tmp_path / version / name
+            path.parent.mkdir(exist_ok=True)
+            path.write_text("{}" if name.endswith(".json") else "")
+
+    (tmp_path / "partial").mkdir()
+    (tmp_path / "partial" / "category_schemas.json").write_text("{}")
+
+    monkeypatch.setattr(factory, "MODELS_DIR", tmp_path)
+    return tmp_path
+
+
+def test_model_versions_lists_complete_directories(models_dir):
+    assert factory.model_versions() == ["latest", "v1", "v2", "v3"]
+
+
+def test_cache_keeps_most_recently_used_versions(models_dir):
+    cache = PredictorCache(max_versions=2)
+
+    v1 = cache.get("v1")
+    cache.get("v2")
+    assert cache.get("v1") is v1  # v2 is now the least recently used
+    cache.get("v3")
+
+    stats = cache.stats()
+    assert stats["loaded"] == ["v1", "v3"]
+    assert (stats["hits"], stats["misses"], stats["evictions"]) == (1, 3, 1)
+    assert cache.get("v2") is not None  # built again
+
+
+@pytest.mark.parametrize("version", ["v9", "partial", "../v1", "v1/..", ""])
+def test_cache_rejects_unknown_version_names(models_dir, version):
+    cache = PredictorCache(max_versions=2)
+
+    with pytest.raises(FileNotFoundError):
+        cache.get(version)
+    assert cache.stats()["loaded"] == []
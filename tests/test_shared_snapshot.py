@@ -0,0 +1,76 @@
+import gc
+import os
+
+import numpy as np
+import pandas as pd
+
+from src.data.shared_snapshot import load_shared_snapshot, shared_snapshot_dir
+
+
+def test_snapshot_with_nulls_round_trips(tmp_path):
+    df = pd.DataFrame({
+        "store_nbr": [2, 1, 1],
+        "date": pd.to_datetime(["2016-01-01", "2016-01-02", "2016-01-01"]),
+        "item_nbr": [10, 11, 12],
+        "lag_7": [1.5, np.nan, 3.0],
+        "units_ordered": pd.array([4, None, 6], dtype="Int64"),
+    })
+    source = tmp_path / "featured.parquet"
+    df.to_parquet(source, index=False)
+
+    snapshot = load_shared_snapshot(source, tmp_path / "shared")
+
+    expected = df.sort_values(["store_nbr", "date"]).reset_index(drop=True)
+    np.testing.assert_array_equal(snapshot.df["item_nbr"], expected["item_nbr"])
+    np.testing.assert_array_equal(snapshot.df["lag_7"], expected["lag_7"])
+    assert snapshot.df["units_ordered"].isna().tolist() == [False, True, False]
+
+    rows = snapshot.index.get((1, pd.Timestamp("2016-01-02")))
+    assert snapshot.df["item_nbr"].iloc[rows].tolist() == [11]
+
+
+def test_attached_float_columns_share_the_mapping(tmp_path):
+    df = pd.DataFrame({
+        "store_nbr": [1, 1],
+        "date": pd.to_datetime(["2016-01-01", "2016-01-02"]),
+        "rolling_mean_7": [np.nan, 2.0],
+    })
+    source = tmp_path / "featured.parquet"
+    df.to_parquet(source, index=False)
+
+    snapshot = load_shared_snapshot(source, tmp_path / "shared")
+
+    values = snapshot.df["rolling_mean_7"].to_numpy()
+    assert not values.flags.writeable  # a view on the read-only mapping
+    assert np.isnan(values[0]) and values[1] == 2.0
+
+
+def test_stale_copies_removed_once_detached(tmp_path):
+    source = tmp_path / "featured.parquet"
+    shared = tmp_path / "shared"
+    df = pd.DataFrame({
+        "store_nbr": [1, 1],
+        "date": pd.to_datetime(["2016-01-01", "2016-01-02"]),
+        "lag_7": [1.0, 2.0],
+    })
+    df.to_parquet(source, index=False)
+
+    old = load_shared_snapshot(source, shared)
+    (shared / "featured-0123456789ab.tmp").mkdir()  # crashed conversion
+
+    # Rebuilt source: a new copy; the old one is still attached
+    df.assign(lag_7=[3.0, 4.0]).to_parquet(source, index=False)
+    os.utime(source, ns=(0, source.stat().st_mtime_ns + 1))
+    new_dir = shared_snapshot_dir(source, shared)
+
+    assert new_dir != old.directory
+    assert old.directory.exists()
+    assert not (shared / "featured-0123456789ab.tmp").exists()
+
+    old_dir = old.directory
+    del old
+    gc.collect()
+    shared_snapshot_dir(source, shared)
+
+    assert not old_dir.exists()
+    assert new_dir.exists()
@@ -0,0 +1,82 @@
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from src.data.snapshot_registry import LoadedSnapshot, SnapshotRegistry
+
+
+def _snapshot(dataset: str, nbytes: int = 100) -> LoadedSnapshot:
+    return LoadedSnapshot(
+        dataset=dataset,
+        path=Path(f"{dataset}.parquet"),
+        df_features=pd.DataFrame({"store_nbr": [1]}),
+        decision_index={},
+        nbytes=nbytes,
+        load_seconds=0.0,
+    )
+
+
+def _registry(budget_bytes: int, datasets=("a", "b", "c")):
+    loads = []
+
+    def loader(dataset):
+        loads.append(dataset)
+        return _snapshot(dataset)
+
+    registry = SnapshotRegistry(
+        loader=loader, datasets=lambda: list(datasets), budget_bytes=budget_bytes
+    )
+    return registry, loads
+
+
+def _loaded(registry):
+    return {s["dataset"] for s in registry.stats()["snapshots"] if s["loaded"]}
+
+
+def test_get_loads_once_and_rejects_unknown():
+    registry, loads = _registry(budget_bytes=1000)
+
+    assert registry.get("a") is registry.get("a")
+    assert loads == ["a"]
+
+    with pytest.raises(KeyError):
+        registry.get("missing")
+
+
+def test_evicts_least_recently_used_beyond_budget():
+    registry, loads = _registry(budget_bytes=200)
+    registry.get("a")
+    registry.get("b")
+    registry.get("a")  # b is now the least recently used
+    registry.get("c")
+
+    assert _loaded(registry) == {"a", "c"}
+
+    registry.get("b")  # loaded again
+    assert loads == ["a", "b", "c", "b"]
+
+
+def test_pinned_snapshot_is_never_evicted():
+    registry, _ = _registry(budget_bytes=200)
+    registry.pin(_snapshot("a"))
+    registry.get("b")
+    registry.get("c")
+
+    assert _loaded(registry) == {"a", "c"}
+
+
+def test_pinning_another_dataset_releases_the_previous():
+    registry, loads = _registry(budget_bytes=1000)
+    served = _snapshot("a")
+    registry.pin(served)
+    registry.pin(served)  # same snapshot again (model-only reload)
+    registry.pin(_snapshot("b"))
+
+    stats = {s["dataset"]: s for s in registry.stats()["snapshots"]}
+    assert _loaded(registry) == {"b"}
+    assert (stats["a"]["loads"], stats["a"]["evictions"]) == (1, 1)
+    assert stats["b"]["pinned"]
+
+    registry.get("a")
+    assert loads == ["a"]
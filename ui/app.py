@@ -1,7 +1,6 @@
 import streamlit as st
 import requests
 import pandas as pd
-import numpy as np
 import plotly.graph_objects as go
 
 # =====================================================
@@ -171,29 +170,25 @@ if run_decision:
     )
 
     # =====================================================
-    # Capacity Stress Test (safe demo loop)
+    # Capacity Curve (one call, exact breakpoints)
     # =====================================================
 
-    cap_grid = np.linspace(
-        int(0.3 * total_forecast),
-        int(1.2 * total_forecast),
-        30,
-    ).astype(int)
+    curve_payload = {
+        k: v for k, v in payload.items() if k != "capacity_units"
+    } | {"target_coverages": [p / 100 for p in range(50, 101)]}
 
-    coverages = []
-
-    for cap in cap_grid:
-        test_payload = payload | {"capacity_units": int(cap)}
-        rr = requests.post(
-            f"{API_BASE_URL}/forecast-to-orders",
-            json=test_payload,
-            timeout=10,
-        )
-        tmp = pd.DataFrame(rr.json()["results"])
-        coverages.append(tmp["order_qty"].sum() / total_forecast)
+    rr = requests.post(
+        f"{API_BASE_URL}/capacity-curve",
+        json=curve_payload,
+        timeout=10,
+    )
+    curve = rr.json()
 
-    st.session_state["cap_grid"] = cap_grid
-    st.session_state["coverages"] = coverages
+    st.session_state["curve"] = pd.DataFrame(curve["breakpoints"])
+    st.session_state["min_capacity"] = {
+        round(t["target_coverage"], 2): t["min_capacity"]
+        for t in curve["targets"]
+    }
 
 # =====================================================
 # Display Results
@@ -241,8 +236,7 @@ if "df" in st.session_state:
     # Capacity Curve
     # =====================================================
 
-    cap_grid = st.session_state["cap_grid"]
-    coverages = st.session_state["coverages"]
+    curve = st.session_state["curve"]
 
     target = st.slider(
         "Target demand served (%)",
@@ -253,12 +247,14 @@ if "df" in st.session_state:
 
     fig = go.Figure()
 
+    # Extend the flat tail past the last breakpoint for display
+    x_max = max(curve["capacity"].max(), current_capacity) * 1.1
+
     fig.add_trace(
         go.Scatter(
-            x=cap_grid,
-            y=coverages,
+            x=list(curve["capacity"]) + [x_max],
+            y=list(curve["coverage"]) + [curve["coverage"].iloc[-1]],
             mode="lines+markers",
-            line=dict(shape="hv"),
             name="Demand Served",
         )
     )
@@ -291,16 +287,16 @@ if "df" in st.session_state:
 
     st.plotly_chart(fig, use_container_width=True)
 
-    required_capacity = next(
-        cap for cap, cov in zip(cap_grid, coverages) if cov >= target
-    )
+    required_capacity = st.session_state["min_capacity"].get(round(target, 2))
 
     st.metric(
-        "Minimum Capacity Required (Guaranteed)",
-        f"{required_capacity} units",
+        "Minimum Capacity Required",
+        "unreachable" if required_capacity is None
+        else f"{required_capacity} units",
     )
 
     st.caption(
-        "Coverage is stepwise due to integer SKU allocations. "
-        "The metric shows the smallest capacity that guarantees the target service level."
+        "The curve is exact and piecewise linear in capacity (before "
+        "integer rounding, which moves any SKU by less than one unit). "
+        "The metric is the smallest whole capacity reaching the target."
     )